@@ -0,0 +1 @@
+"""Offline benchmarks for the bulk post uploader (run with ``python -m benchmarks.<name>``)."""
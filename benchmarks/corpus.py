@@ -0,0 +1,87 @@
+"""Synthetic Jekyll corpora for benchmarks.
+
+The posts vary the way real uploads do: some lack fields, some use a string instead of a
+list for categories or tags, some have no frontmatter at all, and a few have filenames that
+don't follow the YYYY-MM-DD-title.md convention.
+"""
+
+import datetime
+import random
+from pathlib import Path
+
+import yaml
+
+WORDS = (
+    "home decor living room kitchen garden light wood modern rustic cozy minimal color wall "
+    "linen oak marble brass velvet terracotta boho scandi loft studio porch nook shelf lamp "
+    "rug sofa table chair mirror plant vase tile sink bath window curtain ceiling floor"
+).split()
+UNICODE_WORDS = ["café", "déco", "naïve", "jardín", "żółty", "北欧", "インテリア"]
+
+def _words(rng, count):
+    return " ".join(rng.choice(WORDS) for _ in range(count))
+
+def synthetic_post(rng, i):
+    """Return (content, filename) for the i-th post of a corpus."""
+    title = _words(rng, rng.randint(3, 9)).title()
+    if rng.random() < 0.05:
+        title += " " + rng.choice(UNICODE_WORDS)
+    date = datetime.date(2018, 1, 1) + datetime.timedelta(days=i % 2500)
+    slug = "-".join(title.lower().split())[:60].strip("-")
+    filename = f"{date}-{slug}-{i}.md"
+    if rng.random() < 0.02:
+        filename = f"{title}.md"
+    
+    metadata = {'title': title, 'date': f"{date} {rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:00"}
+    roll = rng.random()
+    if roll < 0.7:
+        metadata['categories'] = rng.sample(WORDS, rng.randint(1, 3))
+    elif roll < 0.85:
+        metadata['categories'] = rng.choice(WORDS)
+    roll = rng.random()
+    if roll < 0.75:
+        metadata['tags'] = rng.sample(WORDS, rng.randint(2, 8))
+    elif roll < 0.9:
+        metadata['tags'] = rng.choice(WORDS)
+    if rng.random() < 0.8:
+        metadata['description'] = _words(rng, rng.randint(10, 40))
+    if rng.random() < 0.6:
+        metadata['image'] = f"/assets/images/{slug}.jpg"
+    if rng.random() < 0.3:
+        metadata['layout'] = rng.choice(['post', 'gallery', 'wide'])
+    if rng.random() < 0.1:
+        metadata['author'] = {'name': _words(rng, 2).title(), 'twitter': f"@{rng.choice(WORDS)}"}
+    
+    paragraphs = [_words(rng, rng.randint(40, 160)) for _ in range(rng.randint(2, 15))]
+    if rng.random() < 0.3:
+        paragraphs.insert(1, "---")
+    if rng.random() < 0.4:
+        paragraphs.append(f"![{rng.choice(WORDS)}](/assets/images/{rng.choice(WORDS)}.jpg)")
+    body = "\n\n".join(paragraphs) + "\n"
+    
+    if rng.random() < 0.03:
+        return body, filename
+    return f"---\n{yaml.safe_dump(metadata, sort_keys=False, allow_unicode=True)}---\n\n{body}", filename
+
+def generate_corpus(count, seed=0):
+    """Return a list of (content, filename) pairs; the same seed always gives the same corpus."""
+    rng = random.Random(seed)
+    return [synthetic_post(rng, i) for i in range(count)]
+
+def write_corpus(directory, count, seed=0):
+    """Write a corpus to a directory, for exercising the CLI."""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    for content, filename in generate_corpus(count, seed):
+        (directory / filename).write_text(content, encoding="utf-8")
+    return directory
+
+if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Write a synthetic Jekyll corpus to a directory.")
+    parser.add_argument("directory")
+    parser.add_argument("--posts", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    write_corpus(args.directory, args.posts, args.seed)
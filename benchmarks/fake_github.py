@@ -0,0 +1,437 @@
+"""Local stand-in for the parts of the GitHub REST API the uploader uses.
+
+Implements repository lookup, the contents API (create/update a file), the git data API
+(refs, commits, trees, blobs) and tarball archive downloads over an in-memory object store,
+with injectable latency, a primary rate-limit budget and periodic secondary rate-limit
+rejections. Every request is logged with its endpoint and duration so benchmarks can report
+API calls per file and per-endpoint latency.
+
+Blob SHAs are real git blob SHAs, so the uploader's local unchanged check works against it.
+"""
+
+import base64
+import hashlib
+import io
+import json
+import random
+import re
+import tarfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlparse
+
+def _blob_sha(data):
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+def _object_sha(kind, payload):
+    return hashlib.sha1(f"{kind} {json.dumps(payload, sort_keys=True)}".encode("utf-8")).hexdigest()
+
+class FakeRepository:
+    """Git objects and branch refs of one repository."""
+    
+    def __init__(self, owner="bench", name="site", branch="main"):
+        self.owner = owner
+        self.name = name
+        self.lock = threading.RLock()
+        self.blobs = {}
+        self.trees = {}
+        self.commits = {}
+        self.refs = {}
+        root = self.build_tree({"README.md": self.put_blob(b"# Bench site\n")})
+        self.refs[branch] = self.put_commit("Initial commit", root, [])
+    
+    def put_blob(self, data):
+        sha = _blob_sha(data)
+        self.blobs[sha] = data
+        return sha
+    
+    def put_tree(self, entries):
+        entries = sorted(entries, key=lambda entry: entry["path"])
+        sha = _object_sha("tree", entries)
+        self.trees[sha] = entries
+        return sha
+    
+    def put_commit(self, message, tree_sha, parents):
+        commit = {"message": message, "tree": tree_sha, "parents": list(parents)}
+        sha = _object_sha("commit", {**commit, "time": time.time_ns()})
+        self.commits[sha] = commit
+        return sha
+    
+    def flatten(self, tree_sha, prefix=""):
+        """Return {path: blob SHA} for every blob below a tree."""
+        files = {}
+        for entry in self.trees[tree_sha]:
+            path = f"{prefix}{entry['path']}"
+            if entry["type"] == "tree":
+                files.update(self.flatten(entry["sha"], f"{path}/"))
+            else:
+                files[path] = entry["sha"]
+        return files
+    
+    def build_tree(self, files):
+        """Store the nested trees for {path: blob SHA} and return the root tree SHA."""
+        children = {}
+        entries = []
+        for path, sha in files.items():
+            head, _, rest = path.partition("/")
+            if rest:
+                children.setdefault(head, {})[rest] = sha
+            else:
+                entries.append({"path": head, "mode": "100644", "type": "blob", "sha": sha})
+        for name, subtree in children.items():
+            entries.append({"path": name, "mode": "040000", "type": "tree", "sha": self.build_tree(subtree)})
+        return self.put_tree(entries)
+    
+    def list_tree(self, tree_sha, recursive, prefix=""):
+        items = []
+        for entry in self.trees[tree_sha]:
+            items.append({**entry, "path": f"{prefix}{entry['path']}"})
+            if recursive and entry["type"] == "tree":
+                items.extend(self.list_tree(entry["sha"], True, f"{prefix}{entry['path']}/"))
+        return items
+    
+    def is_ancestor(self, ancestor, commit_sha):
+        pending = [commit_sha]
+        while pending:
+            sha = pending.pop()
+            if sha == ancestor:
+                return True
+            pending.extend(self.commits[sha]["parents"])
+        return False
+    
+    def archive(self, commit_sha):
+        """Return a commit's files as a gzipped tarball laid out like GitHub's archive downloads."""
+        root = f"{self.owner}-{self.name}-{commit_sha[:7]}"
+        buffer = io.BytesIO()
+        with tarfile.open(fileobj=buffer, mode="w:gz") as archive:
+            for path, sha in sorted(self.flatten(self.commits[commit_sha]["tree"]).items()):
+                info = tarfile.TarInfo(f"{root}/{path}")
+                info.size = len(self.blobs[sha])
+                archive.addfile(info, io.BytesIO(self.blobs[sha]))
+        return buffer.getvalue()
+    
+    def seed_posts(self, files, branch="main"):
+        """Commit (filename, text) pairs under _posts/ without going through the API."""
+        with self.lock:
+            head = self.refs[branch]
+            tree = self.flatten(self.commits[head]["tree"])
+            for filename, content in files:
+                tree[f"_posts/{filename}"] = self.put_blob(content.encode("utf-8"))
+            self.refs[branch] = self.put_commit("Seed posts", self.build_tree(tree), [head])
+
+class FakeGitHub:
+    """Threaded HTTP server serving one FakeRepository.
+    
+    latency and jitter are seconds added to every request. rate_limit is the primary budget
+    per rate_limit_window seconds (None for unlimited). Every secondary_every-th write is
+    rejected with a secondary rate-limit 403 carrying Retry-After: retry_after.
+    """
+    
+    def __init__(self, repository=None, latency=0.0, jitter=0.0, rate_limit=None, rate_limit_window=60.0,
+                 secondary_every=None, retry_after=1, seed=0):
+        self.repository = repository or FakeRepository()
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit = rate_limit
+        self.rate_limit_window = rate_limit_window
+        self.secondary_every = secondary_every
+        self.retry_after = retry_after
+        self.requests = []
+        self._random = random.Random(seed)
+        self._budget_lock = threading.Lock()
+        self._remaining = rate_limit
+        self._reset_at = time.time() + rate_limit_window
+        self._writes = 0
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+    
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+    
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+    
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+    
+    def reset_log(self):
+        self.requests = []
+    
+    def _rate_limit_headers(self):
+        with self._budget_lock:
+            now = time.time()
+            if now >= self._reset_at:
+                self._remaining = self.rate_limit
+                self._reset_at = now + self.rate_limit_window
+            limit = self.rate_limit if self.rate_limit is not None else 5000
+            remaining = self._remaining if self._remaining is not None else 5000
+            exhausted = self._remaining is not None and self._remaining <= 0
+            if self._remaining is not None and not exhausted:
+                self._remaining -= 1
+                remaining = self._remaining
+            headers = {
+                "X-RateLimit-Limit": str(limit),
+                "X-RateLimit-Remaining": str(remaining),
+                "X-RateLimit-Reset": str(int(self._reset_at) + 1),
+            }
+        return headers, exhausted
+    
+    def _secondary_limited(self, method):
+        if not self.secondary_every or method == "GET":
+            return False
+        with self._budget_lock:
+            self._writes += 1
+            return self._writes % self.secondary_every == 0
+    
+    def _handler_class(self):
+        server = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            
+            def log_message(self, format, *args):
+                pass
+            
+            def _respond(self, status, payload=None, headers=None):
+                # Archive downloads are served as raw bytes, everything else as JSON
+                if isinstance(payload, bytes):
+                    body, content_type = payload, "application/x-gzip"
+                else:
+                    body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+                    content_type = "application/json; charset=utf-8"
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                if body:
+                    self.wfile.write(body)
+            
+            def _handle(self, method):
+                start = time.perf_counter()
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length) or b"{}") if length else {}
+                delay = server.latency + server._random.uniform(0, server.jitter)
+                if delay:
+                    time.sleep(delay)
+                
+                rate_headers, exhausted = server._rate_limit_headers()
+                endpoint = "other"
+                if exhausted:
+                    status, payload, extra = 403, {"message": "API rate limit exceeded"}, {}
+                elif server._secondary_limited(method):
+                    status = 403
+                    payload = {"message": "You have exceeded a secondary rate limit. Please wait a few minutes."}
+                    extra = {"Retry-After": str(server.retry_after)}
+                else:
+                    endpoint, (status, payload, extra) = server._route(method, urlparse(self.path), body, self.headers)
+                self._respond(status, payload, {**rate_headers, **extra})
+                server.requests.append({
+                    "method": method,
+                    "endpoint": endpoint,
+                    "status": status,
+                    "duration": time.perf_counter() - start,
+                    "bytes": length,
+                    "authorization": self.headers.get("Authorization"),
+                })
+            
+            def do_GET(self):
+                self._handle("GET")
+            
+            def do_POST(self):
+                self._handle("POST")
+            
+            def do_PUT(self):
+                self._handle("PUT")
+            
+            def do_PATCH(self):
+                self._handle("PATCH")
+        
+        return Handler
+    
+    # --- routing -------------------------------------------------------------------------
+    
+    ROUTES = [
+        ("GET", r"/repos/(?P<owner>[^/]+)/(?P<name>[^/]+)$", "repo"),
+        ("GET", r"/repos/[^/]+/[^/]+/git/refs?/heads/(?P<branch>.+)$", "get_ref"),
+        ("PATCH", r"/repos/[^/]+/[^/]+/git/refs/heads/(?P<branch>.+)$", "update_ref"),
+        ("GET", r"/repos/[^/]+/[^/]+/git/commits/(?P<sha>\w+)$", "get_commit"),
+        ("POST", r"/repos/[^/]+/[^/]+/git/commits$", "create_commit"),
+        ("GET", r"/repos/[^/]+/[^/]+/git/trees/(?P<sha>\w+)$", "get_tree"),
+        ("POST", r"/repos/[^/]+/[^/]+/git/trees$", "create_tree"),
+        ("POST", r"/repos/[^/]+/[^/]+/git/blobs$", "create_blob"),
+        ("GET", r"/repos/[^/]+/[^/]+/git/blobs/(?P<sha>\w+)$", "get_blob"),
+        ("GET", r"/repos/[^/]+/[^/]+/contents/(?P<path>.+)$", "get_contents"),
+        ("PUT", r"/repos/[^/]+/[^/]+/contents/(?P<path>.+)$", "put_contents"),
+        ("GET", r"/repos/[^/]+/[^/]+/tarball/(?P<ref>.+)$", "tarball"),
+        ("GET", r"/archives/(?P<sha>\w+)\.tar\.gz$", "archive"),
+    ]
+    
+    def _route(self, method, url, body, headers):
+        for route_method, pattern, name in self.ROUTES:
+            match = re.match(pattern, url.path)
+            if route_method == method and match:
+                query = dict(part.split("=", 1) for part in url.query.split("&") if "=" in part)
+                with self.repository.lock:
+                    return name, getattr(self, f"_{name}")(body, headers, query, **match.groupdict())
+        return "unknown", (404, {"message": "Not Found"}, {})
+    
+    def _api(self, path):
+        return f"{self.url}/repos/{self.repository.owner}/{self.repository.name}{path}"
+    
+    def _commit_json(self, sha):
+        commit = self.repository.commits[sha]
+        return {
+            "sha": sha,
+            "url": self._api(f"/git/commits/{sha}"),
+            "message": commit["message"],
+            "tree": {"sha": commit["tree"], "url": self._api(f"/git/trees/{commit['tree']}")},
+            "parents": [{"sha": parent, "url": self._api(f"/git/commits/{parent}")} for parent in commit["parents"]],
+        }
+    
+    def _ref_json(self, branch):
+        sha = self.repository.refs[branch]
+        return {
+            "ref": f"refs/heads/{branch}",
+            "url": self._api(f"/git/refs/heads/{branch}"),
+            "object": {"sha": sha, "type": "commit", "url": self._api(f"/git/commits/{sha}")},
+        }
+    
+    def _repo(self, body, headers, query, owner, name):
+        repository = self.repository
+        if (owner, name) != (repository.owner, repository.name):
+            return 404, {"message": "Not Found"}, {}
+        return 200, {
+            "id": 1,
+            "name": name,
+            "full_name": f"{owner}/{name}",
+            "url": self._api(""),
+            "default_branch": "main",
+        }, {}
+    
+    def _get_ref(self, body, headers, query, branch):
+        if branch not in self.repository.refs:
+            return 404, {"message": "Not Found"}, {}
+        etag = f'"{self.repository.refs[branch]}"'
+        if headers.get("If-None-Match") == etag:
+            return 304, None, {"ETag": etag}
+        return 200, self._ref_json(branch), {"ETag": etag}
+    
+    def _update_ref(self, body, headers, query, branch):
+        current = self.repository.refs.get(branch)
+        new_sha = body["sha"]
+        if new_sha not in self.repository.commits:
+            return 422, {"message": "Object does not exist"}, {}
+        if not body.get("force") and not self.repository.is_ancestor(current, new_sha):
+            return 422, {"message": "Update is not a fast forward"}, {}
+        self.repository.refs[branch] = new_sha
+        return 200, self._ref_json(branch), {}
+    
+    def _get_commit(self, body, headers, query, sha):
+        if sha not in self.repository.commits:
+            return 404, {"message": "Not Found"}, {}
+        return 200, self._commit_json(sha), {}
+    
+    def _create_commit(self, body, headers, query):
+        sha = self.repository.put_commit(body["message"], body["tree"], body.get("parents", []))
+        return 201, self._commit_json(sha), {}
+    
+    def _get_tree(self, body, headers, query, sha):
+        if sha not in self.repository.trees:
+            return 404, {"message": "Not Found"}, {}
+        items = self.repository.list_tree(sha, recursive=query.get("recursive") not in (None, "0", "false"))
+        return 200, {
+            "sha": sha,
+            "url": self._api(f"/git/trees/{sha}"),
+            "tree": [{**item, "url": self._api(f"/git/{item['type']}s/{item['sha']}")} for item in items],
+            "truncated": False,
+        }, {}
+    
+    def _create_tree(self, body, headers, query):
+        files = self.repository.flatten(body["base_tree"]) if body.get("base_tree") else {}
+        for element in body["tree"]:
+            if element.get("sha") is None and "content" not in element:
+                files.pop(element["path"], None)
+            elif "content" in element:
+                files[element["path"]] = self.repository.put_blob(element["content"].encode("utf-8"))
+            else:
+                files[element["path"]] = element["sha"]
+        sha = self.repository.build_tree(files)
+        return 201, {"sha": sha, "url": self._api(f"/git/trees/{sha}"), "tree": [], "truncated": False}, {}
+    
+    def _create_blob(self, body, headers, query):
+        if body.get("encoding") == "base64":
+            data = base64.b64decode(body["content"])
+        else:
+            data = body["content"].encode("utf-8")
+        sha = self.repository.put_blob(data)
+        return 201, {"sha": sha, "url": self._api(f"/git/blobs/{sha}")}, {}
+    
+    def _get_blob(self, body, headers, query, sha):
+        if sha not in self.repository.blobs:
+            return 404, {"message": "Not Found"}, {}
+        data = self.repository.blobs[sha]
+        return 200, {
+            "sha": sha,
+            "url": self._api(f"/git/blobs/{sha}"),
+            "size": len(data),
+            "encoding": "base64",
+            "content": base64.b64encode(data).decode("ascii"),
+        }, {}
+    
+    def _content_json(self, path, sha):
+        return {
+            "type": "file",
+            "name": path.rsplit("/", 1)[-1],
+            "path": path,
+            "sha": sha,
+            "url": self._api(f"/contents/{path}"),
+        }
+    
+    def _get_contents(self, body, headers, query, path):
+        path = unquote(path)
+        branch = query.get("ref", "main")
+        files = self.repository.flatten(self.repository.commits[self.repository.refs[branch]]["tree"])
+        if path in files:
+            return 200, self._content_json(path, files[path]), {}
+        prefix = path.rstrip("/") + "/"
+        listing = [self._content_json(name, sha) for name, sha in files.items() if name.startswith(prefix)]
+        if listing:
+            return 200, listing, {}
+        return 404, {"message": "Not Found"}, {}
+    
+    def _put_contents(self, body, headers, query, path):
+        path = unquote(path)
+        branch = body.get("branch", "main")
+        head = self.repository.refs[branch]
+        files = self.repository.flatten(self.repository.commits[head]["tree"])
+        if path in files and body.get("sha") != files[path]:
+            if body.get("sha") is None:
+                return 422, {"message": "Invalid request.\n\n\"sha\" wasn't supplied."}, {}
+            return 409, {"message": f"{path} does not match {body.get('sha')}"}, {}
+        files[path] = self.repository.put_blob(base64.b64decode(body["content"]))
+        commit = self.repository.put_commit(body["message"], self.repository.build_tree(files), [head])
+        self.repository.refs[branch] = commit
+        status = 200 if body.get("sha") else 201
+        return status, {"content": self._content_json(path, files[path]), "commit": self._commit_json(commit)}, {}
+    
+    def _tarball(self, body, headers, query, ref):
+        ref = unquote(ref)
+        sha = self.repository.refs.get(ref, ref)
+        if sha not in self.repository.commits:
+            return 404, {"message": "Not Found"}, {}
+        # Like codeload.github.com, the archive itself is served from another URL
+        return 302, None, {"Location": f"{self.url}/archives/{sha}.tar.gz"}
+    
+    def _archive(self, body, headers, query, sha):
+        if sha not in self.repository.commits:
+            return 404, {"message": "Not Found"}, {}
+        return 200, self.repository.archive(sha), {}
@@ -0,0 +1,74 @@
+"""Compare the frontmatter parser against the original split-and-safe_load implementation.
+
+    python -m benchmarks.parse --files 5000
+"""
+
+import argparse
+import datetime
+import time
+from pathlib import Path
+
+import yaml
+
+from benchmarks.corpus import generate_corpus
+from bulkpost import posts
+
+def legacy_parse_markdown_file(content, filename):
+    """The parser as it was before frontmatter fences, libyaml and caching."""
+    try:
+        parts = content.split('---', 2)
+        if len(parts) >= 3:
+            frontmatter_content = parts[1].strip()
+            body_content = parts[2].strip()
+            metadata = yaml.safe_load(frontmatter_content)
+            if metadata is None:
+                metadata = {}
+        else:
+            metadata = {}
+            body_content = content.strip()
+        
+        if 'title' not in metadata:
+            metadata['title'] = Path(filename).stem.replace('-', ' ').title()
+        if 'date' not in metadata:
+            metadata['date'] = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        if 'categories' not in metadata:
+            metadata['categories'] = []
+        elif isinstance(metadata['categories'], str):
+            metadata['categories'] = [metadata['categories']]
+        if 'tags' not in metadata:
+            metadata['tags'] = []
+        elif isinstance(metadata['tags'], str):
+            metadata['tags'] = [metadata['tags']]
+        for field, default in (('description', ''), ('image', ''), ('layout', 'post')):
+            metadata.setdefault(field, default)
+        return metadata, body_content
+    except Exception:
+        return {}, content
+
+def _timed(label, func, count):
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<34} {elapsed:8.3f}s  {count / elapsed:10.0f} files/s")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args(argv)
+    
+    files = generate_corpus(args.files)
+    print(f"{args.files} posts, libyaml available: {yaml.__with_libyaml__}")
+    
+    _timed("legacy (split + safe_load)", lambda: [legacy_parse_markdown_file(*f) for f in files], args.files)
+    
+    posts._parse_cache.clear()
+    _timed("fenced + C loader, serial", lambda: posts.parse_markdown_files(files, workers=1), args.files)
+    
+    posts._parse_cache.clear()
+    _timed("fenced + C loader, process pool", lambda: posts.parse_markdown_files(files, workers=args.workers), args.files)
+    
+    _timed("cached rerun", lambda: posts.parse_markdown_files(files), args.files)
+
+if __name__ == "__main__":
+    main()
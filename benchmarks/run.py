@@ -0,0 +1,201 @@
+"""End-to-end benchmark of parse, render and upload against a local fake GitHub API.
+
+    python -m benchmarks.run --posts 2000 --latency 0.02 --mode batch
+    python -m benchmarks.run --posts 500 --mode per-file --rate-limit 400 --secondary-every 50
+
+Reports throughput, API calls per file and p50/p99 latency per phase and per API endpoint.
+The upload phase latency of a file is the time from the start of the upload until its
+result was known. With --repeat the same corpus is uploaded a second time, which measures
+the unchanged-file path, and with --import the published posts are imported back through a
+single branch archive download.
+"""
+
+import argparse
+import json
+import tempfile
+import time
+from collections import defaultdict
+
+from benchmarks.corpus import generate_corpus
+from benchmarks.fake_github import FakeGitHub
+from bulkpost import github_upload, posts
+from bulkpost.github_upload import GitHubTarget, upload_to_github, upload_to_github_batch
+from bulkpost.ingest import import_branch_posts
+from bulkpost.store import ContentStore
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a list of numbers; 0 for an empty list."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))]
+
+def summarize(label, durations, elapsed, files, api_calls=None):
+    summary = {
+        "phase": label,
+        "files": files,
+        "seconds": elapsed,
+        "files_per_second": files / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(durations, 0.50) * 1000,
+        "p99_ms": percentile(durations, 0.99) * 1000,
+    }
+    if api_calls is not None:
+        summary["api_calls"] = api_calls
+        summary["api_calls_per_file"] = api_calls / files if files else 0.0
+    return summary
+
+def bench_parse(corpus):
+    posts._parse_cache.clear()
+    durations = []
+    parsed = []
+    start = time.perf_counter()
+    for content, filename in corpus:
+        t = time.perf_counter()
+        metadata, body, frontmatter = posts.parse_post(content, filename, use_cache=False)
+        durations.append(time.perf_counter() - t)
+        parsed.append((filename, metadata, body, frontmatter))
+    return parsed, summarize("parse", durations, time.perf_counter() - start, len(corpus))
+
+def bench_render(parsed):
+    durations = []
+    files_to_upload = []
+    start = time.perf_counter()
+    for filename, metadata, body, frontmatter in parsed:
+        t = time.perf_counter()
+        upload_filename, upload_meta = posts.upload_metadata(filename, metadata)
+        files_to_upload.append((upload_filename, posts.render_post(upload_meta, body, frontmatter)))
+        durations.append(time.perf_counter() - t)
+    return files_to_upload, summarize("render", durations, time.perf_counter() - start, len(parsed))
+
+def bench_upload(server, files_to_upload, mode, concurrency, label):
+    target = GitHubTarget(
+        token="bench-token",
+        owner=server.repository.owner,
+        name=server.repository.name,
+        api_url=server.url,
+    )
+    upload = upload_to_github_batch if mode == "batch" else upload_to_github
+    server.reset_log()
+    durations = []
+    start = time.perf_counter()
+    results = upload(
+        files_to_upload,
+        target,
+        concurrency=concurrency,
+        on_result=lambda result: durations.append(time.perf_counter() - start),
+    )
+    elapsed = time.perf_counter() - start
+    
+    statuses = defaultdict(int)
+    for result in results:
+        statuses[result["status"]] += 1
+    summary = summarize(label, durations, elapsed, len(files_to_upload), api_calls=len(server.requests))
+    summary["statuses"] = dict(statuses)
+    summary["bytes_sent"] = sum(request["bytes"] for request in server.requests)
+    summary["rate_limited"] = sum(1 for request in server.requests if request["status"] == 403)
+    return summary, endpoint_latencies(server.requests)
+
+def bench_import(server):
+    """Import the published posts back, measuring API calls per imported post."""
+    target = GitHubTarget(
+        token="bench-token",
+        owner=server.repository.owner,
+        name=server.repository.name,
+        api_url=server.url,
+    )
+    # Start from a cold remote index, as a fresh session would
+    github_upload._POSTS_INDEX_CACHE.clear()
+    server.reset_log()
+    with tempfile.TemporaryDirectory() as root:
+        start = time.perf_counter()
+        contents = import_branch_posts(target, ContentStore(root))
+        elapsed = time.perf_counter() - start
+    summary = summarize("import", [], elapsed, len(contents.posts), api_calls=len(server.requests))
+    return summary, endpoint_latencies(server.requests)
+
+def endpoint_latencies(requests):
+    by_endpoint = defaultdict(list)
+    for request in requests:
+        by_endpoint[request["endpoint"]].append(request["duration"])
+    return {
+        endpoint: {
+            "calls": len(durations),
+            "p50_ms": percentile(durations, 0.50) * 1000,
+            "p99_ms": percentile(durations, 0.99) * 1000,
+        }
+        for endpoint, durations in sorted(by_endpoint.items())
+    }
+
+def _print_report(report):
+    print(f"{report['posts']} posts, mode={report['mode']}, concurrency={report['concurrency']}, "
+          f"latency={report['latency'] * 1000:.0f}ms")
+    print(f"{'phase':<16} {'seconds':>9} {'files/s':>10} {'p50 ms':>9} {'p99 ms':>9} {'calls/file':>11}")
+    for phase in report["phases"]:
+        calls = f"{phase['api_calls_per_file']:.2f}" if "api_calls" in phase else "-"
+        print(f"{phase['phase']:<16} {phase['seconds']:9.3f} {phase['files_per_second']:10.1f} "
+              f"{phase['p50_ms']:9.2f} {phase['p99_ms']:9.2f} {calls:>11}")
+        if "statuses" in phase:
+            statuses = ", ".join(f"{count} {status}" for status, count in sorted(phase["statuses"].items()))
+            print(f"{'':<16} {statuses}; {phase['rate_limited']} rate limited; {phase['bytes_sent']} bytes sent")
+    for label, endpoints in report["endpoints"].items():
+        print(f"\n{label} endpoints")
+        for endpoint, stats in endpoints.items():
+            print(f"  {endpoint:<16} {stats['calls']:7d} calls  p50 {stats['p50_ms']:8.2f}ms  p99 {stats['p99_ms']:8.2f}ms")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--posts", type=int, default=1000, help="Corpus size (10 to 50000 is sensible)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--mode", choices=["batch", "per-file"], default="batch")
+    parser.add_argument("--concurrency", type=int, default=github_upload.DEFAULT_UPLOAD_CONCURRENCY)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every API request")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Random extra seconds per API request")
+    parser.add_argument("--rate-limit", type=int, default=None, help="Primary budget per rate-limit window")
+    parser.add_argument("--rate-limit-window", type=float, default=10.0)
+    parser.add_argument("--secondary-every", type=int, default=None,
+                        help="Reject every Nth write with a secondary rate limit")
+    parser.add_argument("--repeat", action="store_true", help="Upload a second time to measure unchanged files")
+    parser.add_argument("--import", dest="import_posts", action="store_true",
+                        help="Import the published posts back from a branch archive")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args(argv)
+    
+    corpus = generate_corpus(args.posts, args.seed)
+    parsed, parse_summary = bench_parse(corpus)
+    files_to_upload, render_summary = bench_render(parsed)
+    report = {
+        "posts": args.posts,
+        "mode": args.mode,
+        "concurrency": args.concurrency,
+        "latency": args.latency,
+        "phases": [parse_summary, render_summary],
+        "endpoints": {},
+    }
+    
+    github_upload._POSTS_INDEX_CACHE.clear()
+    server = FakeGitHub(
+        latency=args.latency,
+        jitter=args.jitter,
+        rate_limit=args.rate_limit,
+        rate_limit_window=args.rate_limit_window,
+        secondary_every=args.secondary_every,
+        seed=args.seed,
+    )
+    with server:
+        runs = ["upload"] + (["upload (repeat)"] if args.repeat else [])
+        for label in runs:
+            summary, endpoints = bench_upload(server, files_to_upload, args.mode, args.concurrency, label)
+            report["phases"].append(summary)
+            report["endpoints"][label] = endpoints
+        if args.import_posts:
+            summary, endpoints = bench_import(server)
+            report["phases"].append(summary)
+            report["endpoints"]["import"] = endpoints
+    
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        _print_report(report)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""Core of the bulk post uploader, usable without the Streamlit app.
+
+Only the standard library is imported here; yaml and PyGithub are loaded the
+first time a function needs them so that command line runs start quickly.
+"""
+
+from bulkpost.posts import (
+    Frontmatter,
+    format_filename,
+    git_blob_sha,
+    parse_markdown_file,
+    parse_markdown_files,
+    parse_post,
+    parse_posts,
+    render_post,
+    validate_filename,
+)
+from bulkpost.github_upload import (
+    DEFAULT_UPLOAD_CONCURRENCY,
+    GitHubTarget,
+    upload_to_github,
+    upload_to_github_batch,
+)
+from bulkpost.metrics import UploadMetrics
+
+__all__ = [
+    "DEFAULT_UPLOAD_CONCURRENCY",
+    "Frontmatter",
+    "GitHubTarget",
+    "UploadMetrics",
+    "format_filename",
+    "git_blob_sha",
+    "parse_markdown_file",
+    "parse_markdown_files",
+    "parse_post",
+    "parse_posts",
+    "render_post",
+    "upload_to_github",
+    "upload_to_github_batch",
+    "validate_filename",
+]
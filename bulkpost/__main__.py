@@ -0,0 +1,5 @@
+import sys
+
+from bulkpost.cli import main
+
+sys.exit(main())
@@ -0,0 +1,699 @@
+"""Command line entry point for publishing a directory of posts without Streamlit.
+
+Example:
+    python -m bulkpost publish ./posts --owner mapat254 --repo HOMEDECOR2 --dry-run
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+def _load_dotenv():
+    """Load a .env file when python-dotenv is installed, like the Streamlit app does."""
+    try:
+        from dotenv import load_dotenv
+    except ImportError:
+        return
+    load_dotenv()
+
+def _read_posts(path, store, metrics):
+    """Return (posts, assets) for a directory of posts or a zip/tar archive of them.
+    
+    posts yields (filename, metadata, body, source path, Frontmatter or None); assets maps each
+    image path to its store key.
+    """
+    from bulkpost.images import is_image
+    from bulkpost.ingest import ingest_archive, is_archive
+    from bulkpost.posts import parse_posts
+    
+    path = Path(path)
+    if path.is_file() and is_archive(path.name):
+        # Stream the archive: bodies are spilled to disk and read back one at a time
+        start = time.perf_counter()
+        with open(path, "rb") as archive:
+            contents = ingest_archive(archive, path.name, store)
+        metrics.observe("parse", time.perf_counter() - start, items=len(contents.posts))
+        posts = (
+            (post.filename, post.metadata, store.get(post.body_key), post.source_path, post.frontmatter)
+            for post in contents.posts
+        )
+        return posts, contents.assets
+    
+    assets = {}
+    for asset_path in sorted(path.rglob("*")):
+        if asset_path.is_file() and is_image(asset_path.name):
+            with open(asset_path, "rb") as stream:
+                assets[asset_path.relative_to(path).as_posix()] = store.put_stream(stream)
+    
+    paths = sorted(path.glob("*.md"))
+    with metrics.span("parse", items=len(paths)):
+        parsed_files = parse_posts([(post_path.read_text(encoding="utf-8"), post_path.name) for post_path in paths])
+    posts = (
+        (post_path.name, metadata, body, post_path.name, frontmatter)
+        for post_path, (metadata, body, frontmatter) in zip(paths, parsed_files)
+    )
+    return posts, assets
+
+def load_posts(path, fix_filenames=False, image_settings=None, remote_images=None, metrics=None, link_checker=None):
+    """Parse, check and render a directory or archive of posts, plus the images they use.
+    
+    Returns (upload filename, content) pairs and the pre-flight report; posts the report
+    blocks are left out.
+    """
+    from bulkpost.images import ImagePipeline
+    from bulkpost.metrics import UploadMetrics
+    from bulkpost.store import ContentStore
+    
+    metrics = metrics if metrics is not None else UploadMetrics()
+    store = ContentStore()
+    posts, assets = _read_posts(path, store, metrics)
+    images = ImagePipeline(store, assets, image_settings, remote_images)
+    
+    prepared = []
+    frontmatter = {}
+    for filename, metadata, body, source_path, original in posts:
+        prepared.append(prepare_post(filename, metadata, body, source_path, images, fix_filenames, metrics))
+        frontmatter[prepared[-1][0]] = original
+    files, report = check_and_render(prepared, images, metrics, link_checker, frontmatter)
+    return images.files_to_upload() + files, report
+
+def prepare_post(filename, metadata, body, source_path, images, fix_filenames, metrics):
+    """Check the filename and rewrite image references of one parsed post into (upload filename, metadata, body)."""
+    from bulkpost.posts import format_filename, validate_filename
+    
+    if not validate_filename(filename):
+        suggested_filename = format_filename(metadata['title'])
+        if fix_filenames:
+            filename = suggested_filename
+        else:
+            print(
+                f"warning: '{filename}' doesn't follow Jekyll post format (YYYY-MM-DD-title.md); "
+                f"suggested: {suggested_filename}",
+                file=sys.stderr
+            )
+    # Image rewriting counts towards rendering; the posts themselves are counted once they are rendered
+    with metrics.span("render", items=0):
+        metadata, body = images.rewrite(metadata, body, source_path)
+    return filename, metadata, body
+
+def check_and_render(prepared, images, metrics, link_checker=None, frontmatter=None):
+    """Run the pre-flight checks over prepared posts, print their issues and render the posts that pass.
+    
+    frontmatter maps upload filenames to the Frontmatter their files were parsed with.
+    """
+    from bulkpost.posts import render_post
+    from bulkpost.preflight import preflight
+    
+    frontmatter = frontmatter or {}
+    with metrics.span("preflight", items=len(prepared)):
+        report = preflight(
+            [(filename, filename, metadata, body) for filename, metadata, body in prepared],
+            known_paths=images.site_paths() if images.settings.enabled else None,
+            link_checker=link_checker,
+            frontmatter=frontmatter
+        )
+    for issue in sorted(report.issues, key=lambda issue: (issue.filename, issue.severity != "error")):
+        print(f"{issue.severity}: {issue.filename}: {issue.check}: {issue.message}", file=sys.stderr)
+    if report.blocked:
+        print(f"{len(report.blocked)} post(s) blocked by pre-flight errors", file=sys.stderr)
+    with metrics.span("render", items=len(prepared)):
+        files = [
+            (filename, render_post(metadata, body, frontmatter.get(filename)))
+            for filename, metadata, body in prepared
+            if filename not in report.blocked
+        ]
+    return files, report
+
+def _progress_printer():
+    """Return a progress callback that redraws a percentage on an interactive stderr."""
+    if not sys.stderr.isatty():
+        return None
+    
+    def progress(fraction):
+        sys.stderr.write(f"\ruploading... {fraction:6.1%}")
+        if fraction >= 1.0:
+            sys.stderr.write("\n")
+        sys.stderr.flush()
+    
+    return progress
+
+def _print_results(results, as_json):
+    if as_json:
+        json.dump(results, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+        return
+    for result in results:
+        detail = result.get("message") or result.get("url", "")
+        print(f"{result['status']:<10} {result['filename']}  {detail}".rstrip())
+
+def _add_metrics_arguments(parser):
+    parser.add_argument("--metrics", metavar="FILE", help="Write phase timings and API counters to FILE ('-' for stderr).")
+    parser.add_argument(
+        "--metrics-format",
+        choices=["json", "prometheus"],
+        default="json",
+        help="Format of the --metrics output."
+    )
+
+def _write_metrics(metrics, args):
+    if not args.metrics:
+        return
+    text = metrics.to_prometheus() if args.metrics_format == "prometheus" else metrics.to_json() + "\n"
+    if args.metrics == "-":
+        sys.stderr.write(text)
+    else:
+        Path(args.metrics).write_text(text, encoding="utf-8")
+
+def _add_target_arguments(parser):
+    parser.add_argument("--owner", default="mapat254", help="GitHub username or organization name.")
+    parser.add_argument("--repo", default="HOMEDECOR2", help="Repository name.")
+    parser.add_argument("--branch", default="main", help="Branch to publish to.")
+    parser.add_argument("--token", help="Personal access token (defaults to $GITHUB_TOKEN).")
+    parser.add_argument("--api-url", default="https://api.github.com", help="GitHub API base URL, e.g. for GitHub Enterprise.")
+    parser.add_argument("--concurrency", type=int, default=None, help="GitHub API requests kept in flight.")
+
+def _mirror(value):
+    repository, _sep, branch = value.partition("@")
+    owner, sep, name = repository.partition("/")
+    if not sep or not owner or not name or "/" in name:
+        raise argparse.ArgumentTypeError(f"expected OWNER/REPO[@BRANCH], got {value!r}")
+    return owner, name, branch or None
+
+def _add_post_arguments(parser):
+    parser.add_argument(
+        "--fix-filenames",
+        action="store_true",
+        help="Rename files that don't follow the Jekyll post format to the suggested name."
+    )
+    parser.add_argument("--no-images", action="store_true", help="Leave image references and files alone.")
+    parser.add_argument("--image-max-width", type=int, default=None, help="Downscale wider images to this width.")
+    parser.add_argument("--image-quality", type=int, default=None, help="JPEG/WebP quality for recompressed images.")
+    parser.add_argument(
+        "--image-url-prefix",
+        default=None,
+        help="Put in front of rewritten image references in post bodies (default '{{site.baseurl}}'; '' for none)."
+    )
+    parser.add_argument(
+        "--check-links",
+        action="store_true",
+        help="Also check that external links and images are reachable before publishing."
+    )
+
+def build_parser():
+    from bulkpost.schedule import DEFAULT_WINDOW
+    from bulkpost.store import DEFAULT_MAX_AGE
+    from bulkpost.watch import DEFAULT_DEBOUNCE, DEFAULT_INTERVAL
+    
+    parser = argparse.ArgumentParser(prog="bulkpost", description="Bulk upload Jekyll posts to GitHub.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    publish = subparsers.add_parser("publish", help="Publish every .md file in a directory or archive to _posts/.")
+    publish.add_argument("directory", help="Directory, or zip/tar archive, containing the markdown posts.")
+    _add_target_arguments(publish)
+    publish.add_argument(
+        "--mirror",
+        type=_mirror,
+        action="append",
+        default=[],
+        metavar="OWNER/REPO[@BRANCH]",
+        help="Also publish to this repository, using the same token (repeatable; branch defaults to --branch)."
+    )
+    publish.add_argument(
+        "--per-file-commits",
+        action="store_true",
+        help="Make one commit per file instead of a single commit for the whole batch."
+    )
+    _add_post_arguments(publish)
+    publish.add_argument(
+        "--hold-future",
+        action="store_true",
+        help="Queue posts dated in the future and publish them at their date (see 'bulkpost schedule run')."
+    )
+    publish.add_argument("--dry-run", action="store_true", help="Parse and render only; don't contact GitHub.")
+    publish.add_argument("--json", action="store_true", help="Print results as JSON.")
+    _add_metrics_arguments(publish)
+    
+    watch = subparsers.add_parser(
+        "watch",
+        help="Keep a directory of posts published: changed files go out in periodic single-commit batches."
+    )
+    watch.add_argument("directory", help="Directory containing the markdown posts.")
+    _add_target_arguments(watch)
+    _add_post_arguments(watch)
+    watch.add_argument(
+        "--debounce",
+        type=float,
+        default=DEFAULT_DEBOUNCE,
+        help="Seconds without further changes before a burst of saves is published."
+    )
+    watch.add_argument(
+        "--interval",
+        type=float,
+        default=DEFAULT_INTERVAL,
+        help="Minimum seconds between two publish rounds; changes in between are coalesced."
+    )
+    watch.add_argument("--json", action="store_true", help="Print results as JSON.")
+    _add_metrics_arguments(watch)
+    
+    subparsers.add_parser("jobs", help="List journaled uploads that were interrupted or had failures.")
+    
+    resume = subparsers.add_parser("resume", help="Upload the outstanding files of a journaled job.")
+    resume.add_argument("job_id", help="Job id as printed by 'bulkpost jobs'.")
+    resume.add_argument("--token", help="Personal access token (defaults to $GITHUB_TOKEN).")
+    resume.add_argument("--concurrency", type=int, default=None, help="GitHub API requests kept in flight.")
+    resume.add_argument("--json", action="store_true", help="Print results as JSON.")
+    _add_metrics_arguments(resume)
+    
+    schedule = subparsers.add_parser("schedule", help="Inspect, edit and release the queue of future-dated posts.")
+    actions = schedule.add_subparsers(dest="action", required=True)
+    actions.add_parser("list", help="List the posts waiting for their publish time.")
+    run = actions.add_parser("run", help="Release due posts at every window boundary until interrupted.")
+    run.add_argument("--token", help="Personal access token (defaults to $GITHUB_TOKEN).")
+    run.add_argument("--concurrency", type=int, default=None, help="GitHub API requests kept in flight.")
+    run.add_argument(
+        "--window",
+        type=float,
+        default=DEFAULT_WINDOW,
+        help="Seconds per release window; posts due within one window are published in one commit."
+    )
+    run.add_argument("--once", action="store_true", help="Release whatever is due now and exit.")
+    run.add_argument("--json", action="store_true", help="Print results as JSON.")
+    _add_metrics_arguments(run)
+    move = actions.add_parser("move", help="Change the publish time of a waiting post.")
+    move.add_argument("id", type=int, help="Queue id as printed by 'bulkpost schedule list'.")
+    move.add_argument("publish_at", help="New publish time, e.g. '2024-05-01 09:30'.")
+    cancel = actions.add_parser("cancel", help="Remove waiting posts from the queue.")
+    cancel.add_argument("ids", type=int, nargs="+", help="Queue ids as printed by 'bulkpost schedule list'.")
+    
+    prune = subparsers.add_parser("prune", help="Remove stored post bodies and images that haven't been used lately.")
+    prune.add_argument(
+        "--older-than",
+        type=float,
+        default=DEFAULT_MAX_AGE / 86400,
+        metavar="DAYS",
+        help="Remove entries unused for this many days."
+    )
+    return parser
+
+def _token(args):
+    token = args.token or os.getenv("GITHUB_TOKEN", "")
+    if not token:
+        print("A GitHub token is required: pass --token or set GITHUB_TOKEN.", file=sys.stderr)
+    return token
+
+def _run_job(journal, job_id, target, args, metrics):
+    from bulkpost.history import UploadHistory
+    from bulkpost.journal import run_job
+    
+    print(f"job {job_id}", file=sys.stderr)
+    results = run_job(
+        journal,
+        job_id,
+        target,
+        progress=_progress_printer(),
+        concurrency=args.concurrency,
+        metrics=metrics
+    )
+    UploadHistory().add(results, job_id=job_id)
+    _print_results(results, args.json)
+    _write_metrics(metrics, args)
+    return results
+
+def _run_jobs(journal, jobs, args, metrics):
+    """Run jobs for several targets together and print each target's results under its own header."""
+    from bulkpost.history import UploadHistory
+    from bulkpost.journal import run_jobs
+    
+    for job_id, target in jobs:
+        print(f"job {job_id} -> {target.label}", file=sys.stderr)
+    printer = _progress_printer()
+    progress = None
+    if printer is not None:
+        fractions = {job_id: 0.0 for job_id, _target in jobs}
+        lock = threading.Lock()
+        
+        def progress(job_id, fraction):
+            with lock:
+                fractions[job_id] = fraction
+                printer(sum(fractions.values()) / len(fractions))
+    
+    outcomes = run_jobs(journal, jobs, progress=progress, concurrency=args.concurrency, metrics=metrics)
+    history = UploadHistory()
+    all_results = []
+    report = {}
+    for job_id, target in jobs:
+        results, error = outcomes[job_id]
+        if error is not None:
+            # Report a target that failed outright like a per-file failure, so the exit code reflects it
+            results = [{"filename": "*", "status": "error", "message": error}]
+        else:
+            history.add(results, job_id=job_id)
+        all_results.extend(results)
+        report[target.label] = results
+        if not args.json:
+            print(f"== {target.label}")
+            _print_results(results, False)
+    if args.json:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+    _write_metrics(metrics, args)
+    return all_results
+
+def _exit_code(results):
+    return 1 if any(result["status"] == "error" for result in results) else 0
+
+def _image_settings(args):
+    from bulkpost.images import ImageSettings
+    
+    image_settings = ImageSettings(enabled=not args.no_images)
+    if args.image_max_width:
+        image_settings.max_width = args.image_max_width
+    if args.image_quality:
+        image_settings.quality = args.image_quality
+    if args.image_url_prefix is not None:
+        image_settings.body_url_prefix = args.image_url_prefix
+    return image_settings
+
+def _link_checker(args):
+    from bulkpost.preflight import HttpLinkChecker
+    
+    return HttpLinkChecker() if args.check_links else None
+
+def _target(args, token):
+    from bulkpost.github_upload import GitHubTarget
+    
+    return GitHubTarget(token=token, owner=args.owner, name=args.repo, branch=args.branch, api_url=args.api_url)
+
+def _mirror_targets(args, token):
+    from bulkpost.github_upload import GitHubTarget
+    
+    return [
+        GitHubTarget(token=token, owner=owner, name=name, branch=branch or args.branch, api_url=args.api_url)
+        for owner, name, branch in args.mirror
+    ]
+
+def _dry_run_remote_images(args, image_settings):
+    """Images the targets already have, so a dry run checks references against them; None when unknown."""
+    token = args.token or os.getenv("GITHUB_TOKEN", "")
+    if not token or not image_settings.enabled:
+        return None
+    
+    from bulkpost.github_upload import shared_blob_paths
+    from bulkpost.images import IMAGE_DIR
+    
+    try:
+        return shared_blob_paths([_target(args, token)] + _mirror_targets(args, token), IMAGE_DIR)
+    except Exception as e:
+        print(f"warning: could not list the repository's images, so image references aren't checked: {e}", file=sys.stderr)
+        return None
+
+def publish_command(args):
+    from bulkpost.images import IMAGE_DIR
+    from bulkpost.metrics import UploadMetrics
+    
+    metrics = UploadMetrics()
+    image_settings = _image_settings(args)
+    
+    link_checker = _link_checker(args)
+    
+    if args.dry_run:
+        files_to_upload, report = load_posts(
+            args.directory,
+            args.fix_filenames,
+            image_settings,
+            _dry_run_remote_images(args, image_settings),
+            metrics,
+            link_checker
+        )
+        if not files_to_upload and not report.blocked:
+            print(f"No markdown files found in {args.directory}", file=sys.stderr)
+            return 1
+        _print_results([{"filename": filename, "status": "pending"} for filename, _content in files_to_upload], args.json)
+        _write_metrics(metrics, args)
+        return 1 if report.blocked else 0
+    
+    token = _token(args)
+    if not token:
+        return 2
+    
+    from bulkpost.github_upload import shared_blob_paths
+    from bulkpost.journal import UploadJournal
+    
+    targets = [_target(args, token)] + _mirror_targets(args, token)
+    # Posts are rendered once for every target, so they may only point at images all of them already have
+    remote_images = shared_blob_paths(targets, IMAGE_DIR) if image_settings.enabled else {}
+    files_to_upload, report = load_posts(
+        args.directory, args.fix_filenames, image_settings, remote_images, metrics, link_checker
+    )
+    # Posts blocked by pre-flight errors stay behind; the rest of the batch still goes out
+    blocked = 1 if report.blocked else 0
+    if not files_to_upload:
+        if not report.blocked:
+            print(f"No markdown files found in {args.directory}", file=sys.stderr)
+        return 1
+    
+    if args.hold_future:
+        files_to_upload = _hold_future_posts(files_to_upload, targets)
+        if not files_to_upload:
+            return blocked
+    
+    # Journal the batch first so an interrupted run can be picked up with 'bulkpost resume'
+    journal = UploadJournal()
+    single_commit = not args.per_file_commits
+    jobs = [(journal.start_job(target, files_to_upload, single_commit), target) for target in targets]
+    if len(jobs) == 1:
+        job_id, target = jobs[0]
+        return _exit_code(_run_job(journal, job_id, target, args, metrics)) or blocked
+    return _exit_code(_run_jobs(journal, jobs, args, metrics)) or blocked
+
+def _hold_future_posts(files_to_upload, targets):
+    """Queue the future-dated posts for every target and return the files to publish now."""
+    from bulkpost.schedule import ScheduleQueue, split_scheduled
+    
+    immediate, held = split_scheduled(files_to_upload)
+    queue = ScheduleQueue()
+    for publish_at, files in sorted(held.items()):
+        for target in targets:
+            queue.add(target, files, publish_at)
+        for filename, _content in files:
+            print(f"scheduled  {filename}  {publish_at:%Y-%m-%d %H:%M:%S}", file=sys.stderr)
+    return immediate
+
+def _publish_changes(changed, directory, target, args, state):
+    """Reparse the changed posts of one watch batch and publish whatever differs from the last round."""
+    from bulkpost.images import IMAGE_DIR, ImagePipeline, is_image, referenced_image_names
+    from bulkpost.journal import FINISHED_STATES
+    from bulkpost.github_upload import remote_blob_paths
+    from bulkpost.posts import git_blob_sha, parse_posts
+    
+    watcher, store, assets, published, journal, metrics = (
+        state["watcher"], state["store"], state["assets"], state["published"], state["journal"], state["metrics"]
+    )
+    image_refs = state["image_refs"]
+    sources = []
+    changed_images = set()
+    for path in sorted(changed):
+        try:
+            if is_image(path.name):
+                with open(path, "rb") as stream:
+                    assets[path.relative_to(directory).as_posix()] = store.put_stream(stream)
+                changed_images.add(path.name)
+            elif path.parent == directory:
+                sources.append((path.read_text(encoding="utf-8"), path.name))
+        except (OSError, UnicodeDecodeError) as e:
+            # Most likely caught mid-save: try again with the next batch
+            print(f"warning: could not read {path.name}, retrying later: {e}", file=sys.stderr)
+            watcher.mark(path)
+    
+    # An edited image gets a new published path, so the posts showing it are rendered again
+    queued = {filename for _text, filename in sources}
+    for filename, names in sorted(image_refs.items()):
+        if filename not in queued and names & changed_images:
+            try:
+                sources.append(((directory / filename).read_text(encoding="utf-8"), filename))
+            except FileNotFoundError:
+                del image_refs[filename]
+            except (OSError, UnicodeDecodeError) as e:
+                print(f"warning: could not read {filename} to update its images: {e}", file=sys.stderr)
+    
+    parsed_files = []
+    if sources:
+        with metrics.span("parse", items=len(sources)):
+            parsed_files = parse_posts(sources)
+    for (_text, filename), (metadata, body, _frontmatter) in zip(sources, parsed_files):
+        image_refs[filename] = referenced_image_names(metadata, body)
+    for name in sorted(changed_images - set().union(*image_refs.values())):
+        print(f"warning: {name} changed but no post references it yet", file=sys.stderr)
+    if not sources:
+        return
+    
+    image_settings = _image_settings(args)
+    remote_images = remote_blob_paths(target, IMAGE_DIR) if image_settings.enabled else {}
+    images = ImagePipeline(store, assets, image_settings, remote_images)
+    prepared = []
+    frontmatter = {}
+    for (_text, filename), (metadata, body, original) in zip(sources, parsed_files):
+        prepared.append(prepare_post(filename, metadata, body, filename, images, args.fix_filenames, metrics))
+        frontmatter[prepared[-1][0]] = original
+    # Blocked posts are left out of this round and checked again on their next save
+    posts, _report = check_and_render(prepared, images, metrics, state["link_checker"], frontmatter)
+    # Saving a file without changing it doesn't need a round trip
+    posts = [(filename, content) for filename, content in posts if published.get(filename) != git_blob_sha(content)]
+    if not posts:
+        return
+    
+    files_to_upload = images.files_to_upload() + posts
+    job_id = journal.start_job(target, files_to_upload, single_commit=True)
+    results = _run_job(journal, job_id, target, args, metrics)
+    contents = dict(files_to_upload)
+    for result in results:
+        if result["status"] in FINISHED_STATES:
+            published[result["filename"]] = git_blob_sha(contents[result["filename"]])
+
+def watch_command(args):
+    from bulkpost.images import IMAGE_EXTENSIONS
+    from bulkpost.journal import UploadJournal
+    from bulkpost.metrics import UploadMetrics
+    from bulkpost.store import ContentStore
+    from bulkpost.watch import FolderWatcher
+    
+    directory = Path(args.directory).resolve()
+    if not directory.is_dir():
+        print(f"{args.directory} is not a directory", file=sys.stderr)
+        return 2
+    token = _token(args)
+    if not token:
+        return 2
+    
+    target = _target(args, token)
+    watcher = FolderWatcher(directory, (".md", *IMAGE_EXTENSIONS), debounce=args.debounce, interval=args.interval)
+    state = {
+        "watcher": watcher,
+        "store": ContentStore(),
+        "assets": {},
+        # Upload filename -> blob SHA of the content last published from this directory
+        "published": {},
+        # Post filename -> basenames of the images it references, to re-render posts when one changes
+        "image_refs": {},
+        "journal": UploadJournal(),
+        "metrics": UploadMetrics(),
+        "link_checker": _link_checker(args),
+    }
+    # Everything already there is published first; files the branch already has come back unchanged
+    watcher.scan()
+    watcher.start()
+    print(f"watching {directory} (debounce {args.debounce:g}s, interval {args.interval:g}s); Ctrl+C to stop", file=sys.stderr)
+    try:
+        while True:
+            changed = watcher.next_batch()
+            if changed is None:
+                break
+            try:
+                _publish_changes(changed, directory, target, args, state)
+            except Exception as e:
+                # A failed round stays in the journal; the next change triggers a new one
+                print(f"error: publish round failed: {e}", file=sys.stderr)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.stop()
+    return 0
+
+def jobs_command(args):
+    from bulkpost.journal import UploadJournal
+    
+    for job in UploadJournal().incomplete_jobs():
+        target = job["target"]
+        print(
+            f"{job['id']}  {job['created_at']}  {target['owner']}/{target['name']}@{target['branch']}  "
+            f"{job['outstanding']}/{job['total']} outstanding  ({job['state']})"
+        )
+    return 0
+
+def resume_command(args):
+    from bulkpost.github_upload import GitHubTarget
+    from bulkpost.journal import UploadJournal
+    from bulkpost.metrics import UploadMetrics
+    
+    journal = UploadJournal()
+    job = journal.job(args.job_id)
+    if job is None:
+        print(f"No journaled job {args.job_id}", file=sys.stderr)
+        return 2
+    token = _token(args)
+    if not token:
+        return 2
+    target = GitHubTarget(token=token, **job["target"])
+    return _exit_code(_run_job(journal, args.job_id, target, args, UploadMetrics()))
+
+def schedule_command(args):
+    from bulkpost.schedule import ScheduleQueue, publish_time
+    
+    queue = ScheduleQueue()
+    if args.action == "list":
+        for entry in queue.entries():
+            target = entry["target"]
+            print(
+                f"{entry['id']:>6}  {entry['publish_at']}  "
+                f"{target['owner']}/{target['name']}@{target['branch']}  {entry['filename']}"
+            )
+        return 0
+    if args.action == "move":
+        publish_at = publish_time({"date": args.publish_at})
+        if publish_at is None:
+            print(f"Can't read {args.publish_at!r} as a date", file=sys.stderr)
+            return 2
+        queue.reschedule(args.id, publish_at)
+        return 0
+    if args.action == "cancel":
+        queue.cancel(args.ids)
+        return 0
+    
+    from bulkpost.journal import UploadJournal
+    from bulkpost.metrics import UploadMetrics
+    from bulkpost.schedule import ScheduleRunner
+    
+    token = _token(args)
+    if not token:
+        return 2
+    journal = UploadJournal()
+    metrics = UploadMetrics()
+    released = []
+    
+    def submit(jobs):
+        released.extend(_run_jobs(journal, jobs, args, metrics))
+    
+    runner = ScheduleRunner(queue, journal, submit, token_for=lambda fields: token, window=args.window)
+    if args.once:
+        runner.release_now()
+        return _exit_code(released)
+    print(f"releasing scheduled posts every {args.window:g}s window; Ctrl+C to stop", file=sys.stderr)
+    try:
+        runner.run()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+def prune_command(args):
+    from bulkpost.store import ContentStore
+    
+    removed, freed = ContentStore().prune(args.older_than * 86400)
+    print(f"removed {removed} stored entries ({freed / 1024 / 1024:.1f} MiB)", file=sys.stderr)
+    return 0
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    _load_dotenv()
+    commands = {
+        "publish": publish_command,
+        "watch": watch_command,
+        "jobs": jobs_command,
+        "resume": resume_command,
+        "schedule": schedule_command,
+        "prune": prune_command,
+    }
+    return commands[args.command](args)
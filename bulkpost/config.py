@@ -0,0 +1,10 @@
+"""Locations of the uploader's on-disk state."""
+
+import os
+from pathlib import Path
+
+def data_dir():
+    """Directory holding journals and other local state ($BULKPOST_DATA_DIR, default ~/.bulkpost)."""
+    path = Path(os.getenv("BULKPOST_DATA_DIR") or Path.home() / ".bulkpost")
+    path.mkdir(parents=True, exist_ok=True)
+    return path
@@ -0,0 +1,19 @@
+"""Shared SQLite connection handling for the on-disk stores."""
+
+import sqlite3
+from contextlib import contextmanager
+
+@contextmanager
+def connect(path):
+    """Open a short-lived connection that commits on success and always closes.
+    
+    A connection per call keeps the stores usable from any Streamlit script thread.
+    """
+    conn = sqlite3.connect(path, timeout=30)
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.row_factory = sqlite3.Row
+        with conn:
+            yield conn
+    finally:
+        conn.close()
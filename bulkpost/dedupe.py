@@ -0,0 +1,252 @@
+"""Exact and near-duplicate detection for post bodies.
+
+Every body gets a fingerprint: a SHA-256 of its normalised words for exact copies, and a
+MinHash signature over word shingles for near-duplicates. DuplicateIndex files signatures
+into LSH buckets, so finding the closest posts only compares a handful of candidates
+instead of the whole corpus, and adding or removing a post touches only its own buckets.
+"""
+
+import base64
+import hashlib
+import re
+import zlib
+from collections import defaultdict
+from dataclasses import dataclass
+
+import numpy as np
+
+from bulkpost.config import data_dir
+from bulkpost.db import connect
+
+# Words per shingle; five-word runs survive light edits but not unrelated posts on the same topic
+SHINGLE_SIZE = 5
+
+# 32 bands of 4 rows: posts above roughly 0.45 Jaccard similarity almost always share a bucket
+NUM_PERM = 128
+LSH_BANDS = 32
+
+# Estimated similarity from which a post is flagged as a near-duplicate
+NEAR_DUPLICATE_THRESHOLD = 0.5
+
+WORD_RE = re.compile(r"\w+")
+
+_PRIME = (1 << 31) - 1
+# Fixed seed: stored signatures must stay comparable between runs
+_permutations = np.random.RandomState(20240101)
+_A = _permutations.randint(1, _PRIME, NUM_PERM).astype(np.uint64)
+_B = _permutations.randint(0, _PRIME, NUM_PERM).astype(np.uint64)
+
+@dataclass(eq=False)
+class Fingerprint:
+    """Exact hash and MinHash signature of a post body."""
+    
+    content_hash: str
+    signature: np.ndarray
+    
+    def similarity(self, other):
+        """Estimated Jaccard similarity of the two bodies' shingle sets."""
+        if self.content_hash == other.content_hash:
+            return 1.0
+        return float(np.mean(self.signature == other.signature))
+
+@dataclass
+class DuplicateMatch:
+    key: str
+    similarity: float
+    exact: bool
+
+def fingerprint(body):
+    """Fingerprint a post body; case, punctuation and whitespace don't count as differences."""
+    words = WORD_RE.findall(body.lower())
+    content_hash = hashlib.sha256(" ".join(words).encode("utf-8")).hexdigest()
+    if not words:
+        return Fingerprint(content_hash, np.full(NUM_PERM, _PRIME, dtype=np.uint32))
+    
+    size = min(SHINGLE_SIZE, len(words))
+    shingles = {
+        zlib.crc32(" ".join(words[i:i + size]).encode("utf-8"))
+        for i in range(len(words) - size + 1)
+    }
+    hashes = np.fromiter(shingles, dtype=np.uint64, count=len(shingles)) % _PRIME
+    # Products stay below 2**62, so uint64 arithmetic never overflows
+    signature = ((_A[:, None] * hashes[None, :] + _B[:, None]) % _PRIME).min(axis=1)
+    return Fingerprint(content_hash, signature.astype(np.uint32))
+
+class DuplicateIndex:
+    """Incrementally maintained lookup of exact and near-duplicate posts by key."""
+    
+    def __init__(self, bands=LSH_BANDS):
+        self.bands = bands
+        self._rows = NUM_PERM // bands
+        self._fingerprints = {}
+        self._exact = defaultdict(set)
+        self._buckets = [defaultdict(set) for _ in range(bands)]
+    
+    def __contains__(self, key):
+        return key in self._fingerprints
+    
+    def __len__(self):
+        return len(self._fingerprints)
+    
+    def keys(self):
+        return list(self._fingerprints)
+    
+    def get(self, key):
+        return self._fingerprints.get(key)
+    
+    def _band_keys(self, fingerprint):
+        # An empty body has no shingles, and empty posts would otherwise all collide
+        if (fingerprint.signature == _PRIME).all():
+            return []
+        signature = fingerprint.signature
+        return [signature[band * self._rows:(band + 1) * self._rows].tobytes() for band in range(self.bands)]
+    
+    def add(self, key, fingerprint):
+        """Index a fingerprint under key, replacing whatever was indexed under it before."""
+        current = self._fingerprints.get(key)
+        if current is not None:
+            if current.content_hash == fingerprint.content_hash:
+                return
+            self.remove(key)
+        self._fingerprints[key] = fingerprint
+        self._exact[fingerprint.content_hash].add(key)
+        for band, band_key in enumerate(self._band_keys(fingerprint)):
+            self._buckets[band][band_key].add(key)
+    
+    def remove(self, key):
+        fingerprint = self._fingerprints.pop(key, None)
+        if fingerprint is None:
+            return
+        self._exact[fingerprint.content_hash].discard(key)
+        if not self._exact[fingerprint.content_hash]:
+            del self._exact[fingerprint.content_hash]
+        for band, band_key in enumerate(self._band_keys(fingerprint)):
+            bucket = self._buckets[band][band_key]
+            bucket.discard(key)
+            if not bucket:
+                del self._buckets[band][band_key]
+    
+    def matches(self, fingerprint, limit=3, threshold=NEAR_DUPLICATE_THRESHOLD, exclude=()):
+        """Return up to limit indexed posts most similar to a fingerprint, best first.
+        
+        Exact copies always come first; other candidates come from shared LSH buckets and
+        are kept when their estimated similarity reaches threshold.
+        """
+        exclude = set(exclude)
+        exact = self._exact.get(fingerprint.content_hash, set()) - exclude
+        candidates = set()
+        for band, band_key in enumerate(self._band_keys(fingerprint)):
+            candidates.update(self._buckets[band].get(band_key, ()))
+        candidates -= exclude | exact
+        
+        found = [DuplicateMatch(key, 1.0, True) for key in sorted(exact)]
+        near = []
+        for key in candidates:
+            similarity = fingerprint.similarity(self._fingerprints[key])
+            if similarity >= threshold:
+                near.append(DuplicateMatch(key, similarity, False))
+        near.sort(key=lambda match: (-match.similarity, match.key))
+        return (found + near)[:limit]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS fingerprints (
+    blob_sha TEXT PRIMARY KEY,
+    content_hash TEXT NOT NULL,
+    signature BLOB NOT NULL
+);
+"""
+
+class FingerprintStore:
+    """Fingerprints of remote posts keyed by git blob SHA, so each published version is fetched once."""
+    
+    def __init__(self, path=None):
+        self.path = str(path or data_dir() / "fingerprints.sqlite3")
+        with connect(self.path) as conn:
+            conn.executescript(SCHEMA)
+    
+    def get_many(self, blob_shas):
+        """Return {blob SHA: Fingerprint} for the given SHAs that are stored."""
+        blob_shas = list(blob_shas)
+        found = {}
+        with connect(self.path) as conn:
+            # Stay below SQLite's bound-parameter limit
+            for start in range(0, len(blob_shas), 500):
+                chunk = blob_shas[start:start + 500]
+                rows = conn.execute(
+                    f"SELECT blob_sha, content_hash, signature FROM fingerprints "
+                    f"WHERE blob_sha IN ({','.join('?' * len(chunk))})",
+                    chunk
+                )
+                for row in rows:
+                    found[row["blob_sha"]] = Fingerprint(
+                        row["content_hash"], np.frombuffer(row["signature"], dtype="<u4").astype(np.uint32)
+                    )
+        return found
+    
+    def put_many(self, fingerprints):
+        """Store {blob SHA: Fingerprint}."""
+        with connect(self.path) as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO fingerprints (blob_sha, content_hash, signature) VALUES (?, ?, ?)",
+                [
+                    (blob_sha, fp.content_hash, fp.signature.astype("<u4").tobytes())
+                    for blob_sha, fp in fingerprints.items()
+                ]
+            )
+
+def _remote_fingerprint(repo, gate, path, blob_sha):
+    from bulkpost.github_upload import call_with_retries
+    from bulkpost.posts import parse_markdown_file
+    
+    blob = call_with_retries(gate, repo.get_git_blob, blob_sha)
+    content = base64.b64decode(blob.content).decode("utf-8", errors="replace")
+    _metadata, body = parse_markdown_file(content, path.rsplit("/", 1)[-1], use_cache=False)
+    return blob_sha, fingerprint(body)
+
+def sync_remote_posts(index, target, store=None, progress=None, concurrency=None):
+    """Bring the `_posts/` entries of index in line with the target branch and return how many changed.
+    
+    Remote posts are indexed under their repository path. Only blobs whose fingerprint
+    isn't stored yet are downloaded, and only paths whose content changed are re-indexed.
+    """
+    from bulkpost.github_upload import (
+        DEFAULT_UPLOAD_CONCURRENCY,
+        RateLimitGate,
+        fetch_posts_index,
+        run_concurrently,
+    )
+    
+    concurrency = concurrency or DEFAULT_UPLOAD_CONCURRENCY
+    store = store or FingerprintStore()
+    g, repo = target.connect(pool_size=concurrency)
+    gate = RateLimitGate(g, reserve=concurrency)
+    remote = {
+        path: blob_sha
+        for path, blob_sha in fetch_posts_index(target, repo, gate)["index"].items()
+        if path.startswith("_posts/") and path.lower().endswith((".md", ".markdown"))
+    }
+    
+    changed = 0
+    for key in index.keys():
+        if key.startswith("_posts/") and key not in remote:
+            index.remove(key)
+            changed += 1
+    
+    known = store.get_many(set(remote.values()))
+    missing = {blob_sha: path for path, blob_sha in remote.items() if blob_sha not in known}
+    if missing:
+        fetched = dict(run_concurrently(
+            lambda blob_sha, path: _remote_fingerprint(repo, gate, path, blob_sha),
+            list(missing.items()),
+            progress,
+            concurrency
+        ))
+        store.put_many(fetched)
+        known.update(fetched)
+    
+    for path, blob_sha in remote.items():
+        current = index.get(path)
+        if current is None or current.content_hash != known[blob_sha].content_hash:
+            index.add(path, known[blob_sha])
+            changed += 1
+    return changed
@@ -0,0 +1,517 @@
+"""Publishing posts to the `_posts` directory of a GitHub repository.
+
+Files are given as (filename, content) pairs. A bare filename is a post under `_posts/`;
+a name containing a slash is a path from the repository root, which is how images and
+other assets are published alongside the posts. Content may be text or bytes.
+"""
+
+import base64
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+
+from bulkpost.metrics import UploadMetrics
+from bulkpost.posts import git_blob_sha
+
+# Number of GitHub API calls kept in flight during an upload
+DEFAULT_UPLOAD_CONCURRENCY = 4
+
+# Repository directories covered by the remote index
+INDEXED_DIRS = ("_posts", "assets/images")
+
+# Cached remote indexes keyed by (token, API URL, repository, branch); module state outlives Streamlit reruns.
+# Entries hold a ref of the client that fetched them, so they are never shared between tokens.
+_POSTS_INDEX_CACHE = {}
+
+# {"client", "pool_size", "repos": {full name: repository}} keyed by (token, API URL), shared by all sessions.
+# Every repository reached with one token shares a client, and with it one view of the token's rate limit.
+_CLIENT_CACHE = {}
+_CLIENT_CACHE_LOCK = threading.Lock()
+
+def repo_path(filename):
+    """Map an upload filename to its path in the repository."""
+    return filename if "/" in filename else f"_posts/{filename}"
+
+@dataclass
+class GitHubTarget:
+    """Repository and branch the posts are published to."""
+    
+    token: str
+    owner: str
+    name: str
+    branch: str = "main"
+    api_url: str = "https://api.github.com"
+    
+    @property
+    def full_name(self):
+        return f"{self.owner}/{self.name}"
+    
+    @property
+    def label(self):
+        return f"{self.full_name}@{self.branch}"
+    
+    def file_url(self, filename):
+        """Build the GitHub web URL of a post or asset in this repository."""
+        return f"https://github.com/{self.owner}/{self.name}/blob/{self.branch}/{repo_path(filename)}"
+    
+    def _client_key(self):
+        return (self.token, self.api_url)
+    
+    def connect(self, pool_size=None):
+        """Return (Github client, repository), reusing the cached handles for this token and repository.
+        
+        The client keeps up to pool_size connections alive, so it should cover the upload
+        concurrency; a cached client with a smaller pool is replaced. Without a pool_size
+        any cached client is reused. Retries are left to call_with_retries, and PyGithub's
+        own sleeps between requests are turned off: its bookkeeping isn't shared between
+        worker threads, so pacing is left to RateLimitGate.
+        """
+        from github import Auth, Github
+        
+        key = self._client_key()
+        with _CLIENT_CACHE_LOCK:
+            entry = _CLIENT_CACHE.get(key)
+            if entry is None or (pool_size is not None and entry["pool_size"] < pool_size):
+                pool_size = pool_size or DEFAULT_UPLOAD_CONCURRENCY
+                g = Github(
+                    auth=Auth.Token(self.token),
+                    base_url=self.api_url,
+                    retry=None,
+                    pool_size=pool_size,
+                    seconds_between_requests=None,
+                    seconds_between_writes=None
+                )
+                entry = _CLIENT_CACHE[key] = {"client": g, "pool_size": pool_size, "repos": {}}
+            repo = entry["repos"].get(self.full_name)
+        if repo is None:
+            repo = entry["client"].get_repo(self.full_name)
+            with _CLIENT_CACHE_LOCK:
+                # A concurrent connect() may have won the race; keep whichever was cached first
+                repo = entry["repos"].setdefault(self.full_name, repo)
+        return entry["client"], repo
+
+def forget_client(target=None):
+    """Drop the cached repository handle of a target, or every cached client when none is given.
+    
+    A client is dropped with the last of its repositories. Uploads already holding the
+    handles finish with them; the next connect() builds new ones.
+    """
+    with _CLIENT_CACHE_LOCK:
+        if target is None:
+            _CLIENT_CACHE.clear()
+            _POSTS_INDEX_CACHE.clear()
+            return
+        for key in list(_POSTS_INDEX_CACHE):
+            if key[:3] == (*target._client_key(), target.full_name):
+                _POSTS_INDEX_CACHE.pop(key, None)
+        entry = _CLIENT_CACHE.get(target._client_key())
+        if entry is not None:
+            entry["repos"].pop(target.full_name, None)
+            if not entry["repos"]:
+                del _CLIENT_CACHE[target._client_key()]
+
+class RateLimitGate:
+    """Shared pause point that keeps upload workers inside GitHub's rate limits.
+    
+    With a write_interval, write calls of every worker sharing the gate are spaced at least
+    that many seconds apart, as GitHub asks for content-creating requests. That caps writes
+    at one per interval whatever the upload concurrency; reads are never paced.
+    """
+    
+    def __init__(self, github_client, reserve=None, metrics=None, write_interval=None):
+        self.github_client = github_client
+        self.reserve = reserve if reserve is not None else DEFAULT_UPLOAD_CONCURRENCY
+        self.metrics = metrics if metrics is not None else UploadMetrics()
+        self.write_interval = write_interval
+        self._lock = threading.Lock()
+        self._resume_at = 0.0
+        self._next_write = 0.0
+    
+    def pause_until(self, timestamp):
+        """Hold every worker until the given epoch time."""
+        with self._lock:
+            self._resume_at = max(self._resume_at, timestamp)
+    
+    def wait(self):
+        """Block the calling worker while the gate is paused."""
+        start = time.perf_counter()
+        waited = False
+        while True:
+            with self._lock:
+                delay = self._resume_at - time.time()
+            if delay <= 0:
+                break
+            waited = True
+            time.sleep(min(delay, 1.0))
+        if waited:
+            self.metrics.observe("rate_limit_wait", time.perf_counter() - start, items=0)
+    
+    def wait_for_write(self):
+        """Block the calling worker until its write call may go out under write_interval."""
+        if not self.write_interval:
+            return
+        with self._lock:
+            now = time.time()
+            slot = max(now, self._next_write)
+            self._next_write = slot + self.write_interval
+        if slot > now:
+            time.sleep(slot - now)
+            self.metrics.observe("rate_limit_wait", slot - now, items=0)
+    
+    def observe(self):
+        """Pause proactively when the primary rate-limit budget is nearly spent.
+        
+        The budget comes from the X-RateLimit headers of the latest response only. Servers
+        that don't send them, such as GitHub Enterprise with rate limiting turned off, are
+        never paused; the client's rate_limiting properties would call /rate_limit instead.
+        """
+        requester = self.github_client.requester
+        remaining, limit = requester.rate_limiting
+        if remaining < 0 or limit < 0:
+            return
+        reset_at = requester.rate_limiting_resettime
+        self.metrics.set_rate_limit(remaining, limit, reset_at)
+        if remaining <= self.reserve and reset_at:
+            self.pause_until(reset_at + 1)
+
+def _retry_delay(exception, attempt):
+    """Return (delay, rate_limited) for a failed GitHub call; delay is None when it should not be retried."""
+    headers = {key.lower(): value for key, value in (exception.headers or {}).items()}
+    message = str(exception.data).lower() if exception.data else ""
+    
+    if exception.status in (403, 429):
+        if 'retry-after' in headers:
+            return float(headers['retry-after']), True
+        if headers.get('x-ratelimit-remaining') == '0' and 'x-ratelimit-reset' in headers:
+            return max(0.0, int(headers['x-ratelimit-reset']) - time.time()) + 1, True
+        if 'secondary rate limit' in message or 'abuse' in message:
+            # Secondary limits don't say how long to wait: back off for at least a minute
+            return 60 * (attempt + 1) * random.uniform(1.0, 1.5), True
+        return None, False
+    
+    if exception.status == 409 or exception.status >= 500:
+        # Branch head moved under a concurrent write, or GitHub hiccuped
+        return min(30.0, 2 ** attempt) * random.uniform(0.5, 1.5), False
+    
+    return None, False
+
+def call_with_retries(gate, func, *args, max_retries=5, write=False, **kwargs):
+    """Call a GitHub API function, backing off on rate limits and transient errors.
+    
+    Calls that create or change content pass write=True so the gate can pace them.
+    """
+    from github import GithubException
+    
+    for attempt in range(max_retries + 1):
+        gate.wait()
+        if write:
+            gate.wait_for_write()
+        gate.metrics.inc("api_calls")
+        try:
+            result = func(*args, **kwargs)
+        except GithubException as e:
+            delay, rate_limited = _retry_delay(e, attempt)
+            if rate_limited:
+                gate.metrics.inc("rate_limited")
+            if delay is None or attempt == max_retries:
+                raise
+            gate.metrics.inc("retries")
+            if rate_limited:
+                gate.pause_until(time.time() + delay)
+            else:
+                time.sleep(delay)
+            continue
+        # Outside the try: reading the budget must never turn a successful call into a failure
+        gate.observe()
+        return result
+
+def _content_size(content):
+    return len(content) if isinstance(content, bytes) else len(content.encode("utf-8"))
+
+def _report(progress, fraction):
+    if progress is not None:
+        progress(fraction)
+
+def run_concurrently(task, items, progress=None, concurrency=DEFAULT_UPLOAD_CONCURRENCY, progress_total=None,
+                     on_result=None):
+    """Run task over items on a bounded worker pool, returning results in input order.
+    
+    progress and on_result are called from the submitting thread only, so they may drive
+    UI elements or write to a journal.
+    """
+    results = [None] * len(items)
+    total = progress_total or len(items)
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        futures = {executor.submit(task, *item): i for i, item in enumerate(items)}
+        for completed, future in enumerate(as_completed(futures), start=1):
+            results[futures[future]] = future.result()
+            if on_result is not None:
+                on_result(results[futures[future]])
+            _report(progress, completed / total)
+    return results
+
+def _split_unchanged(files_to_upload, index):
+    """Mark files whose blob SHA matches the remote one as unchanged and return the rest for upload."""
+    results = [None] * len(files_to_upload)
+    pending = []
+    for i, (filename, content) in enumerate(files_to_upload):
+        remote_sha = index.get(repo_path(filename))
+        if remote_sha is not None and remote_sha == git_blob_sha(content):
+            results[i] = {"filename": filename, "status": "unchanged"}
+        else:
+            pending.append((i, filename, content, remote_sha))
+    return results, pending
+
+def _child_tree_sha(tree, name):
+    return next((element.sha for element in tree.tree if element.path == name and element.type == "tree"), None)
+
+def _subtree_sha(repo, gate, tree, path):
+    """Return the SHA of the subtree at a slash-separated path below tree, or None if it doesn't exist."""
+    *parents, name = path.split("/")
+    for parent in parents:
+        sha = _child_tree_sha(tree, parent)
+        if sha is None:
+            return None
+        tree = call_with_retries(gate, repo.get_git_tree, sha)
+    return _child_tree_sha(tree, name)
+
+def fetch_posts_index(target, repo, gate, cache=None):
+    """Return the cached index of _posts and the other INDEXED_DIRS for the target's branch.
+    
+    repo is the target's repository handle. The tree is refetched only when the head commit
+    moved. The returned ref always belongs to repo's client, so the branch is only ever
+    moved with the target's own token.
+    """
+    from github import GithubException
+    
+    if cache is None:
+        cache = _POSTS_INDEX_CACHE
+    branch = target.branch
+    key = (*target._client_key(), repo.full_name, branch)
+    entry = cache.get(key)
+    
+    if entry is not None and entry["repo"] is not repo:
+        # The client was replaced since; bind a fresh ref to the current one
+        ref = call_with_retries(gate, repo.get_git_ref, f"heads/{branch}")
+        if ref.object.sha == entry["head"]:
+            entry["ref"] = ref
+            entry["repo"] = repo
+            return entry
+    elif entry is not None:
+        # Conditional request on the branch ref: a 304 costs nothing against the rate limit
+        try:
+            changed = call_with_retries(gate, entry["ref"].update)
+            if not changed or entry["ref"].object.sha == entry["head"]:
+                return entry
+            ref = entry["ref"]
+        except GithubException:
+            ref = call_with_retries(gate, repo.get_git_ref, f"heads/{branch}")
+    else:
+        ref = call_with_retries(gate, repo.get_git_ref, f"heads/{branch}")
+    
+    head_commit = call_with_retries(gate, repo.get_git_commit, ref.object.sha)
+    
+    # One recursive tree fetch per directory builds the whole path -> blob SHA index
+    index = {}
+    for directory in INDEXED_DIRS:
+        subtree_sha = _subtree_sha(repo, gate, head_commit.tree, directory)
+        if subtree_sha is None:
+            continue
+        recursive_tree = call_with_retries(gate, repo.get_git_tree, subtree_sha, recursive=True)
+        index.update({
+            f"{directory}/{item.path}": item.sha
+            for item in recursive_tree.tree
+            if item.type == "blob"
+        })
+    
+    entry = {"ref": ref, "repo": repo, "head": head_commit.sha, "commit": head_commit, "index": index}
+    cache[key] = entry
+    return entry
+
+def remote_blob_paths(target, directory):
+    """Return {blob SHA: path} for files under a repository directory covered by the remote index."""
+    g, repo = target.connect()
+    index = fetch_posts_index(target, repo, RateLimitGate(g))["index"]
+    prefix = directory.rstrip("/") + "/"
+    return {sha: path for path, sha in index.items() if path.startswith(prefix)}
+
+def shared_blob_paths(targets, directory):
+    """Like remote_blob_paths, but only files present at the same path on every target."""
+    shared = None
+    for target in targets:
+        paths = remote_blob_paths(target, directory)
+        shared = paths if shared is None else {
+            sha: path for sha, path in shared.items() if paths.get(sha) == path
+        }
+    return shared or {}
+
+def _upload_post(repo, gate, branch, filename, content, remote_sha):
+    """Create or update a single post or asset through the contents API."""
+    path = repo_path(filename)
+    gate.metrics.inc("bytes_sent", _content_size(content))
+    with gate.metrics.span("write"):
+        try:
+            if remote_sha is None:
+                # File doesn't exist, create it
+                written = call_with_retries(
+                    gate,
+                    repo.create_file,
+                    path=path,
+                    message=f"Add {filename} via bulk post uploader",
+                    content=content,
+                    branch=branch,
+                    write=True
+                )
+                return {"filename": filename, "status": "created", "commit": written["commit"].sha}
+            
+            # File exists, update it
+            written = call_with_retries(
+                gate,
+                repo.update_file,
+                path=path,
+                message=f"Update {filename} via bulk post uploader",
+                content=content,
+                sha=remote_sha,
+                branch=branch,
+                write=True
+            )
+            return {"filename": filename, "status": "updated", "commit": written["commit"].sha}
+        except Exception as e:
+            return {"filename": filename, "status": "error", "message": str(e)}
+
+def _count_results(metrics, results):
+    for result in results:
+        metrics.inc("files", status=result["status"])
+
+def upload_to_github(files_to_upload, target, progress=None, concurrency=DEFAULT_UPLOAD_CONCURRENCY,
+                     on_result=None, metrics=None, gate=None):
+    """Upload (filename, content) pairs to GitHub with one commit per changed file.
+    
+    on_result, if given, is called with each file's result as soon as it is known. Timings
+    and API counters are recorded in metrics when one is given. Uploads that pass the same
+    gate share one rate-limit budget, and the gate's metrics.
+    """
+    g, repo = target.connect(pool_size=concurrency)
+    gate = gate or RateLimitGate(g, reserve=concurrency, metrics=metrics)
+    
+    with gate.metrics.span("check", items=len(files_to_upload)):
+        # Create/update decisions and SHAs come from one tree fetch instead of a probe per file
+        index = fetch_posts_index(target, repo, gate)["index"]
+        
+        # Identical content needs no write call at all
+        results, pending = _split_unchanged(files_to_upload, index)
+    if on_result is not None:
+        for result in results:
+            if result is not None:
+                on_result(result)
+    uploaded = run_concurrently(
+        lambda i, filename, content, remote_sha: _upload_post(
+            repo, gate, target.branch, filename, content, remote_sha
+        ),
+        pending,
+        progress,
+        concurrency,
+        on_result=on_result
+    )
+    for (i, _filename, _content, _remote_sha), result in zip(pending, uploaded):
+        results[i] = result
+    
+    for result in results:
+        if result["status"] != "error":
+            result["url"] = target.file_url(result["filename"])
+    
+    _count_results(gate.metrics, results)
+    _report(progress, 1.0)
+    return results
+
+def _create_blob(repo, gate, filename, content):
+    """Store a post or asset as a git blob, returning (filename, blob SHA or None, error message)."""
+    gate.metrics.inc("bytes_sent", _content_size(content))
+    with gate.metrics.span("write"):
+        try:
+            if isinstance(content, bytes):
+                encoded = base64.b64encode(content).decode("ascii")
+                blob = call_with_retries(gate, repo.create_git_blob, encoded, "base64", write=True)
+            else:
+                blob = call_with_retries(gate, repo.create_git_blob, content, "utf-8", write=True)
+            return filename, blob.sha, None
+        except Exception as e:
+            return filename, None, str(e)
+
+def upload_to_github_batch(files_to_upload, target, progress=None, concurrency=DEFAULT_UPLOAD_CONCURRENCY,
+                           on_result=None, metrics=None, gate=None):
+    """Upload (filename, content) pairs to GitHub as a single commit using the Git Data API.
+    
+    on_result, if given, is called with each file's result once the commit has landed or failed.
+    Timings and API counters are recorded in metrics when one is given. Uploads that pass the
+    same gate share one rate-limit budget, and the gate's metrics.
+    """
+    from github import InputGitTreeElement
+    
+    g, repo = target.connect(pool_size=concurrency)
+    gate = gate or RateLimitGate(g, reserve=concurrency, metrics=metrics)
+    with gate.metrics.span("check", items=len(files_to_upload)):
+        posts_index = fetch_posts_index(target, repo, gate)
+        # Identical content needs no blob; the rest get one blob each, created concurrently
+        results, pending = _split_unchanged(files_to_upload, posts_index["index"])
+    ref = posts_index["ref"]
+    base_commit = posts_index["commit"]
+    
+    blobs = run_concurrently(
+        lambda i, filename, content, remote_sha: _create_blob(repo, gate, filename, content),
+        pending,
+        progress,
+        concurrency,
+        progress_total=len(pending) + 1
+    )
+    
+    # All blobs are referenced from a single new tree
+    tree_elements = []
+    staged_blobs = {}
+    for (i, _filename, _content, remote_sha), (filename, blob_sha, error) in zip(pending, blobs):
+        path = repo_path(filename)
+        if error is not None:
+            results[i] = {"filename": filename, "status": "error", "message": error}
+            continue
+        tree_elements.append(InputGitTreeElement(path, "100644", "blob", sha=blob_sha))
+        staged_blobs[path] = blob_sha
+        status = "updated" if remote_sha is not None else "created"
+        results[i] = {"filename": filename, "status": status}
+    
+    for result in results:
+        if result["status"] != "error":
+            result["url"] = target.file_url(result["filename"])
+    
+    if tree_elements:
+        try:
+            with gate.metrics.span("write", items=0):
+                tree = call_with_retries(gate, repo.create_git_tree, tree_elements, base_commit.tree, write=True)
+                message = f"Add {len(tree_elements)} posts via bulk post uploader"
+                commit = call_with_retries(gate, repo.create_git_commit, message, tree, [base_commit], write=True)
+                # Fast-forward only: a concurrent push makes the whole batch fail instead of clobbering it
+                call_with_retries(gate, ref.edit, commit.sha, force=False, max_retries=0, write=True)
+            for result in results:
+                if result["status"] in ("created", "updated"):
+                    result["commit"] = commit.sha
+            
+            # The new head and its blobs are known, so the cached index stays valid without a refetch
+            posts_index["head"] = commit.sha
+            posts_index["commit"] = commit
+            posts_index["index"].update(staged_blobs)
+        except Exception as e:
+            # Nothing was published, so every staged file failed together
+            for result in results:
+                if result["status"] in ("created", "updated"):
+                    result.pop("url", None)
+                    result["status"] = "error"
+                    result["message"] = f"Batch commit failed: {str(e)}"
+    
+    if on_result is not None:
+        for result in results:
+            on_result(result)
+    
+    _count_results(gate.metrics, results)
+    _report(progress, 1.0)
+    return results
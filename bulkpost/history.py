@@ -0,0 +1,81 @@
+"""Persistent, indexed history of uploaded files."""
+
+import datetime
+
+from bulkpost.config import data_dir
+from bulkpost.db import connect
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    status TEXT NOT NULL,
+    url TEXT,
+    message TEXT,
+    commit_sha TEXT,
+    job_id TEXT
+);
+CREATE INDEX IF NOT EXISTS history_timestamp ON history (timestamp);
+CREATE INDEX IF NOT EXISTS history_status_timestamp ON history (status, timestamp);
+CREATE INDEX IF NOT EXISTS history_filename ON history (filename);
+"""
+
+class UploadHistory:
+    """Upload results stored in SQLite and queried a page at a time."""
+    
+    def __init__(self, path=None):
+        self.path = str(path or data_dir() / "history.sqlite3")
+        with connect(self.path) as conn:
+            conn.executescript(SCHEMA)
+    
+    def add(self, results, job_id=None, timestamp=None):
+        """Append upload results, all stamped with the same time."""
+        timestamp = timestamp or datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        with connect(self.path) as conn:
+            conn.executemany(
+                "INSERT INTO history (timestamp, filename, status, url, message, commit_sha, job_id) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        timestamp, result["filename"], result["status"], result.get("url"),
+                        result.get("message"), result.get("commit"), job_id
+                    )
+                    for result in results
+                ]
+            )
+    
+    def query(self, start=None, end=None, statuses=None, filename=None, limit=50, offset=0):
+        """Return (rows, total matches) for one page of history, newest first.
+        
+        start and end are inclusive dates; filename matches any part of the name.
+        """
+        clauses = []
+        params = []
+        if start is not None:
+            clauses.append("timestamp >= ?")
+            params.append(f"{start:%Y-%m-%d} 00:00:00")
+        if end is not None:
+            clauses.append("timestamp <= ?")
+            params.append(f"{end:%Y-%m-%d} 23:59:59")
+        if statuses:
+            clauses.append(f"status IN ({', '.join('?' * len(statuses))})")
+            params.extend(statuses)
+        if filename:
+            escaped = filename.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            clauses.append("filename LIKE ? ESCAPE '\\'")
+            params.append(f"%{escaped}%")
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        
+        with connect(self.path) as conn:
+            total = conn.execute(f"SELECT COUNT(*) FROM history {where}", params).fetchone()[0]
+            rows = conn.execute(
+                f"SELECT timestamp, filename, status, url, message, commit_sha FROM history {where} "
+                "ORDER BY timestamp DESC, id DESC LIMIT ? OFFSET ?",
+                (*params, limit, offset)
+            ).fetchall()
+        return [dict(row) for row in rows], total
+    
+    def clear(self):
+        with connect(self.path) as conn:
+            conn.execute("DELETE FROM history")
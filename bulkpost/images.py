@@ -0,0 +1,198 @@
+"""Image pipeline: resolve images referenced by posts, recompress them and publish each once.
+
+Images are renamed after a hash of their final bytes, so the same picture referenced by
+many posts, or uploaded twice under different names, is published a single time. Pillow is
+optional; without it images are still deduplicated but uploaded as they are.
+"""
+
+import hashlib
+import io
+import posixpath
+import re
+from dataclasses import dataclass
+
+# Repository directory the processed images are published to
+IMAGE_DIR = "assets/images"
+
+# Put in front of rewritten references in post bodies. Jekyll renders it to the site's base URL,
+# so the images of project sites served under /<repository>/ resolve too. Frontmatter isn't
+# rendered by Liquid, so the frontmatter image keeps a plain root path for themes to resolve.
+BODY_URL_PREFIX = "{{site.baseurl}}"
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.webp', '.svg')
+
+# Markdown image syntax and HTML <img> tags; group 1 is the reference
+MARKDOWN_IMAGE_RE = re.compile(r'!\[[^\]]*\]\(\s*<?([^)\s>]+)>?(?:\s+"[^"]*")?\s*\)')
+HTML_IMAGE_RE = re.compile(r'<img\b[^>]*?\bsrc=["\']([^"\']+)["\']', re.IGNORECASE)
+
+@dataclass
+class ImageSettings:
+    """How referenced images are processed before upload."""
+    
+    max_width: int = 1600
+    quality: int = 82
+    enabled: bool = True
+    body_url_prefix: str = BODY_URL_PREFIX
+
+# Processed output per (source key, settings); the encode is the expensive step
+_optimized = {}
+
+def is_image(name):
+    return name.lower().endswith(IMAGE_EXTENSIONS)
+
+def is_local_reference(reference):
+    return bool(reference) and not re.match(r'^(?:[a-z][a-z0-9+.-]*:|//)', reference, re.IGNORECASE)
+
+def referenced_image_names(metadata, body):
+    """Basenames of the local images a post references, resolved or not."""
+    references = [match.group(1) for regex in (MARKDOWN_IMAGE_RE, HTML_IMAGE_RE) for match in regex.finditer(body)]
+    image = metadata.get('image')
+    if isinstance(image, str):
+        references.append(image)
+    return {
+        posixpath.basename(reference.split('?', 1)[0].split('#', 1)[0])
+        for reference in references
+        if is_local_reference(reference) and is_image(reference.split('?', 1)[0].split('#', 1)[0])
+    }
+
+def optimize_image(data, settings):
+    """Downscale to the configured width and recompress; return the original if that doesn't shrink it."""
+    try:
+        from PIL import Image
+    except ImportError:
+        return data
+    
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            image_format = image.format
+            if image_format not in ('JPEG', 'PNG', 'WEBP') or getattr(image, 'is_animated', False):
+                return data
+            if image.width > settings.max_width:
+                height = round(image.height * settings.max_width / image.width)
+                image = image.resize((settings.max_width, height), Image.LANCZOS)
+            if image_format == 'JPEG':
+                if image.mode not in ('RGB', 'L'):
+                    image = image.convert('RGB')
+                options = {'quality': settings.quality, 'optimize': True, 'progressive': True}
+            elif image_format == 'WEBP':
+                options = {'quality': settings.quality}
+            else:
+                options = {'optimize': True}
+            output = io.BytesIO()
+            image.save(output, image_format, **options)
+    except Exception:
+        # Not an image Pillow understands: publish it untouched
+        return data
+    
+    optimized = output.getvalue()
+    return optimized if len(optimized) < len(data) else data
+
+class AssetResolver:
+    """Finds the stored asset a post's image reference points to."""
+    
+    def __init__(self, assets):
+        # assets maps an archive path or uploaded filename to its content store key
+        self.assets = assets
+        self.by_basename = {}
+        for path in assets:
+            self.by_basename.setdefault(posixpath.basename(path), path)
+    
+    def resolve(self, reference, source_path=None):
+        """Return the asset path a reference points to, or None."""
+        reference = reference.split('?', 1)[0].split('#', 1)[0]
+        candidates = []
+        if source_path and not reference.startswith('/'):
+            candidates.append(posixpath.normpath(posixpath.join(posixpath.dirname(source_path), reference)))
+        candidates.append(posixpath.normpath(reference.lstrip('/')))
+        
+        for candidate in candidates:
+            if candidate in self.assets:
+                return candidate
+            # Archives often wrap the site in a top-level folder
+            for path in self.assets:
+                if path.endswith('/' + candidate):
+                    return path
+        return self.by_basename.get(posixpath.basename(reference))
+
+class ImagePipeline:
+    """Rewrites image references in posts and collects the deduplicated images to upload."""
+    
+    def __init__(self, store, assets, settings=None, remote_images=None):
+        self.store = store
+        self.resolver = AssetResolver(assets)
+        self.settings = settings or ImageSettings()
+        # Blob SHA -> path of images already in the repository; None when they weren't listed
+        self.remote_listed = remote_images is not None
+        self.remote_images = remote_images or {}
+        self._published = {}
+        self.uploads = {}
+    
+    def _publish(self, asset_path):
+        """Process one asset once and return the site path it is published under."""
+        if asset_path in self._published:
+            return self._published[asset_path]
+        
+        from bulkpost.posts import git_blob_sha
+        
+        source_key = self.resolver.assets[asset_path]
+        cache_key = (source_key, self.settings.max_width, self.settings.quality)
+        # The store may have pruned an output this process remembers
+        if cache_key not in _optimized or not self.store.path(_optimized[cache_key]).exists():
+            data = self.store.read_bytes(source_key)
+            _optimized[cache_key] = self.store.put_bytes(optimize_image(data, self.settings))
+        data = self.store.read_bytes(_optimized[cache_key])
+        
+        existing_path = self.remote_images.get(git_blob_sha(data))
+        if existing_path is not None:
+            # The repository already has these exact bytes under some name
+            repo_path = existing_path
+        else:
+            extension = posixpath.splitext(asset_path)[1].lower()
+            repo_path = f"{IMAGE_DIR}/{hashlib.sha256(data).hexdigest()[:20]}{extension}"
+            self.uploads[repo_path] = data
+        
+        self._published[asset_path] = f"/{repo_path}"
+        return self._published[asset_path]
+    
+    def _rewrite_reference(self, reference, source_path):
+        if not is_local_reference(reference):
+            return reference
+        asset_path = self.resolver.resolve(reference, source_path)
+        if asset_path is None or not is_image(asset_path):
+            return reference
+        return self._publish(asset_path)
+    
+    def rewrite(self, metadata, body, source_path=None):
+        """Return (metadata, body) with local image references pointing at the published images."""
+        if not self.settings.enabled:
+            return metadata, body
+        
+        image = metadata.get('image')
+        if isinstance(image, str) and image:
+            new_image = self._rewrite_reference(image, source_path)
+            if new_image != image:
+                metadata = {**metadata, 'image': new_image}
+        
+        def replace(match):
+            new_reference = self._rewrite_reference(match.group(1), source_path)
+            if new_reference != match.group(1):
+                new_reference = self.settings.body_url_prefix + new_reference
+            start, end = match.start(1) - match.start(0), match.end(1) - match.start(0)
+            return match.group(0)[:start] + new_reference + match.group(0)[end:]
+        
+        body = MARKDOWN_IMAGE_RE.sub(replace, body)
+        body = HTML_IMAGE_RE.sub(replace, body)
+        return metadata, body
+    
+    def site_paths(self):
+        """Repository paths of the images that exist once this batch is published.
+        
+        None when the repository's images weren't listed, since any reference may then be fine.
+        """
+        if not self.remote_listed:
+            return None
+        return set(self.uploads) | set(self.remote_images.values())
+    
+    def files_to_upload(self):
+        """Return (repository path, bytes) pairs for every image that has to be published."""
+        return sorted(self.uploads.items())
@@ -0,0 +1,122 @@
+"""Streaming ingest of zip and tar archives holding posts and their assets, and of published branches."""
+
+import posixpath
+import tarfile
+import zipfile
+from dataclasses import dataclass, field
+
+from bulkpost.posts import parse_post
+
+# Upload names recognised as archives rather than single posts
+ARCHIVE_SUFFIXES = ('.zip', '.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz')
+
+# Seconds a branch archive download may stall before it is abandoned
+ARCHIVE_TIMEOUT = 60
+
+@dataclass
+class IngestedPost:
+    """A post parsed out of an archive, with its body kept in the content store."""
+    
+    filename: str
+    metadata: dict
+    body_key: str
+    source_path: str
+    # Blob SHA of the published file, for posts imported from a branch
+    blob_sha: str = None
+    # The file's own frontmatter, for render_post
+    frontmatter: object = None
+
+@dataclass
+class ArchiveContents:
+    posts: list = field(default_factory=list)
+    # Archive path of every non-markdown file -> content store key
+    assets: dict = field(default_factory=dict)
+
+def is_archive(name):
+    return name.lower().endswith(ARCHIVE_SUFFIXES)
+
+def _skipped(path):
+    """Directories, macOS resource forks and hidden files are never posts or assets."""
+    parts = path.split('/')
+    return path.endswith('/') or parts[0] == '__MACOSX' or any(part.startswith('.') for part in parts)
+
+def iter_archive_entries(fileobj, name):
+    """Yield (archive path, binary stream) for each regular file, one entry at a time.
+    
+    Tar archives are read strictly sequentially, so they can come from a pipe.
+    """
+    if name.lower().endswith('.zip'):
+        with zipfile.ZipFile(fileobj) as archive:
+            for info in archive.infolist():
+                if info.is_dir() or _skipped(info.filename):
+                    continue
+                with archive.open(info) as stream:
+                    yield info.filename, stream
+    else:
+        with tarfile.open(fileobj=fileobj, mode='r|*') as archive:
+            for member in archive:
+                # tar paths often start with "./"
+                path = posixpath.normpath(member.name).lstrip('/')
+                if not member.isfile() or _skipped(path):
+                    continue
+                yield path, archive.extractfile(member)
+
+def ingest_archive(fileobj, name, store, on_error=None):
+    """Parse every markdown entry of an archive and spill bodies and assets to the store.
+    
+    Only one entry is held in memory at a time. When two entries share a filename the
+    later one wins, as it would when uploading the files one by one.
+    """
+    contents = ArchiveContents()
+    posts = {}
+    for path, stream in iter_archive_entries(fileobj, name):
+        if path.lower().endswith('.md'):
+            filename = posixpath.basename(path)
+            text = stream.read().decode('utf-8')
+            # Bypass the parse cache: it would keep every body of a large archive alive
+            metadata, body, frontmatter = parse_post(text, filename, on_error=on_error, use_cache=False)
+            posts[filename] = IngestedPost(filename, metadata, store.put(body), path, frontmatter=frontmatter)
+        else:
+            contents.assets[path] = store.put_stream(stream)
+    contents.posts = list(posts.values())
+    return contents
+
+def import_branch_posts(target, store, on_error=None):
+    """Download a branch as one tarball and parse the posts directly under its `_posts/`.
+    
+    The archive is pinned to the commit the remote index was read at and streamed one
+    entry at a time, so every post is keyed by the blob SHA uploads compare against.
+    Posts in subdirectories of `_posts/` are left out, since upload filenames address
+    `_posts/` itself.
+    """
+    import urllib.request
+    
+    from bulkpost.github_upload import RateLimitGate, call_with_retries, fetch_posts_index
+    from bulkpost.posts import git_blob_sha
+    
+    g, repo = target.connect()
+    gate = RateLimitGate(g)
+    remote = fetch_posts_index(target, repo, gate)
+    url = call_with_retries(gate, repo.get_archive_link, 'tarball', remote['head'])
+    
+    contents = ArchiveContents()
+    with urllib.request.urlopen(url, timeout=ARCHIVE_TIMEOUT) as response:
+        for path, stream in iter_archive_entries(response, 'branch.tar.gz'):
+            # Entries sit below an "<owner>-<repo>-<short sha>/" directory
+            repository_path = path.split('/', 1)[-1]
+            directory, _sep, filename = repository_path.rpartition('/')
+            if directory != '_posts' or not filename.lower().endswith('.md'):
+                continue
+            data = stream.read()
+            try:
+                text = data.decode('utf-8')
+            except UnicodeDecodeError:
+                if on_error is not None:
+                    on_error(f"Skipped {repository_path}: not valid UTF-8")
+                continue
+            metadata, body, frontmatter = parse_post(text, filename, on_error=on_error, use_cache=False)
+            blob_sha = remote['index'].get(repository_path) or git_blob_sha(data)
+            contents.posts.append(
+                IngestedPost(filename, metadata, store.put(body), repository_path, blob_sha, frontmatter)
+            )
+    return contents
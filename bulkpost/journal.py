@@ -0,0 +1,234 @@
+"""SQLite journal of upload jobs, so interrupted batches can be resumed."""
+
+import datetime
+import json
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from bulkpost.config import data_dir
+from bulkpost.db import connect
+from bulkpost.posts import git_blob_sha
+
+# Per-file states that mean the file has reached GitHub
+FINISHED_STATES = ('created', 'updated', 'unchanged')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    created_at TEXT NOT NULL,
+    target TEXT NOT NULL,
+    single_commit INTEGER NOT NULL,
+    state TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS job_files (
+    job_id TEXT NOT NULL REFERENCES jobs(id),
+    position INTEGER NOT NULL,
+    filename TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    content TEXT,
+    state TEXT NOT NULL,
+    commit_sha TEXT,
+    message TEXT,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (job_id, filename)
+);
+CREATE INDEX IF NOT EXISTS job_files_state ON job_files (job_id, state);
+"""
+
+def _now():
+    return datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+class UploadJournal:
+    """Records every job and the state, content hash and commit of each of its files."""
+    
+    def __init__(self, path=None):
+        self.path = str(path or data_dir() / "journal.sqlite3")
+        with connect(self.path) as conn:
+            conn.executescript(SCHEMA)
+    
+    def start_job(self, target, files_to_upload, single_commit):
+        """Record a new job for (filename, content) pairs and return its id."""
+        job_id = uuid.uuid4().hex
+        now = _now()
+        target_json = json.dumps({
+            "owner": target.owner,
+            "name": target.name,
+            "branch": target.branch,
+            "api_url": target.api_url,
+        })
+        with connect(self.path) as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, created_at, target, single_commit, state) VALUES (?, ?, ?, ?, 'running')",
+                (job_id, now, target_json, int(single_commit))
+            )
+            conn.executemany(
+                "INSERT INTO job_files (job_id, position, filename, content_hash, content, state, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, 'pending', ?)",
+                [
+                    (job_id, position, filename, git_blob_sha(content), content, now)
+                    for position, (filename, content) in enumerate(files_to_upload)
+                ]
+            )
+        return job_id
+    
+    def outstanding(self, job_id):
+        """Return the (filename, content) pairs of a job that have not reached GitHub yet."""
+        with connect(self.path) as conn:
+            rows = conn.execute(
+                f"SELECT filename, content FROM job_files WHERE job_id = ? "
+                f"AND state NOT IN ({', '.join('?' * len(FINISHED_STATES))}) ORDER BY position",
+                (job_id, *FINISHED_STATES)
+            ).fetchall()
+        return [(row["filename"], row["content"]) for row in rows]
+    
+    def record(self, job_id, result):
+        """Store the outcome of one file; finished files drop their content to keep the journal small."""
+        finished = result["status"] in FINISHED_STATES
+        with connect(self.path) as conn:
+            conn.execute(
+                "UPDATE job_files SET state = ?, commit_sha = ?, message = ?, updated_at = ?, "
+                "content = CASE WHEN ? THEN NULL ELSE content END "
+                "WHERE job_id = ? AND filename = ?",
+                (
+                    result["status"], result.get("commit"), result.get("message"), _now(),
+                    finished, job_id, result["filename"]
+                )
+            )
+    
+    def finish(self, job_id):
+        """Mark a job done once none of its files is outstanding; return whether it is done."""
+        with connect(self.path) as conn:
+            remaining = conn.execute(
+                f"SELECT COUNT(*) FROM job_files WHERE job_id = ? "
+                f"AND state NOT IN ({', '.join('?' * len(FINISHED_STATES))})",
+                (job_id, *FINISHED_STATES)
+            ).fetchone()[0]
+            state = 'done' if remaining == 0 else 'incomplete'
+            conn.execute("UPDATE jobs SET state = ? WHERE id = ?", (state, job_id))
+        return remaining == 0
+    
+    def discard(self, job_id):
+        """Stop offering a job for resumption without touching its files."""
+        with connect(self.path) as conn:
+            conn.execute("UPDATE jobs SET state = 'discarded' WHERE id = ?", (job_id,))
+    
+    def job(self, job_id):
+        """Return a job as a dict, with its target decoded, or None."""
+        with connect(self.path) as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._job_dict(row) if row else None
+    
+    def incomplete_jobs(self):
+        """Return jobs that were interrupted or still have failed files, newest first."""
+        with connect(self.path) as conn:
+            rows = conn.execute(
+                "SELECT jobs.*, "
+                f"SUM(job_files.state NOT IN ({', '.join('?' * len(FINISHED_STATES))})) AS outstanding, "
+                "COUNT(job_files.filename) AS total "
+                "FROM jobs JOIN job_files ON job_files.job_id = jobs.id "
+                "WHERE jobs.state NOT IN ('done', 'discarded') GROUP BY jobs.id ORDER BY jobs.created_at DESC",
+                FINISHED_STATES
+            ).fetchall()
+        return [self._job_dict(row) for row in rows]
+    
+    def results(self, job_id):
+        """Return the latest per-file results of a job in upload order."""
+        with connect(self.path) as conn:
+            rows = conn.execute(
+                "SELECT filename, state, commit_sha, message FROM job_files WHERE job_id = ? ORDER BY position",
+                (job_id,)
+            ).fetchall()
+        results = []
+        for row in rows:
+            result = {"filename": row["filename"], "status": row["state"]}
+            if row["commit_sha"]:
+                result["commit"] = row["commit_sha"]
+            if row["message"]:
+                result["message"] = row["message"]
+            results.append(result)
+        return results
+    
+    @staticmethod
+    def _job_dict(row):
+        job = dict(row)
+        job["target"] = json.loads(job["target"])
+        job["single_commit"] = bool(job["single_commit"])
+        return job
+
+def run_job(journal, job_id, target, progress=None, concurrency=None, metrics=None, gate=None):
+    """Upload whatever a journaled job still has outstanding and return the results of all its files.
+    
+    Retrying is idempotent: finished files are skipped, and a file that landed just before
+    an interruption matches its remote blob SHA and comes back as unchanged.
+    """
+    from bulkpost.github_upload import DEFAULT_UPLOAD_CONCURRENCY, upload_to_github, upload_to_github_batch
+    
+    job = journal.job(job_id)
+    upload = upload_to_github_batch if job["single_commit"] else upload_to_github
+    outstanding = journal.outstanding(job_id)
+    try:
+        if outstanding:
+            upload(
+                outstanding,
+                target,
+                progress=progress,
+                concurrency=concurrency or DEFAULT_UPLOAD_CONCURRENCY,
+                on_result=lambda result: journal.record(job_id, result),
+                metrics=metrics,
+                gate=gate
+            )
+    finally:
+        journal.finish(job_id)
+    
+    results = journal.results(job_id)
+    for result in results:
+        if result["status"] in FINISHED_STATES:
+            result["url"] = target.file_url(result["filename"])
+    return results
+
+def run_jobs(journal, jobs, progress=None, concurrency=None, metrics=None):
+    """Run journaled jobs for several targets at once and return {job id: (results, error message)}.
+    
+    jobs is a list of (job id, target). concurrency is the number of API calls in flight
+    across all of them, split evenly between the jobs. GitHub counts the rate limit per
+    token, so jobs whose targets share a token also share one rate-limit gate. A job that
+    fails outright reports its error without stopping the others. progress, if given, is
+    called with (job id, fraction).
+    """
+    from bulkpost.github_upload import DEFAULT_UPLOAD_CONCURRENCY, RateLimitGate
+    
+    concurrency = concurrency or DEFAULT_UPLOAD_CONCURRENCY
+    per_job = max(1, concurrency // max(1, len(jobs)))
+    gates = {}
+    gates_lock = threading.Lock()
+    
+    def gate_for(target):
+        with gates_lock:
+            key = (target.token, target.api_url)
+            if key not in gates:
+                # One pool covers every job on this token
+                g, _repo = target.connect(pool_size=concurrency)
+                gates[key] = RateLimitGate(g, reserve=concurrency, metrics=metrics)
+            return gates[key]
+    
+    def run(job_id, target):
+        return run_job(
+            journal,
+            job_id,
+            target,
+            progress=(lambda fraction: progress(job_id, fraction)) if progress is not None else None,
+            concurrency=per_job,
+            metrics=metrics,
+            gate=gate_for(target)
+        )
+    
+    outcomes = {}
+    with ThreadPoolExecutor(max_workers=max(1, len(jobs))) as executor:
+        futures = {executor.submit(run, job_id, target): job_id for job_id, target in jobs}
+        for future in as_completed(futures):
+            try:
+                outcomes[futures[future]] = (future.result(), None)
+            except Exception as e:
+                outcomes[futures[future]] = (None, str(e))
+    return outcomes
@@ -0,0 +1,140 @@
+"""Timing spans, counters and rate-limit gauges for uploads, exportable as JSON or Prometheus text."""
+
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+PHASES = ("parse", "preflight", "render", "check", "write", "rate_limit_wait")
+SPAN_SAMPLES = 10000
+
+COUNTER_HELP = {
+    "api_calls": "GitHub API requests attempted, including retries.",
+    "retries": "GitHub API requests retried after a rate limit or transient error.",
+    "rate_limited": "GitHub API requests rejected by a primary or secondary rate limit.",
+    "bytes_sent": "Bytes of post and asset content sent to GitHub.",
+    "files": "Files processed by uploads, by result status.",
+}
+
+def _percentile(ordered, fraction):
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))]
+
+class UploadMetrics:
+    """Thread-safe collector shared by the parse, render and upload steps of a process.
+    
+    Percentiles are computed over the most recent SPAN_SAMPLES spans of each phase; counts
+    and totals cover everything since the last reset().
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+    
+    def reset(self):
+        with self._lock:
+            self._spans = {}
+            self._counters = {}
+            self._rate_limit = {"remaining": None, "limit": None, "reset": None}
+    
+    @contextmanager
+    def span(self, phase, items=1):
+        """Time the body of a with-block as one span of a phase covering items files."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(phase, time.perf_counter() - start, items)
+    
+    def observe(self, phase, seconds, items=1):
+        """Record an already measured span."""
+        with self._lock:
+            span = self._spans.setdefault(
+                phase, {"count": 0, "items": 0, "seconds": 0.0, "samples": deque(maxlen=SPAN_SAMPLES)}
+            )
+            span["count"] += 1
+            span["items"] += items
+            span["seconds"] += seconds
+            span["samples"].append(seconds)
+    
+    def inc(self, name, amount=1, **labels):
+        """Add to a counter; labels split it into series, e.g. inc("files", status="created")."""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+    
+    def set_rate_limit(self, remaining, limit, reset):
+        """Record the primary rate-limit budget reported by the latest GitHub response."""
+        with self._lock:
+            self._rate_limit = {"remaining": remaining, "limit": limit, "reset": reset}
+    
+    def snapshot(self):
+        """Return the current phases, counters and rate-limit budget as plain data."""
+        with self._lock:
+            phases = {}
+            for phase, span in self._spans.items():
+                ordered = sorted(span["samples"])
+                phases[phase] = {
+                    "count": span["count"],
+                    "items": span["items"],
+                    "seconds": span["seconds"],
+                    "p50_seconds": _percentile(ordered, 0.50),
+                    "p99_seconds": _percentile(ordered, 0.99),
+                }
+            counters = {}
+            for (name, labels), value in sorted(self._counters.items()):
+                if labels:
+                    counters.setdefault(name, {})[",".join(f"{key}={label}" for key, label in labels)] = value
+                else:
+                    counters[name] = value
+            return {"phases": phases, "counters": counters, "rate_limit": dict(self._rate_limit)}
+    
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=2)
+    
+    def to_prometheus(self, prefix="bulkpost"):
+        """Render the metrics in the Prometheus text exposition format."""
+        with self._lock:
+            spans = {phase: dict(span, samples=sorted(span["samples"])) for phase, span in self._spans.items()}
+            counters = dict(self._counters)
+            rate_limit = dict(self._rate_limit)
+        
+        lines = [
+            f"# HELP {prefix}_phase_seconds Time spent per upload phase.",
+            f"# TYPE {prefix}_phase_seconds summary",
+        ]
+        for phase, span in sorted(spans.items()):
+            for quantile in (0.5, 0.99):
+                lines.append(
+                    f'{prefix}_phase_seconds{{phase="{phase}",quantile="{quantile}"}} '
+                    f'{_percentile(span["samples"], quantile)}'
+                )
+            lines.append(f'{prefix}_phase_seconds_sum{{phase="{phase}"}} {span["seconds"]}')
+            lines.append(f'{prefix}_phase_seconds_count{{phase="{phase}"}} {span["count"]}')
+        lines.append(f"# HELP {prefix}_phase_items_total Files covered by each upload phase.")
+        lines.append(f"# TYPE {prefix}_phase_items_total counter")
+        for phase, span in sorted(spans.items()):
+            lines.append(f'{prefix}_phase_items_total{{phase="{phase}"}} {span["items"]}')
+        
+        for name in sorted({name for name, _labels in counters}):
+            lines.append(f"# HELP {prefix}_{name}_total {COUNTER_HELP.get(name, name)}")
+            lines.append(f"# TYPE {prefix}_{name}_total counter")
+            for (counter, labels), value in sorted(counters.items()):
+                if counter != name:
+                    continue
+                label_text = ",".join(f'{key}="{label}"' for key, label in labels)
+                lines.append(f"{prefix}_{name}_total{{{label_text}}} {value}" if labels else f"{prefix}_{name}_total {value}")
+        
+        for key, help_text in (
+            ("remaining", "Requests left in the current GitHub rate-limit window."),
+            ("limit", "Size of the GitHub rate-limit window."),
+            ("reset", "Epoch time at which the GitHub rate-limit window resets."),
+        ):
+            if rate_limit[key] is None:
+                continue
+            lines.append(f"# HELP {prefix}_rate_limit_{key} {help_text}")
+            lines.append(f"# TYPE {prefix}_rate_limit_{key} gauge")
+            lines.append(f"{prefix}_rate_limit_{key} {rate_limit[key]}")
+        return "\n".join(lines) + "\n"
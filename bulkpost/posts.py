@@ -0,0 +1,315 @@
+"""Parsing, naming and rendering of Jekyll posts."""
+
+import copy
+import datetime
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+def _default_date(filename):
+    """Date of a post that doesn't set one: its filename date, as Jekyll does, else the current time."""
+    name = Path(filename).name
+    if validate_filename(name):
+        try:
+            return datetime.datetime.strptime(name[:10], '%Y-%m-%d').strftime('%Y-%m-%d %H:%M:%S')
+        except ValueError:
+            pass
+    return datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+def default_metadata(filename):
+    """Metadata used when a post has no usable frontmatter."""
+    return {
+        'title': Path(filename).stem.replace('-', ' ').title(),
+        'date': _default_date(filename),
+        'categories': [],
+        'tags': [],
+        'description': '',
+        'image': '',
+        'layout': 'post'
+    }
+
+# Frontmatter must open the file and be closed by a line holding only "---" (or YAML's "...")
+FRONTMATTER_RE = re.compile(r'\A---[ \t]*\r?\n(.*?)^(?:---|\.\.\.)[ \t]*\r?$', re.MULTILINE | re.DOTALL)
+
+# Below this many uncached files a process pool costs more than it saves
+PARALLEL_PARSE_THRESHOLD = 200
+
+# Parsed (metadata, body) pairs keyed by (content hash, filename)
+PARSE_CACHE_SIZE = 4096
+_parse_cache = OrderedDict()
+_parse_cache_lock = threading.Lock()
+
+# Dumped frontmatter keyed by metadata hash; posts without their original frontmatter are rendered from here
+DUMP_CACHE_SIZE = 4096
+_dump_cache = OrderedDict()
+
+@dataclass(frozen=True)
+class Frontmatter:
+    """A file's original frontmatter, kept with its post so an unedited post renders exactly as it was read.
+    
+    prefix is the text before the body and suffix the text after it; the keys are hashes of
+    the metadata and body the file parsed to.
+    """
+    
+    prefix: str
+    suffix: str
+    metadata_key: str
+    body_key: str
+    
+    def fits(self, metadata, body):
+        """Whether a post still has the metadata and body this frontmatter was read with."""
+        return self.body_key == _body_key(body) and self.metadata_key == _metadata_key(metadata)
+
+def _yaml_loader():
+    """Prefer the libyaml C loader, falling back to the pure-Python one."""
+    import yaml
+    
+    return getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+def _yaml_dumper():
+    """Prefer the libyaml C dumper, falling back to the pure-Python one."""
+    import yaml
+    
+    return getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+
+def _parse(content, filename):
+    """Parse a post, returning (metadata, body, error message or None, Frontmatter or None)."""
+    import yaml
+    
+    try:
+        # Split content into frontmatter and body
+        match = FRONTMATTER_RE.match(content.lstrip('\ufeff \t\r\n'))
+        header = None
+        if match:
+            # Extract frontmatter and content
+            frontmatter_content = match.group(1)
+            rest = match.string[match.end():]
+            body_content = rest.strip()
+            if body_content:
+                lead = len(rest) - len(rest.lstrip())
+                header = (match.string[:match.end() + lead], rest[len(rest.rstrip()):])
+            else:
+                header = (match.string, '')
+            
+            # Parse frontmatter
+            metadata = yaml.load(frontmatter_content, Loader=_yaml_loader())
+            if metadata is None:
+                metadata = {}
+            elif not isinstance(metadata, dict):
+                raise ValueError("frontmatter is not a mapping")
+        else:
+            # No valid frontmatter found
+            metadata = {}
+            body_content = content.strip()
+        
+        # Ensure required fields exist with proper formatting
+        if 'title' not in metadata:
+            metadata['title'] = Path(filename).stem.replace('-', ' ').title()
+        
+        if 'date' not in metadata:
+            metadata['date'] = _default_date(filename)
+        
+        if 'categories' not in metadata:
+            metadata['categories'] = []
+        elif isinstance(metadata['categories'], str):
+            metadata['categories'] = [metadata['categories']]
+        
+        if 'tags' not in metadata:
+            metadata['tags'] = []
+        elif isinstance(metadata['tags'], str):
+            metadata['tags'] = [metadata['tags']]
+        
+        if 'description' not in metadata:
+            metadata['description'] = ''
+        
+        if 'image' not in metadata:
+            metadata['image'] = ''
+        
+        if 'layout' not in metadata:
+            metadata['layout'] = 'post'
+        
+        frontmatter = None
+        if header is not None:
+            frontmatter = Frontmatter(*header, _metadata_key(metadata), _body_key(body_content))
+        return metadata, body_content, None, frontmatter
+    except Exception as e:
+        return default_metadata(filename), content, f"Error parsing {filename}: {str(e)}", None
+
+def _parse_key(content, filename):
+    return hashlib.sha1(content.encode('utf-8')).hexdigest(), filename
+
+def _cache_get(key):
+    with _parse_cache_lock:
+        parsed = _parse_cache.get(key)
+        if parsed is not None:
+            _parse_cache.move_to_end(key)
+        return parsed
+
+def _cache_put(key, parsed):
+    with _parse_cache_lock:
+        _parse_cache[key] = parsed
+        while len(_parse_cache) > PARSE_CACHE_SIZE:
+            _parse_cache.popitem(last=False)
+
+def _metadata_key(metadata):
+    """Hash metadata by value; dates keep their type so a date and its string form differ."""
+    try:
+        text = json.dumps(metadata, sort_keys=True, default=repr, ensure_ascii=False)
+    except TypeError:
+        # Keys of mixed types can't be sorted
+        text = repr(metadata)
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+def _body_key(body):
+    return hashlib.sha1(body.encode('utf-8')).hexdigest()
+
+def _dump_get(key):
+    with _parse_cache_lock:
+        prefix = _dump_cache.get(key)
+        if prefix is not None:
+            _dump_cache.move_to_end(key)
+        return prefix
+
+def _dump_put(key, prefix):
+    with _parse_cache_lock:
+        _dump_cache[key] = prefix
+        while len(_dump_cache) > DUMP_CACHE_SIZE:
+            _dump_cache.popitem(last=False)
+
+def _report_error(error, on_error):
+    if on_error is not None:
+        on_error(error)
+    else:
+        logger.warning(error)
+
+def parse_post(content, filename, on_error=None, use_cache=True):
+    """Parse a markdown file into (metadata, body, Frontmatter or None).
+    
+    Pass the frontmatter on to render_post to keep the file's own frontmatter while the
+    post is unedited.
+    """
+    if use_cache:
+        key = _parse_key(content, filename)
+        parsed = _cache_get(key)
+        if parsed is None:
+            parsed = _parse(content, filename)
+            _cache_put(key, parsed)
+    else:
+        parsed = _parse(content, filename)
+    
+    metadata, body_content, error, frontmatter = parsed
+    if error is not None:
+        _report_error(error, on_error)
+    # Callers edit the metadata in place, so never hand out the cached dict
+    return (copy.deepcopy(metadata) if use_cache else metadata), body_content, frontmatter
+
+def parse_markdown_file(content, filename, on_error=None, use_cache=True):
+    """Parse a markdown file with frontmatter."""
+    metadata, body_content, _frontmatter = parse_post(content, filename, on_error, use_cache)
+    return metadata, body_content
+
+def parse_posts(files, on_error=None, workers=None):
+    """Parse (content, filename) pairs into (metadata, body, Frontmatter or None) triples.
+    
+    Uncached files are spread over a process pool for large batches.
+    """
+    keys = [_parse_key(content, filename) for content, filename in files]
+    parsed = [_cache_get(key) for key in keys]
+    misses = [i for i, entry in enumerate(parsed) if entry is None]
+    
+    workers = workers or os.cpu_count() or 1
+    if len(misses) >= PARALLEL_PARSE_THRESHOLD and workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        
+        contents = [files[i][0] for i in misses]
+        filenames = [files[i][1] for i in misses]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            fresh = list(executor.map(_parse, contents, filenames, chunksize=64))
+    else:
+        fresh = [_parse(*files[i]) for i in misses]
+    
+    for i, entry in zip(misses, fresh):
+        _cache_put(keys[i], entry)
+        parsed[i] = entry
+    
+    results = []
+    for metadata, body_content, error, frontmatter in parsed:
+        if error is not None:
+            _report_error(error, on_error)
+        results.append((copy.deepcopy(metadata), body_content, frontmatter))
+    return results
+
+def parse_markdown_files(files, on_error=None, workers=None):
+    """Parse (content, filename) pairs, spreading uncached files over a process pool for large batches."""
+    return [(metadata, body_content) for metadata, body_content, _frontmatter in parse_posts(files, on_error, workers)]
+
+def validate_filename(filename):
+    """Validate filename format for Jekyll posts."""
+    pattern = r'^\d{4}-\d{2}-\d{2}-[a-zA-Z0-9-]+\.md$'
+    return bool(re.match(pattern, filename))
+
+def format_filename(title, date=None):
+    """Format title into a valid Jekyll post filename."""
+    if date is None:
+        date = datetime.datetime.now().strftime('%Y-%m-%d')
+    
+    # Convert title to lowercase, replace spaces with hyphens
+    slug = title.lower().replace(' ', '-')
+    
+    # Remove special characters
+    slug = re.sub(r'[^a-z0-9-]', '', slug)
+    
+    # Remove multiple consecutive hyphens
+    slug = re.sub(r'-+', '-', slug)
+    
+    # Ensure the slug doesn't start or end with a hyphen
+    slug = slug.strip('-')
+    
+    return f"{date}-{slug}.md"
+
+def render_post(metadata, content, frontmatter=None):
+    """Render metadata and body back into a markdown file with frontmatter.
+    
+    With the Frontmatter parse_post returned for the post, an unedited post keeps its
+    original frontmatter bytes. Otherwise the metadata is dumped in its own key order, and
+    the result is cached by metadata hash.
+    """
+    import yaml
+    
+    if frontmatter is not None and frontmatter.fits(metadata, content):
+        return f"{frontmatter.prefix}{content}{frontmatter.suffix}"
+    
+    key = _metadata_key(metadata)
+    prefix = _dump_get(key)
+    if prefix is None:
+        frontmatter_content = yaml.dump(
+            metadata,
+            Dumper=_yaml_dumper(),
+            default_flow_style=False,
+            allow_unicode=True,
+            sort_keys=False
+        )
+        prefix = f"---\n{frontmatter_content}---\n\n"
+        _dump_put(key, prefix)
+    return f"{prefix}{content}"
+
+def upload_metadata(filename, metadata):
+    """Return (upload filename, metadata to publish), applying any suggested rename."""
+    if 'suggested_filename' in metadata:
+        upload_filename = metadata['suggested_filename']
+        # Remove the suggested_filename from metadata
+        return upload_filename, {k: v for k, v in metadata.items() if k != 'suggested_filename'}
+    return filename, metadata
+
+def git_blob_sha(content):
+    """Compute the SHA git assigns to a blob holding the given text or bytes."""
+    data = content.encode("utf-8") if isinstance(content, str) else content
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
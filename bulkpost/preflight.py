@@ -0,0 +1,281 @@
+"""Pre-flight checks run over a whole batch before anything is sent to GitHub.
+
+Every post is checked for a valid Jekyll filename, readable dates, required fields, YAML
+that survives a render/parse round trip and image and link references that resolve.
+Filename and slug collisions are checked across the batch. Files with errors are blocked;
+warnings are only reported. A local image that can't be found is only a warning, since the
+site may serve it from somewhere the check doesn't know about.
+"""
+
+import posixpath
+import re
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from bulkpost.images import HTML_IMAGE_RE, MARKDOWN_IMAGE_RE, is_local_reference
+from bulkpost.posts import git_blob_sha, parse_markdown_files, render_post, validate_filename
+from bulkpost.schedule import publish_time
+
+# Fields a post must have non-empty values for
+REQUIRED_FIELDS = ('title', 'date', 'layout')
+
+# Liquid forms that put the site's base URL in front of a root path, as image rewriting does; group 1 is the path
+SITE_PATH_RES = (
+    re.compile(r'^\{\{-?\s*site\.baseurl\s*-?\}\}(/.*)$'),
+    re.compile(r'^\{\{-?\s*["\']([^"\']+)["\']\s*\|\s*(?:relative|absolute)_url\s*-?\}\}$'),
+)
+
+# Markdown links that aren't images; group 1 is the target
+MARKDOWN_LINK_RE = re.compile(r'(?<!!)\[[^\]]*\]\(\s*<?([^)\s>]+)>?(?:\s+"[^"]*")?\s*\)')
+
+# Per-file results keyed by (filename, blob SHA of the rendered post)
+RESULT_CACHE_SIZE = 16384
+_results = OrderedDict()
+_results_lock = threading.Lock()
+
+@dataclass
+class Issue:
+    key: str
+    filename: str
+    severity: str
+    check: str
+    message: str
+
+class LinkChecker:
+    """Decides whether an external URL is reachable; subclass to check links differently."""
+    
+    def check(self, url):
+        """Return None when url is reachable, or a short reason why it is not."""
+        raise NotImplementedError
+
+class StaticLinkChecker(LinkChecker):
+    """Offline checker: every URL is reachable except the ones listed as broken."""
+    
+    def __init__(self, broken=()):
+        self.broken = set(broken)
+    
+    def check(self, url):
+        return "listed as broken" if url in self.broken else None
+
+class HttpLinkChecker(LinkChecker):
+    """Checks URLs with HEAD requests (GET where HEAD is refused), remembering answers for ttl seconds."""
+    
+    def __init__(self, timeout=5.0, ttl=3600.0):
+        self.timeout = timeout
+        self.ttl = ttl
+        self._answers = {}
+        self._lock = threading.Lock()
+    
+    def _request(self, url, method):
+        request = urllib.request.Request(url, method=method, headers={"User-Agent": "bulkpost-preflight"})
+        with urllib.request.urlopen(request, timeout=self.timeout):
+            return None
+    
+    def check(self, url):
+        with self._lock:
+            answer = self._answers.get(url)
+        if answer is not None and time.monotonic() - answer[0] < self.ttl:
+            return answer[1]
+        try:
+            try:
+                reason = self._request(url, "HEAD")
+            except urllib.error.HTTPError as e:
+                if e.code not in (403, 405, 501):
+                    raise
+                reason = self._request(url, "GET")
+        except urllib.error.HTTPError as e:
+            reason = f"HTTP {e.code}"
+        except Exception as e:
+            reason = str(getattr(e, "reason", e))
+        with self._lock:
+            self._answers[url] = (time.monotonic(), reason)
+        return reason
+
+class PreflightReport:
+    """Issues found in a batch; files with at least one error are blocked."""
+    
+    def __init__(self, issues):
+        self.issues = issues
+        self.blocked = {issue.key for issue in issues if issue.severity == "error"}
+    
+    def to_frame(self):
+        import pandas as pd
+        
+        return pd.DataFrame(
+            [vars(issue) for issue in self.issues],
+            columns=["key", "filename", "severity", "check", "message"]
+        )
+
+def _same_value(read_back, value):
+    # NaN never equals itself, but YAML round-trips it faithfully
+    return read_back == value or (read_back != read_back and value != value)
+
+def _file_checks(filename, metadata, rendered, reparsed):
+    """Checks that depend only on one post, so their outcome can be cached by its content."""
+    found = []
+    if not validate_filename(filename):
+        found.append(("error", "filename", "doesn't follow the Jekyll post format YYYY-MM-DD-title.md"))
+    
+    for field in REQUIRED_FIELDS:
+        if metadata.get(field) in (None, "", []):
+            found.append(("error", "required", f"'{field}' is empty"))
+    
+    moment = publish_time(metadata)
+    if metadata.get('date') not in (None, "") and moment is None:
+        found.append(("error", "date", f"can't read date {metadata.get('date')!r}"))
+    elif moment is not None and validate_filename(filename) and filename[:10] != f"{moment:%Y-%m-%d}":
+        found.append(("warning", "date", f"date {moment:%Y-%m-%d} differs from the filename date {filename[:10]}"))
+    
+    if rendered is None:
+        found.append(("error", "yaml", "metadata can't be written as YAML"))
+    else:
+        changed = [key for key, value in metadata.items() if not _same_value(reparsed.get(key), value)]
+        if changed:
+            found.append(("error", "yaml", f"{', '.join(map(str, changed))} would read back differently"))
+    return found
+
+def _references(metadata, body):
+    """Return (image references, link targets) of a post.
+    
+    Image references are (reference, in frontmatter) pairs: themes resolve the frontmatter
+    image against the site root, while the body's references resolve against the post URL.
+    """
+    images = [
+        (match.group(1), False) for regex in (MARKDOWN_IMAGE_RE, HTML_IMAGE_RE) for match in regex.finditer(body)
+    ]
+    if isinstance(metadata.get('image'), str) and metadata['image']:
+        images.append((metadata['image'], True))
+    links = [match.group(1) for match in MARKDOWN_LINK_RE.finditer(body)]
+    return images, links
+
+def _site_path(reference):
+    """The root path behind a base URL Liquid form, or the reference itself."""
+    for regex in SITE_PATH_RES:
+        match = regex.match(reference)
+        if match:
+            return '/' + match.group(1).lstrip('/')
+    return reference
+
+def _is_liquid(reference):
+    # Resolved by Jekyll at build time, e.g. {{ site.baseurl }}/assets/x.png
+    return '{{' in reference or '{%' in reference
+
+def _is_external(reference):
+    return reference.lower().startswith(("http://", "https://", "//"))
+
+def _absolute_url(reference):
+    # Protocol-relative references are served over HTTPS by GitHub Pages
+    return "https:" + reference if reference.startswith("//") else reference
+
+def _local_image_issue(reference, known_paths, from_root):
+    path = posixpath.normpath(reference.split('?', 1)[0].split('#', 1)[0].lstrip('/'))
+    if path in known_paths:
+        return None
+    if not from_root and not reference.startswith('/'):
+        # Relative references in the body resolve against the post's URL on the site, which is almost never right
+        return ("warning", "image", f"image {reference} is relative to the post's URL and isn't among the known images")
+    return ("warning", "image", f"image {reference} isn't among the uploaded or published images")
+
+def _collisions(posts):
+    """Batch-wide filename and slug collisions as {key: [(severity, check, message)]}."""
+    found = defaultdict(list)
+    by_name = defaultdict(list)
+    by_slug = defaultdict(list)
+    for key, filename, _metadata, _body in posts:
+        by_name[filename.lower()].append((key, filename))
+        if validate_filename(filename):
+            by_slug[filename[11:].lower()].append((key, filename))
+    
+    for entries in by_name.values():
+        if len(entries) > 1:
+            for key, filename in entries:
+                others = ", ".join(other for other_key, other in entries if other_key != key)
+                found[key].append(("error", "collision", f"uploads to the same file as {others}"))
+    for entries in by_slug.values():
+        names = {filename.lower() for _key, filename in entries}
+        if len(names) > 1:
+            for key, filename in entries:
+                others = ", ".join(sorted({other for _other_key, other in entries if other.lower() != filename.lower()}))
+                found[key].append(("warning", "slug", f"same slug as {others}; permalinks without dates collide"))
+    return found
+
+def preflight(posts, known_paths=None, link_checker=None, concurrency=8, frontmatter=None):
+    """Check (key, upload filename, metadata, body) tuples and return a PreflightReport.
+    
+    known_paths holds the repository paths of images that will exist once the batch is
+    published; without it local image references aren't checked. External links and
+    images are only checked when a link_checker is given, each distinct URL once.
+    frontmatter maps keys to the Frontmatter the posts will be rendered with.
+    """
+    frontmatter = frontmatter or {}
+    rendered = []
+    for key, _filename, metadata, body in posts:
+        try:
+            rendered.append(render_post(metadata, body, frontmatter.get(key)))
+        except Exception:
+            rendered.append(None)
+    
+    cache_keys = [
+        (filename, git_blob_sha(content)) if content is not None else None
+        for (_key, filename, _metadata, _body), content in zip(posts, rendered)
+    ]
+    with _results_lock:
+        file_results = [_results.get(cache_key) if cache_key is not None else None for cache_key in cache_keys]
+    misses = [i for i, result in enumerate(file_results) if result is None]
+    
+    # Round trip through the regular parser, which spreads large batches over processes
+    reparsed = parse_markdown_files(
+        [(rendered[i], posts[i][1]) for i in misses if rendered[i] is not None],
+        on_error=lambda error: None
+    )
+    reparsed = iter(reparsed)
+    for i in misses:
+        metadata_back = next(reparsed)[0] if rendered[i] is not None else {}
+        file_results[i] = _file_checks(posts[i][1], posts[i][2], rendered[i], metadata_back)
+        if cache_keys[i] is not None:
+            with _results_lock:
+                _results[cache_keys[i]] = file_results[i]
+                while len(_results) > RESULT_CACHE_SIZE:
+                    _results.popitem(last=False)
+    
+    collisions = _collisions(posts)
+    references = [_references(metadata, body) for _key, _filename, metadata, body in posts]
+    
+    reachability = {}
+    if link_checker is not None:
+        urls = sorted({
+            _absolute_url(reference)
+            for images, links in references
+            for reference in [reference for reference, _from_root in images] + links
+            if _is_external(reference) and not _is_liquid(reference)
+        })
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+            reachability = dict(zip(urls, executor.map(link_checker.check, urls)))
+    
+    issues = []
+    for (key, filename, _metadata, _body), file_result, (images, links) in zip(posts, file_results, references):
+        found = list(file_result) + collisions.get(key, [])
+        for reference, from_root in images:
+            reference = _site_path(reference)
+            if _is_liquid(reference):
+                continue
+            if _is_external(reference):
+                reason = reachability.get(_absolute_url(reference))
+                if reason is not None:
+                    found.append(("error", "image", f"image {reference} is unreachable: {reason}"))
+            elif known_paths is not None and is_local_reference(reference):
+                issue = _local_image_issue(reference, known_paths, from_root)
+                if issue is not None:
+                    found.append(issue)
+        for reference in links:
+            if _is_external(reference):
+                reason = reachability.get(_absolute_url(reference))
+                if reason is not None:
+                    found.append(("warning", "link", f"link {reference} is unreachable: {reason}"))
+        issues.extend(Issue(key, filename, severity, check, message) for severity, check, message in found)
+    return PreflightReport(issues)
@@ -0,0 +1,165 @@
+"""Bulk metadata transforms applied to a whole batch of posts as column operations.
+
+The metadata of a batch is turned into one DataFrame indexed by filename. Every rule maps
+that frame to a new one, and diff() lists the changed cells, so a batch can be previewed
+before apply_diff() writes the changes back into the metadata dicts.
+"""
+
+import datetime
+import re
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from bulkpost.posts import format_filename
+
+# Fields rules read and write; list fields hold one Python list per post
+RULE_FIELDS = ['title', 'date', 'categories', 'tags', 'layout', 'suggested_filename']
+LIST_FIELDS = ('categories', 'tags')
+
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+def metadata_frame(file_metadata, filenames=None):
+    """Build the rule frame for the given files (default: all of them)."""
+    filenames = list(file_metadata) if filenames is None else list(filenames)
+    frame = pd.DataFrame(
+        [{field: file_metadata[filename].get(field) for field in RULE_FIELDS} for filename in filenames],
+        index=pd.Index(filenames, name='filename'),
+        columns=RULE_FIELDS
+    )
+    for field in LIST_FIELDS:
+        frame[field] = [list(value or []) for value in frame[field]]
+    return frame
+
+def _map_list_column(frame, field, transform):
+    """Apply a vectorized transform to every item of a list column, dropping emptied and repeated items."""
+    items = frame[field].explode().dropna()
+    items = transform(items.astype(str)).str.strip().rename('item').reset_index()
+    # Keep the first occurrence of an item per post
+    items = items[items['item'] != ''].drop_duplicates()
+    mapped = items.groupby('filename', sort=False)['item'].agg(list)
+    frame[field] = [mapped.get(filename, []) for filename in frame.index]
+    return frame
+
+def pattern_error(pattern):
+    """Return why a RegexMap pattern doesn't compile, or None if it is valid."""
+    try:
+        re.compile(pattern)
+    except re.error as e:
+        return str(e)
+    return None
+
+@dataclass
+class RegexMap:
+    """Rewrite tags (or categories) matching a regular expression; an empty replacement drops them."""
+    
+    pattern: str
+    replacement: str
+    field: str = 'tags'
+    
+    def apply(self, frame):
+        regex = re.compile(self.pattern)
+        return _map_list_column(frame, self.field, lambda items: items.str.replace(regex, self.replacement, regex=True))
+
+@dataclass
+class ValueMap:
+    """Rename categories (or tags) by exact value; mapping a value to '' drops it."""
+    
+    mapping: dict
+    field: str = 'categories'
+    
+    def apply(self, frame):
+        return _map_list_column(frame, self.field, lambda items: items.map(lambda item: self.mapping.get(item, item)))
+
+@dataclass
+class SetField:
+    """Set a scalar field such as layout on every post, or only where it is empty."""
+    
+    field: str
+    value: str
+    only_empty: bool = False
+    
+    def apply(self, frame):
+        if self.only_empty:
+            empty = frame[self.field].isna() | (frame[self.field].astype(str).str.strip() == '')
+            frame.loc[empty, self.field] = self.value
+        else:
+            frame[self.field] = self.value
+        return frame
+
+@dataclass
+class StaggerDates:
+    """Spread post dates from start, one interval apart, in the order of order_by."""
+    
+    start: datetime.datetime
+    interval: datetime.timedelta
+    order_by: str = 'date'
+    
+    def apply(self, frame):
+        if self.order_by == 'filename':
+            order = np.argsort(frame.index.to_numpy(dtype=str), kind='stable')
+        elif self.order_by == 'date':
+            # Unreadable dates sort last
+            order = np.argsort(pd.to_datetime(frame['date'].astype(str), errors='coerce').to_numpy(), kind='stable')
+        else:
+            order = np.argsort(frame[self.order_by].astype(str).to_numpy(), kind='stable')
+        dates = pd.Timestamp(self.start) + pd.to_timedelta(np.arange(len(frame)) * self.interval.total_seconds(), unit='s')
+        positions = np.empty(len(frame), dtype=int)
+        positions[order] = np.arange(len(frame))
+        frame['date'] = dates[positions].strftime(DATE_FORMAT)
+        return frame
+
+@dataclass
+class RegenerateSlugs:
+    """Suggest a filename built from each post's date and title wherever it differs from the current one."""
+    
+    def apply(self, frame):
+        days = pd.to_datetime(frame['date'].astype(str), errors='coerce').dt.strftime('%Y-%m-%d')
+        slugs = pd.Series(
+            [
+                format_filename(str(title or ''), None if pd.isna(day) else day)
+                for title, day in zip(frame['title'], days)
+            ],
+            index=frame.index
+        )
+        frame['suggested_filename'] = slugs.where(slugs != frame.index.to_series(), frame['suggested_filename'])
+        return frame
+
+def apply_rules(frame, rules):
+    """Return a copy of frame with the rules applied in order."""
+    frame = frame.copy()
+    for field in LIST_FIELDS:
+        frame[field] = [list(value) for value in frame[field]]
+    for rule in rules:
+        frame = rule.apply(frame)
+    return frame
+
+def _cell_text(value):
+    if isinstance(value, list):
+        return ', '.join(map(str, value))
+    return '' if value is None or pd.isna(value) else str(value)
+
+def diff(before, after):
+    """List changed cells as a DataFrame with filename, field, before and after columns."""
+    changes = []
+    for field in RULE_FIELDS:
+        old, new = before[field].map(_cell_text), after[field].map(_cell_text)
+        changed = old != new
+        if changed.any():
+            changes.append(pd.DataFrame({
+                'filename': before.index[changed],
+                'field': field,
+                'before': old[changed].to_numpy(),
+                'after': new[changed].to_numpy(),
+                'value': after[field][changed].to_numpy(),
+            }))
+    if not changes:
+        return pd.DataFrame(columns=['filename', 'field', 'before', 'after', 'value'])
+    return pd.concat(changes, ignore_index=True).sort_values(['filename', 'field'], kind='stable', ignore_index=True)
+
+def apply_diff(file_metadata, changes):
+    """Write the changed cells of a diff() back into the metadata dicts; return the changed filenames."""
+    for filename, field, value in zip(changes['filename'], changes['field'], changes['value']):
+        file_metadata[filename][field] = list(value) if field in LIST_FIELDS else value
+    return set(changes['filename'])
@@ -0,0 +1,277 @@
+"""Persistent queue of future-dated posts, released in batches once their publish time arrives.
+
+Posts are held per target until their `date`. Release times are rounded up to the next
+window boundary, so everything that falls due within one window goes out together: one
+journaled single-commit job per target instead of a commit per post.
+"""
+
+import datetime
+import json
+import logging
+import math
+import threading
+
+from bulkpost.config import data_dir
+from bulkpost.db import connect
+
+logger = logging.getLogger(__name__)
+
+# Seconds per release window; posts due within the same window share one commit
+DEFAULT_WINDOW = 300.0
+
+# Longest sleep of a runner, so posts queued by another process are noticed
+POLL_INTERVAL = 60.0
+
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Jekyll dates: '2024-05-01', '2024-05-01 09:30', '2024-05-01 09:30:00 +0200'
+DATE_FORMATS = (
+    '%Y-%m-%d %H:%M:%S %z',
+    '%Y-%m-%d %H:%M %z',
+    '%Y-%m-%d %H:%M:%S',
+    '%Y-%m-%d %H:%M',
+    '%Y-%m-%dT%H:%M:%S%z',
+    '%Y-%m-%dT%H:%M:%S',
+    '%Y-%m-%d',
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scheduled_posts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at TEXT NOT NULL,
+    publish_at TEXT NOT NULL,
+    target TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    content TEXT,
+    state TEXT NOT NULL,
+    job_id TEXT
+);
+CREATE INDEX IF NOT EXISTS scheduled_posts_due ON scheduled_posts (state, publish_at);
+"""
+
+def publish_time(metadata):
+    """Return a post's `date` as a naive local datetime, or None when it can't be read."""
+    value = metadata.get('date')
+    if isinstance(value, datetime.datetime):
+        moment = value
+    elif isinstance(value, datetime.date):
+        moment = datetime.datetime.combine(value, datetime.time())
+    else:
+        text = str(value or '').strip()
+        for date_format in DATE_FORMATS:
+            try:
+                moment = datetime.datetime.strptime(text, date_format)
+                break
+            except ValueError:
+                continue
+        else:
+            return None
+    if moment.tzinfo is not None:
+        moment = moment.astimezone().replace(tzinfo=None)
+    return moment
+
+def split_scheduled(files_to_upload, now=None):
+    """Split (filename, content) pairs into files to publish now and {publish time: files} to hold back.
+    
+    Only posts are held back; assets such as images go out right away, so they are in
+    place when the posts referencing them are released.
+    """
+    from bulkpost.posts import parse_markdown_file
+    
+    now = now or datetime.datetime.now()
+    immediate = []
+    held = {}
+    for filename, content in files_to_upload:
+        if "/" not in filename:
+            metadata, _body = parse_markdown_file(content, filename)
+            moment = publish_time(metadata)
+            if moment is not None and moment > now:
+                held.setdefault(moment, []).append((filename, content))
+                continue
+        immediate.append((filename, content))
+    return immediate, held
+
+def release_time(publish_at, window=DEFAULT_WINDOW):
+    """Round a publish time up to the end of its release window."""
+    timestamp = publish_at.timestamp()
+    return datetime.datetime.fromtimestamp(math.ceil(timestamp / window) * window)
+
+def window_start(now, window=DEFAULT_WINDOW):
+    """Round a time down to the start of its release window."""
+    return datetime.datetime.fromtimestamp(math.floor(now.timestamp() / window) * window)
+
+def _target_json(target):
+    return json.dumps({
+        "owner": target.owner,
+        "name": target.name,
+        "branch": target.branch,
+        "api_url": target.api_url,
+    }, sort_keys=True)
+
+class ScheduleQueue:
+    """Scheduled posts stored in SQLite until they are released into the upload journal."""
+    
+    def __init__(self, path=None):
+        self.path = str(path or data_dir() / "schedule.sqlite3")
+        with connect(self.path) as conn:
+            conn.executescript(SCHEMA)
+    
+    def add(self, target, files, publish_at):
+        """Hold (filename, content) pairs for target until publish_at.
+        
+        A post already waiting under the same filename for the same target is replaced.
+        """
+        target_json = _target_json(target)
+        now = datetime.datetime.now().strftime(TIME_FORMAT)
+        with connect(self.path) as conn:
+            conn.executemany(
+                "UPDATE scheduled_posts SET state = 'cancelled', content = NULL "
+                "WHERE state = 'scheduled' AND target = ? AND filename = ?",
+                [(target_json, filename) for filename, _content in files]
+            )
+            conn.executemany(
+                "INSERT INTO scheduled_posts (created_at, publish_at, target, filename, content, state) "
+                "VALUES (?, ?, ?, ?, ?, 'scheduled')",
+                [
+                    (now, publish_at.strftime(TIME_FORMAT), target_json, filename, content)
+                    for filename, content in files
+                ]
+            )
+    
+    def entries(self, states=('scheduled',)):
+        """Return queued posts without their content, soonest first."""
+        with connect(self.path) as conn:
+            rows = conn.execute(
+                f"SELECT id, created_at, publish_at, target, filename, state, job_id FROM scheduled_posts "
+                f"WHERE state IN ({', '.join('?' * len(states))}) ORDER BY publish_at, id",
+                tuple(states)
+            ).fetchall()
+        return [self._entry_dict(row) for row in rows]
+    
+    def reschedule(self, entry_id, publish_at):
+        """Move a waiting post to another publish time."""
+        with connect(self.path) as conn:
+            conn.execute(
+                "UPDATE scheduled_posts SET publish_at = ? WHERE id = ? AND state = 'scheduled'",
+                (publish_at.strftime(TIME_FORMAT), entry_id)
+            )
+    
+    def cancel(self, entry_ids):
+        """Drop waiting posts from the queue."""
+        with connect(self.path) as conn:
+            conn.executemany(
+                "UPDATE scheduled_posts SET state = 'cancelled', content = NULL WHERE id = ? AND state = 'scheduled'",
+                [(entry_id,) for entry_id in entry_ids]
+            )
+    
+    def next_publish_time(self):
+        """Earliest publish time still waiting, or None when the queue is empty."""
+        with connect(self.path) as conn:
+            row = conn.execute(
+                "SELECT MIN(publish_at) FROM scheduled_posts WHERE state = 'scheduled'"
+            ).fetchone()
+        return datetime.datetime.strptime(row[0], TIME_FORMAT) if row[0] else None
+    
+    def release(self, journal, token_for, now=None):
+        """Move every post due by now into the journal, one single-commit job per target.
+        
+        token_for maps a target's fields (owner, name, branch and api_url) to a token; posts
+        for targets without one stay queued.
+        Returns the (job id, GitHubTarget) pairs to upload. Releasing is claimed in one
+        write transaction, so concurrent runners never release a post twice.
+        """
+        from bulkpost.github_upload import GitHubTarget
+        
+        now = (now or datetime.datetime.now()).strftime(TIME_FORMAT)
+        jobs = []
+        with connect(self.path) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            rows = conn.execute(
+                "SELECT id, target, filename, content FROM scheduled_posts "
+                "WHERE state = 'scheduled' AND publish_at <= ? ORDER BY publish_at, id",
+                (now,)
+            ).fetchall()
+            groups = {}
+            for row in rows:
+                groups.setdefault(row["target"], []).append(row)
+            for target_json, group in groups.items():
+                fields = json.loads(target_json)
+                token = token_for(fields)
+                if not token:
+                    logger.warning(
+                        "No token for %s/%s@%s; %d scheduled posts stay queued",
+                        fields["owner"], fields["name"], fields["branch"], len(group)
+                    )
+                    continue
+                target = GitHubTarget(token=token, **fields)
+                job_id = journal.start_job(target, [(row["filename"], row["content"]) for row in group], single_commit=True)
+                conn.executemany(
+                    "UPDATE scheduled_posts SET state = 'released', job_id = ?, content = NULL WHERE id = ?",
+                    [(job_id, row["id"]) for row in group]
+                )
+                jobs.append((job_id, target))
+        return jobs
+    
+    @staticmethod
+    def _entry_dict(row):
+        entry = dict(row)
+        entry["target"] = json.loads(entry["target"])
+        return entry
+
+class ScheduleRunner:
+    """Releases due posts from a ScheduleQueue at every window boundary and hands the jobs to submit.
+    
+    submit receives the list of (job id, target) pairs of one release. Call run() to block
+    the current thread, or start() to run on a daemon thread.
+    """
+    
+    def __init__(self, queue, journal, submit, token_for, window=DEFAULT_WINDOW):
+        self.queue = queue
+        self.journal = journal
+        self.submit = submit
+        self.token_for = token_for
+        self.window = window
+        self._wake = threading.Event()
+        self._stopped = False
+        self._thread = None
+    
+    def release_now(self, now=None):
+        """Release whatever is due and submit it; return the submitted jobs."""
+        jobs = self.queue.release(self.journal, self.token_for, now)
+        if jobs:
+            self.submit(jobs)
+        return jobs
+    
+    def _delay(self):
+        publish_at = self.queue.next_publish_time()
+        if publish_at is None:
+            return POLL_INTERVAL
+        delay = (release_time(publish_at, self.window) - datetime.datetime.now()).total_seconds()
+        # Posts still waiting past their release lack a token; look again later rather than spin
+        return min(delay, POLL_INTERVAL) if delay > 0 else POLL_INTERVAL
+    
+    def wake(self):
+        """Recompute the next release time, e.g. after the queue was edited."""
+        self._wake.set()
+    
+    def run(self):
+        while not self._stopped:
+            try:
+                # Posts due later in the current window wait for its end and go out together
+                self.release_now(window_start(datetime.datetime.now(), self.window))
+                delay = self._delay()
+            except Exception:
+                logger.exception("Releasing scheduled posts failed")
+                delay = POLL_INTERVAL
+            self._wake.wait(delay)
+            self._wake.clear()
+    
+    def start(self):
+        self._thread = threading.Thread(target=self.run, name="bulkpost-schedule-runner", daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        self._stopped = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
@@ -0,0 +1,124 @@
+"""Content-addressed store that keeps post bodies and assets on disk instead of in memory.
+
+Entries aren't tied to the session or run that stored them. Storing or reading an entry
+marks it as used, and prune() removes whatever hasn't been used for a while; the app prunes
+when it starts and 'bulkpost prune' does it on demand.
+"""
+
+import hashlib
+import mmap
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from bulkpost.config import data_dir
+
+# Read size used when streaming binary entries into the store
+CHUNK_SIZE = 1024 * 1024
+
+# Seconds an entry may go unused before prune() removes it
+DEFAULT_MAX_AGE = 30 * 24 * 3600
+
+class ContentStore:
+    """Files named by the SHA-256 of their bytes, so identical content is stored once."""
+    
+    def __init__(self, root=None):
+        self.root = Path(root or data_dir() / "content")
+        self.root.mkdir(parents=True, exist_ok=True)
+    
+    def path(self, key):
+        return self.root / key[:2] / key
+    
+    def _touch(self, key):
+        try:
+            os.utime(self.path(key))
+        except FileNotFoundError:
+            pass
+    
+    def _commit(self, temp_path, key):
+        path = self.path(key)
+        if path.exists():
+            os.unlink(temp_path)
+            self._touch(key)
+        else:
+            path.parent.mkdir(exist_ok=True)
+            # Atomic rename: readers never see a partially written entry
+            os.replace(temp_path, path)
+        return path
+    
+    def put(self, text):
+        """Store text and return its key."""
+        return self.put_bytes(text.encode("utf-8"))
+    
+    def put_bytes(self, data):
+        """Store bytes and return their key."""
+        key = hashlib.sha256(data).hexdigest()
+        if self.path(key).exists():
+            self._touch(key)
+        else:
+            fd, temp_path = tempfile.mkstemp(dir=self.root)
+            with os.fdopen(fd, "wb") as handle:
+                handle.write(data)
+            self._commit(temp_path, key)
+        return key
+    
+    def put_stream(self, stream):
+        """Copy a binary stream into the store chunk by chunk and return its key."""
+        digest = hashlib.sha256()
+        fd, temp_path = tempfile.mkstemp(dir=self.root)
+        with os.fdopen(fd, "wb") as handle:
+            for chunk in iter(lambda: stream.read(CHUNK_SIZE), b""):
+                digest.update(chunk)
+                handle.write(chunk)
+        key = digest.hexdigest()
+        self._commit(temp_path, key)
+        return key
+    
+    @contextmanager
+    def mapped(self, key):
+        """Map the bytes stored under key read-only; pages are read from disk only as they are touched."""
+        self._touch(key)
+        with open(self.path(key), "rb") as handle:
+            if os.fstat(handle.fileno()).st_size == 0:
+                # mmap refuses empty files
+                yield b""
+                return
+            with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapping:
+                yield mapping
+    
+    def read_bytes(self, key):
+        """Return the bytes stored under key."""
+        self._touch(key)
+        return self.path(key).read_bytes()
+    
+    def get(self, key):
+        """Return the text stored under key."""
+        with self.mapped(key) as mapping:
+            return str(mapping, "utf-8")
+    
+    def preview(self, key, chars):
+        """Return roughly the first chars characters stored under key, reading no more than needed."""
+        with self.mapped(key) as mapping:
+            # A UTF-8 character takes at most four bytes; a sequence cut at the end is dropped
+            return mapping[:chars * 4].decode("utf-8", errors="ignore")[:chars]
+    
+    def prune(self, max_age=DEFAULT_MAX_AGE):
+        """Remove entries, and temporary files of interrupted writes, unused for max_age seconds.
+        
+        Returns (entries removed, bytes freed).
+        """
+        cutoff = time.time() - max_age
+        removed = freed = 0
+        for path in [*self.root.glob("*/*"), *self.root.glob("tmp*")]:
+            try:
+                stat = path.stat()
+                if not path.is_file() or stat.st_mtime >= cutoff:
+                    continue
+                path.unlink()
+            except FileNotFoundError:
+                continue
+            removed += 1
+            freed += stat.st_size
+        return removed, freed
@@ -0,0 +1,107 @@
+"""Watch a posts directory and hand over changed files in debounced, periodic batches."""
+
+import os
+import threading
+import time
+from pathlib import Path
+
+# Seconds without further events before a burst of saves counts as finished
+DEFAULT_DEBOUNCE = 5.0
+
+# Minimum seconds between two publish rounds
+DEFAULT_INTERVAL = 60.0
+
+class FolderWatcher:
+    """Collects paths changed under a directory and releases them as coalesced batches.
+    
+    A batch is released once the directory has been quiet for debounce seconds and at
+    least interval seconds have passed since the previous batch. Continuous editing can't
+    hold changes back forever: after interval seconds of pending changes the batch goes
+    out even without a quiet period. Deleted files are dropped from the pending set.
+    """
+    
+    def __init__(self, directory, suffixes, debounce=DEFAULT_DEBOUNCE, interval=DEFAULT_INTERVAL):
+        self.directory = Path(directory).resolve()
+        self.suffixes = tuple(suffix.lower() for suffix in suffixes)
+        self.debounce = debounce
+        self.interval = interval
+        self._lock = threading.Condition()
+        self._pending = set()
+        self._first_change = None
+        self._last_change = None
+        self._last_batch = 0.0
+        self._stopped = False
+        self._observer = None
+    
+    def _matches(self, path):
+        name = os.path.basename(path)
+        return name.lower().endswith(self.suffixes) and not name.startswith('.')
+    
+    def mark(self, path):
+        """Record a path as changed; paths outside the watched suffixes are ignored."""
+        if not self._matches(path):
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._pending.add(Path(path).resolve())
+            self._first_change = self._first_change or now
+            self._last_change = now
+            self._lock.notify_all()
+    
+    def scan(self):
+        """Mark every existing file, so the first batch brings the remote side up to date."""
+        for path in self.directory.rglob('*'):
+            if path.is_file():
+                self.mark(path)
+    
+    def start(self):
+        from watchdog.events import FileSystemEventHandler
+        from watchdog.observers import Observer
+        
+        watcher = self
+        
+        class Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                if event.is_directory or event.event_type not in ('created', 'modified', 'moved', 'closed'):
+                    return
+                # Editors often save through a temporary file that is renamed over the post
+                watcher.mark(getattr(event, 'dest_path', None) or event.src_path)
+        
+        self._observer = Observer()
+        self._observer.schedule(Handler(), str(self.directory), recursive=True)
+        self._observer.start()
+    
+    def stop(self):
+        with self._lock:
+            self._stopped = True
+            self._lock.notify_all()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+    
+    def _wait_time(self, now):
+        """Seconds until the pending batch may be released; 0 when it is due."""
+        quiet_at = self._last_change + self.debounce
+        overdue_at = self._first_change + max(self.interval, self.debounce)
+        due_at = max(min(quiet_at, overdue_at), self._last_batch + self.interval)
+        return max(0.0, due_at - now)
+    
+    def next_batch(self):
+        """Block until a batch is due and return its changed paths that still exist, or None once stopped."""
+        with self._lock:
+            while True:
+                if self._stopped:
+                    return None
+                if not self._pending:
+                    self._lock.wait()
+                    continue
+                delay = self._wait_time(time.monotonic())
+                if delay > 0:
+                    self._lock.wait(delay)
+                    continue
+                batch = {path for path in self._pending if path.is_file()}
+                self._pending.clear()
+                self._first_change = self._last_change = None
+                self._last_batch = time.monotonic()
+                if batch:
+                    return batch
@@ -0,0 +1,91 @@
+"""Background upload worker that runs journaled jobs outside the caller's thread."""
+
+import logging
+import queue
+import threading
+
+from bulkpost.journal import run_jobs
+
+logger = logging.getLogger(__name__)
+
+class UploadWorker:
+    """Runs submitted upload jobs on a daemon thread and tracks their progress.
+    
+    Submissions run one at a time and in order, so that batches aimed at the same branch
+    never race each other; the jobs of one fan-out submission, which target different
+    repositories or branches, run concurrently. Callers poll status() instead of blocking.
+    """
+    
+    def __init__(self, journal, history=None, metrics=None):
+        self.journal = journal
+        self.history = history
+        self.metrics = metrics
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._status = {}
+        self._thread = threading.Thread(target=self._run, name="bulkpost-upload-worker", daemon=True)
+        self._thread.start()
+    
+    def submit(self, job_id, target, concurrency=None):
+        """Queue a journaled job for upload; submitting a job that is already queued or running is a no-op."""
+        self.submit_many([(job_id, target)], concurrency)
+    
+    def submit_many(self, jobs, concurrency=None):
+        """Queue (job id, target) pairs to run together, sharing concurrency and rate-limit budget."""
+        with self._lock:
+            jobs = [
+                (job_id, target) for job_id, target in jobs
+                if self._status.get(job_id, {}).get("state") not in ("queued", "running")
+            ]
+            for job_id, _target in jobs:
+                self._status[job_id] = {"state": "queued", "progress": 0.0, "results": None, "error": None}
+        if jobs:
+            self._queue.put((jobs, concurrency))
+    
+    def status(self, job_id):
+        """Return a snapshot of a job's state, progress, results and error, or None if it is unknown."""
+        with self._lock:
+            status = self._status.get(job_id)
+            return dict(status) if status is not None else None
+    
+    def is_active(self, job_id):
+        status = self.status(job_id)
+        return status is not None and status["state"] in ("queued", "running")
+    
+    def forget(self, job_id):
+        """Drop the tracked status of a finished job."""
+        with self._lock:
+            if self._status.get(job_id, {}).get("state") in ("done", "failed"):
+                del self._status[job_id]
+    
+    def _update(self, job_id, **changes):
+        with self._lock:
+            self._status[job_id].update(changes)
+    
+    def _run(self):
+        while True:
+            jobs, concurrency = self._queue.get()
+            for job_id, _target in jobs:
+                self._update(job_id, state="running")
+            try:
+                outcomes = run_jobs(
+                    self.journal,
+                    jobs,
+                    progress=lambda job_id, fraction: self._update(job_id, progress=fraction),
+                    concurrency=concurrency,
+                    metrics=self.metrics
+                )
+                for job_id, (results, error) in outcomes.items():
+                    if error is not None:
+                        logger.error("Upload job %s failed: %s", job_id, error)
+                        self._update(job_id, state="failed", error=error)
+                        continue
+                    if self.history is not None and results:
+                        self.history.add(results, job_id=job_id)
+                    self._update(job_id, state="done", progress=1.0, results=results)
+            except Exception as e:
+                logger.exception("Upload jobs %s failed", ", ".join(job_id for job_id, _target in jobs))
+                for job_id, _target in jobs:
+                    self._update(job_id, state="failed", error=str(e))
+            finally:
+                self._queue.task_done()
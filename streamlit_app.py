@@ -1,17 +1,45 @@
 import streamlit as st
 import os
-import re
 import pandas as pd
 import datetime
 import time
-import frontmatter
-import yaml
-import io
-from pathlib import Path
-from github import Github, GithubException, Auth
-from github.InputFileContent import InputFileContent
+from github import GithubException
 from dotenv import load_dotenv
 
+from bulkpost import (
+    DEFAULT_UPLOAD_CONCURRENCY,
+    GitHubTarget,
+    UploadMetrics,
+    format_filename,
+    parse_posts,
+    render_post,
+    validate_filename,
+)
+from bulkpost.history import UploadHistory
+from bulkpost.dedupe import DuplicateIndex, fingerprint, sync_remote_posts
+from bulkpost.github_upload import forget_client, repo_path, shared_blob_paths
+from bulkpost.images import IMAGE_DIR, ImagePipeline, ImageSettings, is_image
+from bulkpost.ingest import import_branch_posts, ingest_archive, is_archive
+from bulkpost.journal import UploadJournal
+from bulkpost.metrics import PHASES
+from bulkpost.preflight import HttpLinkChecker, preflight
+from bulkpost.rules import (
+    RegenerateSlugs,
+    RegexMap,
+    SetField,
+    StaggerDates,
+    ValueMap,
+    apply_diff,
+    apply_rules,
+    diff,
+    metadata_frame,
+    pattern_error,
+)
+from bulkpost.schedule import ScheduleQueue, ScheduleRunner, release_time, split_scheduled
+from bulkpost.store import ContentStore
+from bulkpost.worker import UploadWorker
+from bulkpost.posts import git_blob_sha, upload_metadata
+
 # Load environment variables if .env file exists
 load_dotenv()
 
@@ -30,6 +58,7 @@ ACCENT_COLOR = "#8B5CF6"  # Purple
 SUCCESS_COLOR = "#10B981"  # Green
 WARNING_COLOR = "#F59E0B"  # Amber
 ERROR_COLOR = "#EF4444"  # Red
+MUTED_COLOR = "#6B7280"  # Gray
 
 # Apply custom CSS
 st.markdown(
@@ -60,6 +89,10 @@ st.markdown(
         color: {WARNING_COLOR};
         font-weight: 500;
     }}
+    .muted-message {{
+        color: {MUTED_COLOR};
+        font-weight: 500;
+    }}
     .error-message {{
         color: {ERROR_COLOR};
         font-weight: 500;
@@ -126,11 +159,36 @@ st.markdown(
     unsafe_allow_html=True,
 )
 
+# CSS class used for each successful upload status; anything else is styled as an error
+STATUS_CLASSES = {'created': 'success-message', 'updated': 'warning-message', 'unchanged': 'muted-message'}
+
+# Editable columns of the metadata grid and its page sizes
+GRID_COLUMNS = ['title', 'date', 'categories', 'tags', 'description', 'image', 'layout']
+GRID_PAGE_SIZES = [25, 50, 100]
+
+# Archive extensions accepted by the uploader (.tar.gz and friends are matched on their last suffix)
+ARCHIVE_UPLOAD_TYPES = ["zip", "tar", "gz", "tgz", "bz2", "tbz2", "xz", "txz"]
+
+# Image files accepted next to posts, matched to references by filename
+IMAGE_UPLOAD_TYPES = ["jpg", "jpeg", "png", "gif", "webp", "svg"]
+
+# Characters of a post body shown before the full body is requested
+PREVIEW_CHARS = 2000
+
 # Initialize session state variables
-if 'uploaded_files' not in st.session_state:
-    st.session_state.uploaded_files = []
-if 'file_contents' not in st.session_state:
-    st.session_state.file_contents = {}
+# Post bodies live in the content store; sessions only keep their keys, so memory doesn't grow with the batch
+if 'file_body_keys' not in st.session_state:
+    st.session_state.file_body_keys = {}
+if 'file_sources' not in st.session_state:
+    st.session_state.file_sources = {}
+# Each post's original frontmatter, so unedited posts are published exactly as they were read
+if 'file_frontmatter' not in st.session_state:
+    st.session_state.file_frontmatter = {}
+# Uploader file id -> post filenames read from that archive
+if 'archive_posts' not in st.session_state:
+    st.session_state.archive_posts = {}
+if 'archive_assets' not in st.session_state:
+    st.session_state.archive_assets = {}
 if 'file_metadata' not in st.session_state:
     st.session_state.file_metadata = {}
 if 'github_token' not in st.session_state:
@@ -141,349 +199,1028 @@ if 'repo_name' not in st.session_state:
     st.session_state.repo_name = "HOMEDECOR2"
 if 'branch' not in st.session_state:
     st.session_state.branch = "main"
-if 'upload_history' not in st.session_state:
-    st.session_state.upload_history = []
 if 'current_tab' not in st.session_state:
     st.session_state.current_tab = 0
+if 'single_commit' not in st.session_state:
+    st.session_state.single_commit = True
+if 'image_pipeline' not in st.session_state:
+    st.session_state.image_pipeline = True
+if 'image_max_width' not in st.session_state:
+    st.session_state.image_max_width = ImageSettings.max_width
+if 'image_quality' not in st.session_state:
+    st.session_state.image_quality = ImageSettings.quality
+# Further repositories or branches every batch is also published to, with the same token
+if 'mirror_targets' not in st.session_state:
+    st.session_state.mirror_targets = []
+if 'hold_future' not in st.session_state:
+    st.session_state.hold_future = True
+if 'schedule_version' not in st.session_state:
+    st.session_state.schedule_version = 0
+if 'upload_concurrency' not in st.session_state:
+    st.session_state.upload_concurrency = DEFAULT_UPLOAD_CONCURRENCY
+if 'active_jobs' not in st.session_state:
+    st.session_state.active_jobs = []
+if 'grid_version' not in st.session_state:
+    st.session_state.grid_version = 0
+# Body fingerprints of uploaded posts and, once compared, of the published _posts/
+if 'duplicate_index' not in st.session_state:
+    st.session_state.duplicate_index = DuplicateIndex()
+if 'remote_posts_compared' not in st.session_state:
+    st.session_state.remote_posts_compared = None
+# Imported filename -> (published blob SHA, blob SHA of its render at import time)
+if 'imported_posts' not in st.session_state:
+    st.session_state.imported_posts = {}
+# (target label, post count, time) of the last import
+if 'imported_from' not in st.session_state:
+    st.session_state.imported_from = None
+if 'check_links' not in st.session_state:
+    st.session_state.check_links = False
+# Issues of the last pre-flight run, as a DataFrame
+if 'preflight_issues' not in st.session_state:
+    st.session_state.preflight_issues = None
 
-def parse_markdown_file(content, filename):
-    """Parse a markdown file with frontmatter."""
-    try:
-        # Split content into frontmatter and body
-        parts = content.split('---', 2)
-        if len(parts) >= 3:
-            # Extract frontmatter and content
-            frontmatter_content = parts[1].strip()
-            body_content = parts[2].strip()
-            
-            # Parse frontmatter
-            metadata = yaml.safe_load(frontmatter_content)
-            if metadata is None:
-                metadata = {}
-        else:
-            # No valid frontmatter found
-            metadata = {}
-            body_content = content.strip()
-        
-        # Ensure required fields exist with proper formatting
-        if 'title' not in metadata:
-            metadata['title'] = Path(filename).stem.replace('-', ' ').title()
-        
-        if 'date' not in metadata:
-            metadata['date'] = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        
-        if 'categories' not in metadata:
-            metadata['categories'] = []
-        elif isinstance(metadata['categories'], str):
-            metadata['categories'] = [metadata['categories']]
-        
-        if 'tags' not in metadata:
-            metadata['tags'] = []
-        elif isinstance(metadata['tags'], str):
-            metadata['tags'] = [metadata['tags']]
-        
-        if 'description' not in metadata:
-            metadata['description'] = ''
-        
-        if 'image' not in metadata:
-            metadata['image'] = ''
-        
-        if 'layout' not in metadata:
-            metadata['layout'] = 'post'
-            
-        return metadata, body_content
-    except Exception as e:
-        st.error(f"Error parsing {filename}: {str(e)}")
-        return {
-            'title': Path(filename).stem.replace('-', ' ').title(),
-            'date': datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-            'categories': [],
-            'tags': [],
-            'description': '',
-            'image': '',
-            'layout': 'post'
-        }, content
-
-def validate_filename(filename):
-    """Validate filename format for Jekyll posts."""
-    pattern = r'^\d{4}-\d{2}-\d{2}-[a-zA-Z0-9-]+\.md$'
-    return bool(re.match(pattern, filename))
-
-def format_filename(title, date=None):
-    """Format title into a valid Jekyll post filename."""
-    if date is None:
-        date = datetime.datetime.now().strftime('%Y-%m-%d')
-    
-    # Convert title to lowercase, replace spaces with hyphens
-    slug = title.lower().replace(' ', '-')
+@st.cache_resource
+def get_content_store():
+    """Open the on-disk content store once per server process, dropping entries no one has used in a while."""
+    store = ContentStore()
+    store.prune()
+    return store
+
+def post_body(filename):
+    """Read a post body back from the content store."""
+    return get_content_store().get(st.session_state.file_body_keys[filename])
+
+def post_preview(filename):
+    """Read only the start of a post body from the content store."""
+    return get_content_store().preview(st.session_state.file_body_keys[filename], PREVIEW_CHARS)
+
+def ingest_uploads(uploaded_files):
+    """Parse newly uploaded posts and archives, returning the post filenames of the current upload."""
+    # Process newly uploaded files in one batch so large uploads can be parsed in parallel
+    new_files = [
+        (uploaded_file.read().decode("utf-8"), uploaded_file.name)
+        for uploaded_file in uploaded_files
+        if not is_archive(uploaded_file.name)
+        and not is_image(uploaded_file.name)
+        # An uploaded file replaces the imported copy of a published post
+        and (uploaded_file.name not in st.session_state.file_body_keys or uploaded_file.name in st.session_state.imported_posts)
+    ]
+    with get_metrics().span("parse", items=len(new_files)):
+        parsed_files = parse_posts(new_files, on_error=st.error)
+    for (_file_content, filename), (metadata, content, frontmatter) in zip(new_files, parsed_files):
+        st.session_state.imported_posts.pop(filename, None)
+        st.session_state.file_metadata[filename] = metadata
+        st.session_state.file_body_keys[filename] = get_content_store().put(content)
+        st.session_state.file_frontmatter[filename] = frontmatter
+        st.session_state.duplicate_index.add(filename, fingerprint(content))
     
-    # Remove special characters
-    slug = re.sub(r'[^a-z0-9-]', '', slug)
+    filenames = []
+    for uploaded_file in uploaded_files:
+        if is_image(uploaded_file.name):
+            # Loose images are matched to post references by filename
+            if uploaded_file.name not in st.session_state.archive_assets:
+                st.session_state.archive_assets[uploaded_file.name] = get_content_store().put_bytes(uploaded_file.getvalue())
+            continue
+        if not is_archive(uploaded_file.name):
+            filenames.append(uploaded_file.name)
+            continue
+        
+        # Every upload gets its own file id, so a different archive with the same name and size is read too
+        archive_key = uploaded_file.file_id
+        if archive_key not in st.session_state.archive_posts:
+            # Entries are parsed one at a time and only metadata stays in session state
+            with st.spinner(f"Reading {uploaded_file.name}..."):
+                start = time.perf_counter()
+                contents = ingest_archive(uploaded_file, uploaded_file.name, get_content_store(), on_error=st.error)
+                get_metrics().observe("parse", time.perf_counter() - start, items=len(contents.posts))
+            for post in contents.posts:
+                st.session_state.imported_posts.pop(post.filename, None)
+                st.session_state.file_metadata[post.filename] = post.metadata
+                st.session_state.file_body_keys[post.filename] = post.body_key
+                st.session_state.file_sources[post.filename] = post.source_path
+                st.session_state.file_frontmatter[post.filename] = post.frontmatter
+                st.session_state.duplicate_index.add(post.filename, fingerprint(get_content_store().get(post.body_key)))
+            st.session_state.archive_posts[archive_key] = [post.filename for post in contents.posts]
+            st.session_state.archive_assets.update(contents.assets)
+        filenames.extend(st.session_state.archive_posts[archive_key])
     
-    # Remove multiple consecutive hyphens
-    slug = re.sub(r'-+', '-', slug)
+    # A post present both loose and inside an archive is only listed once
+    return list(dict.fromkeys(filenames))
+
+def import_published_posts():
+    """Pull every post of the target branch into the review pipeline with one archive download."""
+    target = github_target()
+    try:
+        with st.spinner(f"Importing posts from {target.label}..."):
+            start = time.perf_counter()
+            contents = import_branch_posts(target, get_content_store(), on_error=st.error)
+            get_metrics().observe("parse", time.perf_counter() - start, items=len(contents.posts))
+    except Exception as e:
+        st.warning(f"Could not import published posts: {str(e)}")
+        return
     
-    # Ensure the slug doesn't start or end with a hyphen
-    slug = slug.strip('-')
+    imported = {}
+    for post in contents.posts:
+        body = get_content_store().get(post.body_key)
+        st.session_state.file_metadata[post.filename] = post.metadata
+        st.session_state.file_body_keys[post.filename] = post.body_key
+        st.session_state.file_sources[post.filename] = post.source_path
+        st.session_state.file_frontmatter[post.filename] = post.frontmatter
+        st.session_state.duplicate_index.add(post.filename, fingerprint(body))
+        # Posts without frontmatter gain it when rendered, so the render at import counts as unchanged too
+        imported[post.filename] = (post.blob_sha, git_blob_sha(render_post(post.metadata, body, post.frontmatter)))
+        for column in GRID_COLUMNS:
+            # A re-import replaces any edits, so drop the per-file editor widgets holding them
+            st.session_state.pop(f"{column}_{post.filename}", None)
+    st.session_state.imported_posts = imported
+    st.session_state.imported_from = (target.label, len(imported), datetime.datetime.now().strftime('%H:%M:%S'))
+    st.session_state.grid_version += 1
+
+def image_pipeline(targets):
+    """Build the image pipeline for an upload from the settings tab and the images already in every target repository."""
+    settings = ImageSettings(
+        max_width=st.session_state.image_max_width,
+        quality=st.session_state.image_quality,
+        enabled=st.session_state.image_pipeline
+    )
+    remote_images = None
+    # Listed even without uploaded images: pre-flight checks references against them
+    if settings.enabled and st.session_state.github_token:
+        try:
+            # Posts are rendered once for all targets, so only images every target has can be reused
+            remote_images = shared_blob_paths(targets, IMAGE_DIR)
+        except Exception as e:
+            st.warning(f"Could not list existing images, so they won't be deduplicated against the repository: {str(e)}")
+    return ImagePipeline(get_content_store(), st.session_state.archive_assets, settings, remote_images)
+
+def prepare_posts(filenames, images):
+    """Apply accepted filenames and image rewrites, returning (filename, upload filename, metadata, body) tuples."""
+    prepared = []
+    for filename in filenames:
+        # Use the suggested filename if one was accepted
+        upload_filename, metadata = upload_metadata(filename, st.session_state.file_metadata[filename])
+        with get_metrics().span("render", items=0):
+            # Local image references point at the published images in the uploaded copy only
+            metadata, body = images.rewrite(metadata, post_body(filename), st.session_state.file_sources.get(filename))
+        prepared.append((filename, upload_filename, metadata, body))
+    return prepared
+
+def target_files(target, image_files, posts_to_upload):
+    """Return the files one target gets out of a batch.
     
-    return f"{date}-{slug}.md"
+    The target posts were imported from is left the imported posts that still render as
+    they did on import, so re-publishing an import only touches the posts that were edited.
+    Other targets, mirrors included, get every post, since they may not have them.
+    """
+    imported = st.session_state.imported_posts
+    if not imported or st.session_state.imported_from[0] != target.label:
+        return image_files + posts_to_upload
+    return image_files + [
+        (filename, content) for filename, content in posts_to_upload
+        if git_blob_sha(content) not in imported.get(filename, ())
+    ]
+
+@st.cache_resource
+def get_link_checker():
+    """Share one link checker per server process, so its answers are reused across sessions."""
+    return HttpLinkChecker()
+
+def run_preflight(prepared, images):
+    """Check prepared posts, keep the report for the Step 3 table and return it."""
+    with get_metrics().span("preflight", items=len(prepared)):
+        report = preflight(
+            prepared,
+            known_paths=images.site_paths() if images.settings.enabled else None,
+            link_checker=get_link_checker() if st.session_state.check_links else None,
+            frontmatter=st.session_state.file_frontmatter
+        )
+    st.session_state.preflight_issues = report.to_frame()
+    return report
 
-def update_file_content(index):
+def render_preflight_report():
+    """Show the issues of the last pre-flight run as one sortable table."""
+    issues = st.session_state.preflight_issues
+    if issues is None:
+        return
+    if issues.empty:
+        st.success("Pre-flight checks passed without issues.")
+        return
+    errors = int((issues['severity'] == 'error').sum())
+    blocked = issues.loc[issues['severity'] == 'error', 'key'].nunique()
+    st.caption(
+        f"{errors} error(s) and {len(issues) - errors} warning(s); "
+        f"{blocked} post(s) with errors will be left out of the upload."
+    )
+    st.dataframe(
+        issues.drop(columns=['key']),
+        hide_index=True,
+        column_config={
+            'filename': st.column_config.TextColumn("File"),
+            'severity': st.column_config.TextColumn("Severity"),
+            'check': st.column_config.TextColumn("Check"),
+            'message': st.column_config.TextColumn("Issue", width="large"),
+        }
+    )
+
+def update_file_content(filename):
     """Update file content with edited metadata."""
-    if index >= len(st.session_state.uploaded_files):
+    if filename not in st.session_state.file_metadata:
         return
     
-    filename = st.session_state.uploaded_files[index].name
     metadata = st.session_state.file_metadata[filename]
-    content = st.session_state.file_contents[filename]
+    content = post_body(filename)
     
     # Create frontmatter
-    frontmatter_content = yaml.dump(metadata, default_flow_style=False, allow_unicode=True)
-    updated_content = f"---\n{frontmatter_content}---\n\n{content}"
-    
-    st.session_state.file_contents[filename] = content
+    updated_content = render_post(metadata, content, st.session_state.file_frontmatter.get(filename))
     
     return updated_content
 
-def upload_to_github(files_to_upload, progress_bar):
-    """Upload files to GitHub repository."""
-    try:
-        # Create a Github instance with the provided token
-        auth = Auth.Token(st.session_state.github_token)
-        g = Github(auth=auth)
+def github_target():
+    """Build the publishing target from the GitHub Settings tab."""
+    return GitHubTarget(
+        token=st.session_state.github_token,
+        owner=st.session_state.repo_owner,
+        name=st.session_state.repo_name,
+        branch=st.session_state.branch
+    )
+
+def github_targets():
+    """The main target followed by the mirror targets, skipping incomplete mirror rows and duplicates."""
+    targets = [github_target()]
+    for mirror in st.session_state.mirror_targets:
+        owner = (mirror.get('owner') or '').strip()
+        name = (mirror.get('name') or '').strip()
+        if not owner or not name:
+            continue
+        target = GitHubTarget(
+            token=st.session_state.github_token,
+            owner=owner,
+            name=name,
+            branch=(mirror.get('branch') or '').strip() or st.session_state.branch
+        )
+        if target not in targets:
+            targets.append(target)
+    return targets
+
+@st.cache_resource
+def get_metrics():
+    """Collect timings and API counters for every upload in this server process."""
+    return UploadMetrics()
+
+def forget_published_posts():
+    """Drop published posts from the duplicate index once they may belong to another repository or branch."""
+    index = st.session_state.duplicate_index
+    for key in index.keys():
+        if key.startswith('_posts/'):
+            index.remove(key)
+    st.session_state.remote_posts_compared = None
+
+def update_github_setting(name):
+    """Store an edited connection setting and drop state built from the old settings."""
+    # The cached client is keyed by token and repository, so a branch change can keep it
+    if name != 'branch':
+        for target in github_targets():
+            forget_client(target)
+    forget_published_posts()
+    st.session_state[name] = st.session_state[f"{name}_input"]
+
+@st.cache_resource
+def get_journal():
+    """Open the on-disk upload journal once per server process."""
+    return UploadJournal()
+
+@st.cache_resource
+def get_history():
+    """Open the on-disk upload history once per server process."""
+    return UploadHistory()
+
+def _styled_history(history_df):
+    """Add HTML link and status columns to a page of history with vectorized string operations."""
+    urls = history_df['url'].fillna('')
+    history_df['view'] = ('<a href="' + urls + '" target="_blank">View on GitHub</a>').where(urls != '', '')
+    
+    status_classes = history_df['status'].map(STATUS_CLASSES).fillna('error-message')
+    history_df['styled_status'] = '<span class="' + status_classes + '">' + history_df['status'] + '</span>'
+    return history_df
+
+def render_results(results):
+    """Show per-file upload results."""
+    st.markdown("**Upload Results:**")
+    for result in results:
+        filename = result["filename"]
+        status = result["status"]
         
-        # Get the repository
-        repo = g.get_repo(f"{st.session_state.repo_owner}/{st.session_state.repo_name}")
+        if status == "created":
+            st.markdown(f"✅ <span class='success-message'>Created:</span> <span class='filename'>{filename}</span> - [View on GitHub]({result['url']})", unsafe_allow_html=True)
+        elif status == "updated":
+            st.markdown(f"🔄 <span class='warning-message'>Updated:</span> <span class='filename'>{filename}</span> - [View on GitHub]({result['url']})", unsafe_allow_html=True)
+        elif status == "unchanged":
+            st.markdown(f"➖ <span class='muted-message'>Unchanged:</span> <span class='filename'>{filename}</span> - [View on GitHub]({result['url']})", unsafe_allow_html=True)
+        elif status == "pending":
+            st.markdown(f"⏳ <span class='muted-message'>Pending:</span> <span class='filename'>{filename}</span> - not uploaded yet", unsafe_allow_html=True)
+        else:
+            st.markdown(f"❌ <span class='error-message'>Error:</span> <span class='filename'>{filename}</span> - {result.get('message', 'Unknown error')}", unsafe_allow_html=True)
+
+@st.cache_resource
+def get_worker():
+    """Start the background upload worker once per server process, outside the rerun cycle."""
+    return UploadWorker(get_journal(), get_history(), get_metrics())
+
+def submit_upload_job(job_id, target):
+    """Hand a journaled job to the background worker and track it in this session."""
+    submit_upload_jobs([(job_id, target)])
+
+def submit_upload_jobs(jobs):
+    """Hand journaled jobs for several targets to the worker to run together, under one concurrency limit."""
+    get_worker().submit_many(jobs, concurrency=st.session_state.upload_concurrency)
+    for job_id, _target in jobs:
+        if job_id not in st.session_state.active_jobs:
+            st.session_state.active_jobs.append(job_id)
+
+def _job_label(job_id):
+    job = get_journal().job(job_id)
+    if job is None:
+        return f"Job {job_id[:8]}"
+    target = job["target"]
+    return f"Job {job_id[:8]} → {target['owner']}/{target['name']}@{target['branch']}"
+
+def _render_job_panel():
+    """Show progress or results for every job this session submitted."""
+    worker = get_worker()
+    still_running = False
+    
+    for job_id in list(st.session_state.active_jobs):
+        status = worker.status(job_id)
+        if status is None:
+            # The server restarted since the job was submitted; the journal still knows the outcome
+            status = {"state": "done", "progress": 1.0, "results": get_journal().results(job_id), "error": None}
         
-        results = []
-        for i, (filename, content) in enumerate(files_to_upload):
-            try:
-                # Check if file already exists
-                try:
-                    contents = repo.get_contents(f"_posts/{filename}", ref=st.session_state.branch)
-                    # File exists, update it
-                    result = repo.update_file(
-                        path=f"_posts/{filename}",
-                        message=f"Update {filename} via Streamlit uploader",
-                        content=content,
-                        sha=contents.sha,
-                        branch=st.session_state.branch
-                    )
-                    file_url = f"https://github.com/{st.session_state.repo_owner}/{st.session_state.repo_name}/blob/{st.session_state.branch}/_posts/{filename}"
-                    results.append({"filename": filename, "status": "updated", "url": file_url})
-                    
-                except GithubException as e:
-                    if e.status == 404:
-                        # File doesn't exist, create it
-                        result = repo.create_file(
-                            path=f"_posts/{filename}",
-                            message=f"Add {filename} via Streamlit uploader",
-                            content=content,
-                            branch=st.session_state.branch
-                        )
-                        file_url = f"https://github.com/{st.session_state.repo_owner}/{st.session_state.repo_name}/blob/{st.session_state.branch}/_posts/{filename}"
-                        results.append({"filename": filename, "status": "created", "url": file_url})
-                    else:
-                        results.append({"filename": filename, "status": "error", "message": str(e)})
-            except Exception as e:
-                results.append({"filename": filename, "status": "error", "message": str(e)})
-            
-            # Update progress
-            progress_bar.progress((i + 1) / len(files_to_upload))
-            time.sleep(0.1)  # Small delay for visual effect
+        if status["state"] in ("queued", "running"):
+            still_running = True
+            label = "Waiting for the previous upload to finish..." if status["state"] == "queued" else "Uploading files to GitHub..."
+            st.progress(status["progress"], text=f"{_job_label(job_id)}: {label}")
+            continue
         
-        return results
+        with st.container(border=True):
+            st.markdown(f"**{_job_label(job_id)}**")
+            if status["state"] == "failed":
+                st.error(f"GitHub upload error: {status['error']}")
+            elif status["results"]:
+                render_results(status["results"])
+            else:
+                st.error("Upload failed. Please check your GitHub settings and try again.")
+            if st.button("Dismiss", key=f"dismiss_{job_id}"):
+                st.session_state.active_jobs.remove(job_id)
+                worker.forget(job_id)
+                st.rerun()
     
-    except Exception as e:
-        st.error(f"GitHub upload error: {str(e)}")
+    if not still_running and st.session_state.get("jobs_polling"):
+        # Everything finished: rerun the whole app once so polling stops and the history refreshes
+        st.session_state.jobs_polling = False
+        st.rerun()
+
+def render_active_jobs():
+    """Poll the background worker while this session has uploads in flight."""
+    if not st.session_state.active_jobs:
+        return
+    
+    st.markdown('<p class="section-header">Uploads</p>', unsafe_allow_html=True)
+    worker = get_worker()
+    polling = any(worker.is_active(job_id) for job_id in st.session_state.active_jobs)
+    st.session_state.jobs_polling = polling
+    # Only the fragment reruns while polling, so the rest of the page stays editable
+    st.fragment(_render_job_panel, run_every=1.0 if polling else None)()
+
+def render_incomplete_jobs():
+    """List interrupted or partly failed jobs from the journal with resume and discard actions."""
+    # Jobs the worker is still processing are not interrupted
+    jobs = [job for job in get_journal().incomplete_jobs() if not get_worker().is_active(job["id"])]
+    if not jobs:
+        return
+    
+    with st.expander(f"⏯️ {len(jobs)} interrupted upload(s) can be resumed"):
+        for job in jobs:
+            target = job["target"]
+            cols = st.columns([4, 1, 1])
+            with cols[0]:
+                st.markdown(
+                    f"<span class='filename'>{job['created_at']}</span> → "
+                    f"{target['owner']}/{target['name']}@{target['branch']}: "
+                    f"{job['outstanding']} of {job['total']} files outstanding ({job['state']})",
+                    unsafe_allow_html=True
+                )
+            with cols[1]:
+                resume = st.button("Resume", key=f"resume_{job['id']}", disabled=not st.session_state.github_token)
+            with cols[2]:
+                if st.button("Discard", key=f"discard_{job['id']}"):
+                    get_journal().discard(job["id"])
+                    st.rerun()
+            if resume:
+                submit_upload_job(
+                    job["id"],
+                    GitHubTarget(
+                        token=st.session_state.github_token,
+                        owner=target["owner"],
+                        name=target["name"],
+                        branch=target["branch"]
+                    )
+                )
+                st.rerun()
+
+@st.cache_resource
+def get_schedule_tokens():
+    """Tokens for releasing scheduled posts, by (API URL, owner, repository); kept in memory only, never in the queue."""
+    return {}
+
+def _schedule_token_key(api_url, owner, name):
+    return (api_url, owner.lower(), name.lower())
+
+def remember_schedule_token(target):
+    """Let the runner release posts for target's repository with the token they were scheduled with."""
+    get_schedule_tokens()[_schedule_token_key(target.api_url, target.owner, target.name)] = target.token
+
+@st.cache_resource
+def get_schedule_runner():
+    """Start releasing scheduled posts through the upload worker once per server process."""
+    tokens = get_schedule_tokens()
+    runner = ScheduleRunner(
+        ScheduleQueue(),
+        get_journal(),
+        submit=lambda jobs: get_worker().submit_many(jobs),
+        # Only a token given for the post's own repository releases it; never another one's
+        token_for=lambda fields: tokens.get(_schedule_token_key(fields["api_url"], fields["owner"], fields["name"]))
+    )
+    runner.start()
+    return runner
+
+def schedule_posts(targets, held):
+    """Queue future-dated posts for every target and make sure the runner can release them."""
+    runner = get_schedule_runner()
+    for target in targets:
+        remember_schedule_token(target)
+        for publish_at, files in held.items():
+            runner.queue.add(target, files, publish_at)
+    runner.wake()
+    st.session_state.schedule_version += 1
+
+def _apply_schedule_edits(editor_key, entry_ids):
+    """Write publish time edits and cancellations from the schedule table to the queue."""
+    runner = get_schedule_runner()
+    cancelled = []
+    for position, changes in st.session_state[editor_key]["edited_rows"].items():
+        entry_id = entry_ids[int(position)]
+        if changes.get('cancel'):
+            cancelled.append(entry_id)
+        elif changes.get('publish_at'):
+            runner.queue.reschedule(entry_id, pd.Timestamp(changes['publish_at']).to_pydatetime())
+    runner.queue.cancel(cancelled)
+    runner.wake()
+    st.session_state.schedule_version += 1
+
+def render_schedule_panel():
+    """List posts waiting for their publish time, with editable times and cancellation."""
+    runner = get_schedule_runner()
+    entries = runner.queue.entries()
+    if not entries:
+        st.info("No posts are waiting. Future-dated posts are queued here when 'Hold future-dated posts' is on.")
+        return
+    
+    next_publish = runner.queue.next_publish_time()
+    st.caption(
+        "This queue is shared by everyone using this server: every session sees it and can edit it. "
+        "Each post is released with the token last used to schedule or publish to its repository here; "
+        "after a restart, posts wait until a token for their repository is entered again."
+    )
+    st.caption(
+        f"{len(entries)} post(s) waiting. Posts due within the same {runner.window / 60:g}-minute window are "
+        f"published together in one commit per repository; the next release is at "
+        f"{release_time(next_publish, runner.window):%Y-%m-%d %H:%M:%S}."
+    )
+    schedule_df = pd.DataFrame({
+        'publish_at': pd.to_datetime([entry['publish_at'] for entry in entries]),
+        'target': [f"{entry['target']['owner']}/{entry['target']['name']}@{entry['target']['branch']}" for entry in entries],
+        'filename': [entry['filename'] for entry in entries],
+        'cancel': False,
+    })
+    editor_key = f"schedule_editor_{st.session_state.schedule_version}"
+    st.data_editor(
+        schedule_df,
+        hide_index=True,
+        key=editor_key,
+        on_change=_apply_schedule_edits,
+        args=(editor_key, [entry['id'] for entry in entries]),
+        disabled=['target', 'filename'],
+        column_config={
+            'publish_at': st.column_config.DatetimeColumn("Publish at", format="YYYY-MM-DD HH:mm:ss", required=True),
+            'target': st.column_config.TextColumn("Repository"),
+            'filename': st.column_config.TextColumn("File"),
+            'cancel': st.column_config.CheckboxColumn("Cancel", help="Remove the post from the queue"),
+        }
+    )
+    if st.button("Publish due posts now", disabled=not st.session_state.github_token):
+        for target in github_targets():
+            remember_schedule_token(target)
+        jobs = runner.release_now()
+        for job_id, _target in jobs:
+            if job_id not in st.session_state.active_jobs:
+                st.session_state.active_jobs.append(job_id)
+        st.session_state.schedule_version += 1
+        st.rerun()
+
+def render_metrics_panel():
+    """Show where upload time went, API usage and the remaining rate-limit budget, with exports."""
+    metrics = get_metrics()
+    snapshot = metrics.snapshot()
+    counters = snapshot["counters"]
+    rate_limit = snapshot["rate_limit"]
+    
+    cols = st.columns(5)
+    cols[0].metric("API calls", counters.get("api_calls", 0))
+    cols[1].metric("Retries", counters.get("retries", 0))
+    cols[2].metric("Rate limited", counters.get("rate_limited", 0))
+    cols[3].metric("Sent", f"{counters.get('bytes_sent', 0) / 1_000_000:.2f} MB")
+    if rate_limit["remaining"] is None:
+        cols[4].metric("Rate limit left", "unknown")
+    else:
+        reset = datetime.datetime.fromtimestamp(rate_limit["reset"]).strftime('%H:%M:%S')
+        cols[4].metric("Rate limit left", f"{rate_limit['remaining']}/{rate_limit['limit']}", help=f"Resets at {reset}")
+    
+    phases = snapshot["phases"]
+    if not phases:
+        st.info("No uploads measured yet in this server process.")
+    else:
+        ordered = [phase for phase in PHASES if phase in phases] + sorted(set(phases) - set(PHASES))
+        st.dataframe(
+            pd.DataFrame([
+                {
+                    "phase": phase,
+                    "spans": phases[phase]["count"],
+                    "files": phases[phase]["items"],
+                    "total (s)": round(phases[phase]["seconds"], 3),
+                    "p50 (ms)": round(phases[phase]["p50_seconds"] * 1000, 2),
+                    "p99 (ms)": round(phases[phase]["p99_seconds"] * 1000, 2),
+                }
+                for phase in ordered
+            ]),
+            hide_index=True
+        )
+    if counters.get("files"):
+        st.caption("Files by status: " + ", ".join(f"{status.split('=', 1)[1]}: {count}" for status, count in counters["files"].items()))
+    
+    export_cols = st.columns(3)
+    with export_cols[0]:
+        st.download_button("Export JSON", metrics.to_json(), file_name="bulkpost-metrics.json", mime="application/json")
+    with export_cols[1]:
+        st.download_button("Export Prometheus", metrics.to_prometheus(), file_name="bulkpost-metrics.prom", mime="text/plain")
+    with export_cols[2]:
+        if st.button("Reset Metrics"):
+            metrics.reset()
+            st.rerun()
+
+def editor_field(metadata, field, widget, label, key, default=''):
+    """Show one metadata field in a text widget and return the widget's text.
+    
+    Widgets only hold text, so the field is written back only once that text is changed;
+    an unedited post keeps its values, types included, and renders as it was read.
+    """
+    value = metadata.get(field, default)
+    if field in ('categories', 'tags'):
+        shown = ', '.join(str(item) for item in (value or []))
+    else:
+        shown = '' if value is None else str(value)
+    text = widget(label, shown, key=key)
+    if text != shown:
+        if field in ('categories', 'tags'):
+            metadata[field] = [item.strip() for item in text.split(',') if item.strip()]
+        else:
+            metadata[field] = text
+    return text
+
+def render_file_editor(filename):
+    """Render the full content preview and metadata editor for one file."""
+    cols = st.columns([3, 2])
+    
+    with cols[0]:
+        st.markdown(f"**Content Preview:**")
+        # Bodies are read from the store on demand and never kept in widget state
+        full_body = st.toggle("Show the whole post", key=f"full_preview_{filename}")
+        st.text_area(
+            "Content",
+            post_body(filename) if full_body else post_preview(filename),
+            height=200,
+            disabled=True
+        )
+    
+    with cols[1]:
+        st.markdown('<div class="metadata-editor">', unsafe_allow_html=True)
+        st.markdown(f"**Metadata Editor:**")
+        
+        metadata = st.session_state.file_metadata[filename]
+        
+        # Title
+        new_title = editor_field(metadata, 'title', st.text_input, "Title", key=f"title_{filename}")
+        
+        # Description
+        editor_field(metadata, 'description', st.text_area, "Description", key=f"description_{filename}")
+        
+        # Date
+        editor_field(metadata, 'date', st.text_input, "Date (YYYY-MM-DD HH:MM:SS)", key=f"date_{filename}")
+        
+        # Categories
+        editor_field(
+            metadata, 'categories', st.text_input, "Categories (comma separated)", key=f"categories_{filename}"
+        )
+        
+        # Tags
+        editor_field(metadata, 'tags', st.text_input, "Tags (comma separated)", key=f"tags_{filename}")
+        
+        # Image URL
+        editor_field(metadata, 'image', st.text_input, "Image URL", key=f"image_{filename}")
+        
+        # Layout
+        editor_field(metadata, 'layout', st.text_input, "Layout", key=f"layout_{filename}", default='post')
+        
+        # Validate filename
+        if not validate_filename(filename):
+            st.warning(f"Filename '{filename}' doesn't follow Jekyll post format (YYYY-MM-DD-title.md).")
+            suggested_filename = format_filename(new_title)
+            st.markdown(f"Suggested filename: <span class='filename'>{suggested_filename}</span>", unsafe_allow_html=True)
+            if st.button("Use suggested filename", key=f"rename_{filename}"):
+                # We'll handle the rename during upload
+                st.session_state.file_metadata[filename]['suggested_filename'] = suggested_filename
+                st.success(f"Will be uploaded as: {suggested_filename}")
+        
+        st.markdown('</div>', unsafe_allow_html=True)
+
+def duplicate_matches(filename, batch):
+    """Return the closest other posts of the batch or of the published _posts/ to a file's body."""
+    index = st.session_state.duplicate_index
+    own_fingerprint = index.get(filename)
+    if own_fingerprint is None:
         return []
+    upload_filename, _metadata = upload_metadata(filename, st.session_state.file_metadata[filename])
+    # The published copy of the same post is an update, not a duplicate
+    exclude = {filename, repo_path(filename), repo_path(upload_filename)}
+    return [
+        match for match in index.matches(own_fingerprint, limit=6, exclude=exclude)
+        if match.key in batch or match.key.startswith('_posts/')
+    ][:3]
+
+def _describe_matches(matches):
+    return ', '.join(
+        f"{match.key} ({'exact' if match.exact else f'{match.similarity:.0%}'})" for match in matches
+    )
+
+def compare_with_published_posts():
+    """Fingerprint the published posts into the duplicate index, fetching only blobs not seen before."""
+    target = github_target()
+    progress_bar = st.progress(0.0, text="Comparing with published posts...")
+    try:
+        sync_remote_posts(
+            st.session_state.duplicate_index,
+            target,
+            progress=lambda fraction: progress_bar.progress(min(fraction, 1.0), text="Comparing with published posts..."),
+            concurrency=st.session_state.upload_concurrency
+        )
+        published = sum(1 for key in st.session_state.duplicate_index.keys() if key.startswith('_posts/'))
+        st.session_state.remote_posts_compared = (
+            f"{target.full_name}@{target.branch}",
+            published,
+            datetime.datetime.now().strftime('%H:%M:%S'),
+        )
+    except Exception as e:
+        st.warning(f"Could not compare with published posts: {str(e)}")
+    finally:
+        progress_bar.empty()
+
+def _grid_rows(filenames, batch):
+    """Build the metadata grid rows for the given files only."""
+    rows = []
+    for filename in filenames:
+        metadata = st.session_state.file_metadata[filename]
+        rows.append({
+            'filename': filename,
+            'valid': validate_filename(filename),
+            'duplicates': _describe_matches(duplicate_matches(filename, batch)),
+            'title': metadata.get('title', ''),
+            'date': str(metadata.get('date', '')),
+            'categories': ', '.join(metadata.get('categories', [])),
+            'tags': ', '.join(metadata.get('tags', [])),
+            'description': metadata.get('description', ''),
+            'image': metadata.get('image', ''),
+            'layout': metadata.get('layout', 'post'),
+        })
+    return pd.DataFrame(rows, columns=['filename', 'valid', *GRID_COLUMNS, 'duplicates'])
+
+def _apply_grid_edits(grid_key, page_filenames):
+    """Write cell edits from the metadata grid back into the file metadata."""
+    edited_rows = st.session_state[grid_key]["edited_rows"]
+    for position, changes in edited_rows.items():
+        metadata = st.session_state.file_metadata[page_filenames[int(position)]]
+        for column, value in changes.items():
+            if column in ('categories', 'tags'):
+                metadata[column] = [item.strip() for item in (value or '').split(',') if item.strip()]
+            else:
+                metadata[column] = value if value is not None else ''
+            # Drop any stale per-file editor widget so it picks up the new value
+            st.session_state.pop(f"{column}_{page_filenames[int(position)]}", None)
+    # A fresh grid key makes the next run render the written-back values instead of replaying the edits
+    st.session_state.grid_version += 1
+
+def _filtered_filenames(filenames, query, only_invalid, only_duplicates, sort_by, descending):
+    """Filter and sort filenames by cheap metadata lookups, without building any widgets."""
+    query = query.strip().lower()
+    metadata = st.session_state.file_metadata
+    batch = set(filenames)
+    selected = [
+        filename for filename in filenames
+        if (not query or query in filename.lower() or query in str(metadata[filename].get('title', '')).lower())
+        and (not only_invalid or not validate_filename(filename))
+        and (not only_duplicates or duplicate_matches(filename, batch))
+    ]
+    if sort_by == 'filename':
+        selected.sort(reverse=descending)
+    else:
+        selected.sort(key=lambda filename: str(metadata[filename].get(sort_by, '')), reverse=descending)
+    return selected
+
+def _bulk_rules():
+    """Build the rule list from the bulk edit form, or None if a pattern doesn't compile."""
+    rules = []
+    invalid = False
+    for row in st.session_state.rules_tag_map.to_dict('records'):
+        if row.get('pattern'):
+            error = pattern_error(row['pattern'])
+            if error:
+                st.error(f"Invalid pattern {row['pattern']!r}: {error}")
+                invalid = True
+                continue
+            rules.append(RegexMap(row['pattern'], row.get('replacement') or '', row.get('field') or 'tags'))
+    if invalid:
+        return None
+    mapping = {
+        row['from']: row.get('to') or ''
+        for row in st.session_state.rules_category_map.to_dict('records')
+        if row.get('from')
+    }
+    if mapping:
+        rules.append(ValueMap(mapping))
+    if st.session_state.rules_layout.strip():
+        rules.append(SetField('layout', st.session_state.rules_layout.strip(), st.session_state.rules_layout_only_empty))
+    if st.session_state.rules_stagger:
+        rules.append(StaggerDates(
+            datetime.datetime.combine(st.session_state.rules_stagger_date, st.session_state.rules_stagger_time),
+            datetime.timedelta(hours=st.session_state.rules_stagger_hours),
+            st.session_state.rules_stagger_order
+        ))
+    if st.session_state.rules_slugs:
+        rules.append(RegenerateSlugs())
+    return rules
+
+def render_bulk_rules(filenames):
+    """Transform the metadata of the whole upload at once, with a preview of every changed value."""
+    with st.expander("🛠️ Bulk edit rules"):
+        st.markdown("**Tag and category patterns** (regular expressions; an empty replacement removes the value)")
+        st.session_state.rules_tag_map = st.data_editor(
+            pd.DataFrame(columns=['pattern', 'replacement', 'field']),
+            num_rows="dynamic",
+            hide_index=True,
+            key="rules_tag_map_input",
+            column_config={
+                'pattern': st.column_config.TextColumn("Pattern"),
+                'replacement': st.column_config.TextColumn("Replacement"),
+                'field': st.column_config.SelectboxColumn("Field", options=['tags', 'categories'], default='tags'),
+            }
+        )
+        st.markdown("**Category renames** (exact values; leave 'to' empty to remove the category)")
+        st.session_state.rules_category_map = st.data_editor(
+            pd.DataFrame(columns=['from', 'to']),
+            num_rows="dynamic",
+            hide_index=True,
+            key="rules_category_map_input",
+            column_config={
+                'from': st.column_config.TextColumn("From"),
+                'to': st.column_config.TextColumn("To"),
+            }
+        )
+        
+        layout_cols = st.columns([2, 1])
+        with layout_cols[0]:
+            st.text_input("Set layout", key="rules_layout", help="Leave empty to keep each post's layout")
+        with layout_cols[1]:
+            st.checkbox("Only where empty", key="rules_layout_only_empty")
+        
+        st.checkbox("Stagger dates", key="rules_stagger")
+        stagger_cols = st.columns(4)
+        with stagger_cols[0]:
+            st.date_input("First date", key="rules_stagger_date", disabled=not st.session_state.rules_stagger)
+        with stagger_cols[1]:
+            st.time_input("Time", value=datetime.time(9, 0), key="rules_stagger_time", disabled=not st.session_state.rules_stagger)
+        with stagger_cols[2]:
+            st.number_input("Hours apart", min_value=0.25, value=24.0, step=0.25, key="rules_stagger_hours", disabled=not st.session_state.rules_stagger)
+        with stagger_cols[3]:
+            st.selectbox("In order of", ['date', 'filename', 'title'], key="rules_stagger_order", disabled=not st.session_state.rules_stagger)
+        st.checkbox("Regenerate filenames from date and title", key="rules_slugs")
+        
+        if st.button("Preview changes"):
+            rules = _bulk_rules()
+            if rules is None:
+                st.session_state.rules_preview = None
+            else:
+                before = metadata_frame(st.session_state.file_metadata, filenames)
+                st.session_state.rules_preview = diff(before, apply_rules(before, rules))
+        
+        preview = st.session_state.get('rules_preview')
+        if preview is None:
+            return
+        if preview.empty:
+            st.info("The rules don't change any post.")
+            return
+        st.caption(f"{len(preview)} value(s) change in {preview['filename'].nunique()} post(s).")
+        st.dataframe(preview[['filename', 'field', 'before', 'after']], hide_index=True)
+        apply_cols = st.columns(2)
+        with apply_cols[0]:
+            if st.button("Apply changes", type="primary"):
+                apply_diff(st.session_state.file_metadata, preview)
+                for filename, field in zip(preview['filename'], preview['field']):
+                    # Drop any stale per-file editor widget so it picks up the new value
+                    st.session_state.pop(f"{field}_{filename}", None)
+                st.session_state.grid_version += 1
+                st.session_state.rules_preview = None
+                st.rerun()
+        with apply_cols[1]:
+            if st.button("Discard preview"):
+                st.session_state.rules_preview = None
+                st.rerun()
+
+def render_metadata_grid(filenames):
+    """Render one page of an editable metadata table, plus the full editor for a single file on demand."""
+    controls = st.columns([3, 2, 2, 1, 1, 1])
+    with controls[0]:
+        query = st.text_input("Filter by filename or title", key="grid_filter")
+    with controls[1]:
+        sort_by = st.selectbox("Sort by", ['filename', 'title', 'date', 'layout'], key="grid_sort")
+    with controls[2]:
+        page_size = st.selectbox("Rows per page", GRID_PAGE_SIZES, key="grid_page_size")
+    with controls[3]:
+        descending = st.checkbox("Descending", key="grid_descending")
+    with controls[4]:
+        only_invalid = st.checkbox("Invalid names", key="grid_only_invalid")
+    with controls[5]:
+        only_duplicates = st.checkbox("Duplicates", key="grid_only_duplicates", help="Only posts resembling another post")
+    
+    if st.session_state.github_token:
+        compare_cols = st.columns([1, 3])
+        with compare_cols[0]:
+            if st.button("Compare with published posts"):
+                compare_with_published_posts()
+        with compare_cols[1]:
+            if st.session_state.remote_posts_compared:
+                repository, published, compared_at = st.session_state.remote_posts_compared
+                st.caption(f"Duplicates also checked against {published} published posts in {repository} (as of {compared_at}).")
+    
+    selected = _filtered_filenames(filenames, query, only_invalid, only_duplicates, sort_by, descending)
+    page_count = max(1, -(-len(selected) // page_size))
+    if st.session_state.get("grid_page", 1) > page_count:
+        st.session_state.grid_page = page_count
+    page = st.number_input(f"Page (of {page_count})", min_value=1, max_value=page_count, key="grid_page")
+    page_filenames = selected[(page - 1) * page_size:page * page_size]
+    st.caption(f"Showing {len(page_filenames)} of {len(selected)} matching files ({len(filenames)} uploaded).")
+    
+    if page_filenames:
+        grid_key = f"metadata_grid_{st.session_state.grid_version}"
+        st.data_editor(
+            _grid_rows(page_filenames, set(filenames)),
+            key=grid_key,
+            on_change=_apply_grid_edits,
+            args=(grid_key, page_filenames),
+            hide_index=True,
+            disabled=['filename', 'valid', 'duplicates'],
+            column_config={
+                'valid': st.column_config.CheckboxColumn("Valid name", help="Follows YYYY-MM-DD-title.md"),
+                'duplicates': st.column_config.TextColumn(
+                    "Possible duplicates",
+                    help="Closest posts in this upload or already published, by body similarity",
+                    width="large"
+                ),
+                'description': st.column_config.TextColumn("description", width="large"),
+            }
+        )
+    
+    # Only the file picked here pays for the full set of preview and editor widgets
+    open_filename = st.selectbox(
+        "Open full editor",
+        [''] + page_filenames,
+        format_func=lambda filename: filename or "— select a file on this page —",
+        key="grid_open_file"
+    )
+    if open_filename:
+        with st.expander(f"📄 {open_filename}", expanded=True):
+            render_file_editor(open_filename)
 
 # Main layout
 def main():
     st.title("📝 Bulk Post Uploader for HOMEDECOR2")
     
-    tabs = st.tabs(["Upload Files", "GitHub Settings", "Upload History"])
+    tabs = st.tabs(["Upload Files", "GitHub Settings", "Upload History", "Metrics", "Schedule"])
     
     with tabs[0]:  # Upload Files tab
         st.markdown('<p class="section-header">Step 1: Upload Markdown Files</p>', unsafe_allow_html=True)
         
+        render_incomplete_jobs()
+        render_active_jobs()
+        
         uploaded_files = st.file_uploader(
-            "Upload your markdown (.md) files",
-            type=["md"],
+            "Upload your markdown (.md) files or archives of posts",
+            type=["md", *ARCHIVE_UPLOAD_TYPES, *IMAGE_UPLOAD_TYPES],
             accept_multiple_files=True,
-            help="You can upload multiple markdown files at once."
+            help="You can upload multiple markdown files at once, zip/tar archives holding thousands of posts and their assets, or the images your posts reference."
         )
         
-        if uploaded_files:
-            st.session_state.uploaded_files = uploaded_files
-            
-            # Process uploaded files
-            for uploaded_file in uploaded_files:
-                if uploaded_file.name not in st.session_state.file_contents:
-                    file_content = uploaded_file.read().decode("utf-8")
-                    metadata, content = parse_markdown_file(file_content, uploaded_file.name)
-                    
-                    st.session_state.file_contents[uploaded_file.name] = content
-                    st.session_state.file_metadata[uploaded_file.name] = metadata
-            
+        with st.expander("Import published posts"):
+            st.caption(
+                "Download every post in _posts/ of the configured repository and branch as one archive, "
+                "to edit them here. Only the posts you change are uploaded again."
+            )
+            if st.button("Import published posts", disabled=not st.session_state.github_token):
+                import_published_posts()
+            if st.session_state.imported_from is not None:
+                label, count, imported_at = st.session_state.imported_from
+                st.caption(f"{count} posts imported from {label} (as of {imported_at}).")
+        
+        filenames = ingest_uploads(uploaded_files or [])
+        # Imported posts are reviewed and published together with the uploads
+        filenames = list(dict.fromkeys(filenames + list(st.session_state.imported_posts)))
+        
+        if filenames:
             st.markdown('<p class="section-header">Step 2: Review and Edit Files</p>', unsafe_allow_html=True)
             
-            # Display uploaded files with preview and metadata editor
-            for i, uploaded_file in enumerate(uploaded_files):
-                filename = uploaded_file.name
-                
-                with st.expander(f"📄 {filename}", expanded=i==0):
-                    cols = st.columns([3, 2])
-                    
-                    with cols[0]:
-                        st.markdown(f"**Content Preview:**")
-                        st.text_area(
-                            "Content",
-                            st.session_state.file_contents[filename],
-                            height=200,
-                            key=f"content_{i}",
-                            on_change=lambda: None
-                        )
-                    
-                    with cols[1]:
-                        st.markdown('<div class="metadata-editor">', unsafe_allow_html=True)
-                        st.markdown(f"**Metadata Editor:**")
-                        
-                        # Title
-                        new_title = st.text_input(
-                            "Title",
-                            st.session_state.file_metadata[filename].get('title', ''),
-                            key=f"title_{i}"
-                        )
-                        st.session_state.file_metadata[filename]['title'] = new_title
-                        
-                        # Description
-                        new_description = st.text_area(
-                            "Description",
-                            st.session_state.file_metadata[filename].get('description', ''),
-                            key=f"description_{i}"
-                        )
-                        st.session_state.file_metadata[filename]['description'] = new_description
-                        
-                        # Date
-                        new_date = st.text_input(
-                            "Date (YYYY-MM-DD HH:MM:SS)",
-                            st.session_state.file_metadata[filename].get('date', ''),
-                            key=f"date_{i}"
-                        )
-                        st.session_state.file_metadata[filename]['date'] = new_date
-                        
-                        # Categories
-                        categories_str = ', '.join(st.session_state.file_metadata[filename].get('categories', []))
-                        new_categories = st.text_input(
-                            "Categories (comma separated)",
-                            categories_str,
-                            key=f"categories_{i}"
-                        )
-                        st.session_state.file_metadata[filename]['categories'] = [
-                            cat.strip() for cat in new_categories.split(',') if cat.strip()
-                        ]
-                        
-                        # Tags
-                        tags_str = ', '.join(st.session_state.file_metadata[filename].get('tags', []))
-                        new_tags = st.text_input(
-                            "Tags (comma separated)",
-                            tags_str,
-                            key=f"tags_{i}"
-                        )
-                        st.session_state.file_metadata[filename]['tags'] = [
-                            tag.strip() for tag in new_tags.split(',') if tag.strip()
-                        ]
-                        
-                        # Image URL
-                        new_image = st.text_input(
-                            "Image URL",
-                            st.session_state.file_metadata[filename].get('image', ''),
-                            key=f"image_{i}"
-                        )
-                        st.session_state.file_metadata[filename]['image'] = new_image
-                        
-                        # Layout
-                        new_layout = st.text_input(
-                            "Layout",
-                            st.session_state.file_metadata[filename].get('layout', 'post'),
-                            key=f"layout_{i}"
-                        )
-                        st.session_state.file_metadata[filename]['layout'] = new_layout
-                        
-                        # Validate filename
-                        if not validate_filename(filename):
-                            st.warning(f"Filename '{filename}' doesn't follow Jekyll post format (YYYY-MM-DD-title.md).")
-                            suggested_filename = format_filename(new_title)
-                            st.markdown(f"Suggested filename: <span class='filename'>{suggested_filename}</span>", unsafe_allow_html=True)
-                            if st.button("Use suggested filename", key=f"rename_{i}"):
-                                # We'll handle the rename during upload
-                                st.session_state.file_metadata[filename]['suggested_filename'] = suggested_filename
-                                st.success(f"Will be uploaded as: {suggested_filename}")
-                        
-                        st.markdown('</div>', unsafe_allow_html=True)
-                
-                # Add a subtle divider
-                st.markdown('<hr style="margin: 1.5rem 0; border: 0; border-top: 1px solid #E5E7EB;">', unsafe_allow_html=True)
+            render_bulk_rules(filenames)
+            render_metadata_grid(filenames)
             
             st.markdown('<p class="section-header">Step 3: Upload to GitHub</p>', unsafe_allow_html=True)
             
+            st.checkbox(
+                "Check external links and images",
+                help="Request every external URL the posts reference; without this only local images are checked.",
+                key="check_links"
+            )
+            if st.button("Run pre-flight checks"):
+                images = image_pipeline(github_targets())
+                run_preflight(prepare_posts(filenames, images), images)
+            render_preflight_report()
+            
             if not st.session_state.github_token:
                 st.warning("Please configure your GitHub token in the 'GitHub Settings' tab before uploading.")
             else:
+                st.checkbox(
+                    "Publish as a single commit",
+                    help="Push the whole batch atomically in one commit instead of one commit per file.",
+                    key="single_commit"
+                )
+                st.checkbox(
+                    "Hold future-dated posts until their date",
+                    help="Posts whose date lies in the future wait in the Schedule tab and are published when it arrives.",
+                    key="hold_future"
+                )
+                
                 if st.button("Upload Files to GitHub", type="primary"):
-                    st.markdown("**Upload Progress:**")
-                    
-                    # Create progress bar
-                    progress_bar = st.progress(0)
-                    
                     # Prepare files for upload
-                    files_to_upload = []
-                    for uploaded_file in uploaded_files:
-                        filename = uploaded_file.name
-                        
-                        # Check if we need to use a suggested filename
-                        if 'suggested_filename' in st.session_state.file_metadata[filename]:
-                            upload_filename = st.session_state.file_metadata[filename]['suggested_filename']
-                            # Remove the suggested_filename from metadata
-                            metadata = {k: v for k, v in st.session_state.file_metadata[filename].items() if k != 'suggested_filename'}
-                        else:
-                            upload_filename = filename
-                            metadata = st.session_state.file_metadata[filename]
-                        
-                        # Create frontmatter
-                        frontmatter_content = yaml.dump(metadata, default_flow_style=False, allow_unicode=True)
-                        content = st.session_state.file_contents[filename]
-                        updated_content = f"---\n{frontmatter_content}---\n\n{content}"
-                        
-                        files_to_upload.append((upload_filename, updated_content))
-                    
-                    # Upload files
-                    with st.spinner("Uploading files to GitHub..."):
-                        results = upload_to_github(files_to_upload, progress_bar)
-                        
-                        # Store in upload history
-                        for result in results:
-                            st.session_state.upload_history.append({
-                                **result,
-                                "timestamp": datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                            })
-                    
-                    # Display results
-                    if results:
-                        st.markdown("**Upload Results:**")
-                        for result in results:
-                            filename = result["filename"]
-                            status = result["status"]
-                            
-                            if status == "created":
-                                st.markdown(f"✅ <span class='success-message'>Created:</span> <span class='filename'>{filename}</span> - [View on GitHub]({result['url']})", unsafe_allow_html=True)
-                            elif status == "updated":
-                                st.markdown(f"🔄 <span class='warning-message'>Updated:</span> <span class='filename'>{filename}</span> - [View on GitHub]({result['url']})", unsafe_allow_html=True)
-                            else:
-                                st.markdown(f"❌ <span class='error-message'>Error:</span> <span class='filename'>{filename}</span> - {result.get('message', 'Unknown error')}", unsafe_allow_html=True)
-                    else:
-                        st.error("Upload failed. Please check your GitHub settings and try again.")
+                    targets = github_targets()
+                    images = image_pipeline(targets)
+                    prepared = prepare_posts(filenames, images)
+                    # Checks of unchanged posts are cached, so this only costs time after edits
+                    report = run_preflight(prepared, images)
+                    if report.blocked:
+                        st.toast(f"{len(report.blocked)} post(s) with pre-flight errors were left out")
+                    with get_metrics().span("render", items=len(prepared)):
+                        posts_to_upload = [
+                            (upload_filename, render_post(metadata, body, st.session_state.file_frontmatter.get(filename)))
+                            for filename, upload_filename, metadata, body in prepared
+                            if filename not in report.blocked
+                        ]
+                    image_files = images.files_to_upload()
+                    jobs = []
+                    scheduled = set()
+                    for target in targets:
+                        files_to_upload = target_files(target, image_files, posts_to_upload)
+                        if st.session_state.hold_future:
+                            files_to_upload, held = split_scheduled(files_to_upload)
+                            if held:
+                                schedule_posts([target], held)
+                                scheduled.update(filename for files in held.values() for filename, _content in files)
+                        # Journal the batch once per target first so an interrupted upload can be resumed
+                        if files_to_upload:
+                            jobs.append(
+                                (get_journal().start_job(target, files_to_upload, st.session_state.single_commit), target)
+                            )
+                    if scheduled:
+                        st.toast(f"{len(scheduled)} future-dated post(s) scheduled")
+                    if jobs:
+                        submit_upload_jobs(jobs)
+                    elif not scheduled:
+                        st.toast("No post changed since the import, so there is nothing to upload")
+                    st.rerun()
     
     with tabs[1]:  # GitHub Settings tab
         st.markdown('<p class="section-header">GitHub Repository Settings</p>', unsafe_allow_html=True)
@@ -496,7 +1233,8 @@ def main():
             type="password",
             help="Create a token at GitHub > Settings > Developer settings > Personal access tokens",
             key="github_token_input",
-            on_change=lambda: setattr(st.session_state, 'github_token', st.session_state.github_token_input)
+            on_change=update_github_setting,
+            args=('github_token',)
         )
         
         col1, col2 = st.columns(2)
@@ -507,7 +1245,8 @@ def main():
                 value=st.session_state.repo_owner,
                 help="GitHub username or organization name",
                 key="repo_owner_input",
-                on_change=lambda: setattr(st.session_state, 'repo_owner', st.session_state.repo_owner_input)
+                on_change=update_github_setting,
+                args=('repo_owner',)
             )
         
         with col2:
@@ -515,14 +1254,56 @@ def main():
                 "Repository Name",
                 value=st.session_state.repo_name,
                 key="repo_name_input",
-                on_change=lambda: setattr(st.session_state, 'repo_name', st.session_state.repo_name_input)
+                on_change=update_github_setting,
+                args=('repo_name',)
             )
         
         st.text_input(
             "Branch",
             value=st.session_state.branch,
             key="branch_input",
-            on_change=lambda: setattr(st.session_state, 'branch', st.session_state.branch_input)
+            on_change=update_github_setting,
+            args=('branch',)
+        )
+        
+        # The editor's input stays fixed for the session so that its edits are kept across reruns
+        if 'mirror_targets_initial' not in st.session_state:
+            st.session_state.mirror_targets_initial = pd.DataFrame(
+                st.session_state.mirror_targets, columns=['owner', 'name', 'branch']
+            )
+        mirrors = st.data_editor(
+            st.session_state.mirror_targets_initial,
+            num_rows="dynamic",
+            hide_index=True,
+            key="mirror_targets_input",
+            column_config={
+                'owner': st.column_config.TextColumn("Owner"),
+                'name': st.column_config.TextColumn("Repository"),
+                'branch': st.column_config.TextColumn("Branch", help="Leave empty to use the branch above"),
+            }
+        )
+        st.caption("Mirror targets: every upload is also published to these repositories or branches, using the same token.")
+        st.session_state.mirror_targets = mirrors.fillna('').to_dict('records')
+        
+        st.checkbox(
+            "Optimize and publish referenced images",
+            help=f"Local images used by posts are resized, recompressed and uploaded once to {IMAGE_DIR}/, and the posts are rewritten to point at them.",
+            key="image_pipeline"
+        )
+        
+        image_cols = st.columns(2)
+        with image_cols[0]:
+            st.number_input("Maximum image width (px)", min_value=320, max_value=4096, step=80, key="image_max_width")
+        with image_cols[1]:
+            st.slider("JPEG/WebP quality", min_value=40, max_value=95, key="image_quality")
+        
+        st.number_input(
+            "Upload concurrency",
+            min_value=1,
+            max_value=16,
+            step=1,
+            help="Number of GitHub API requests kept in flight while uploading. Lower it if you hit secondary rate limits.",
+            key="upload_concurrency"
         )
         
         st.markdown('</div>', unsafe_allow_html=True)
@@ -531,9 +1312,8 @@ def main():
         if st.button("Test GitHub Connection"):
             with st.spinner("Testing connection..."):
                 try:
-                    auth = Auth.Token(st.session_state.github_token)
-                    g = Github(auth=auth)
-                    repo = g.get_repo(f"{st.session_state.repo_owner}/{st.session_state.repo_name}")
+                    # Reuses the pooled client later uploads will use, so a passing test also warms it up
+                    _g, repo = github_target().connect(pool_size=st.session_state.upload_concurrency)
                     
                     # Try to get the branch
                     try:
@@ -546,10 +1326,10 @@ def main():
                             st.success(f"✅ Found '_posts' directory with {len(posts_dir)} files")
                         except GithubException:
                             st.warning("⚠️ Could not find '_posts' directory in the repository. Make sure it exists.")
-                            
+                    
                     except GithubException:
                         st.error(f"❌ Branch '{st.session_state.branch}' not found. Please check branch name.")
-                        
+                
                 except GithubException as e:
                     if e.status == 401:
                         st.error("❌ Authentication failed. Please check your GitHub token.")
@@ -559,44 +1339,77 @@ def main():
                         st.error(f"❌ GitHub API error: {str(e)}")
                 except Exception as e:
                     st.error(f"❌ Connection error: {str(e)}")
+                
+                for mirror in github_targets()[1:]:
+                    try:
+                        _g, repo = mirror.connect(pool_size=st.session_state.upload_concurrency)
+                        repo.get_branch(mirror.branch)
+                        st.success(f"✅ Mirror '{mirror.full_name}' on branch '{mirror.branch}' is reachable")
+                    except GithubException as e:
+                        st.error(f"❌ Mirror '{mirror.full_name}' on branch '{mirror.branch}' is not reachable: {str(e)}")
+                    except Exception as e:
+                        st.error(f"❌ Mirror '{mirror.full_name}': {str(e)}")
     
     with tabs[2]:  # Upload History tab
         st.markdown('<p class="section-header">Upload History</p>', unsafe_allow_html=True)
         
-        if not st.session_state.upload_history:
+        filter_cols = st.columns([2, 2, 2, 1])
+        with filter_cols[0]:
+            date_range = st.date_input("Date range", value=(), key="history_dates")
+        with filter_cols[1]:
+            statuses = st.multiselect("Status", list(STATUS_CLASSES) + ['error'], key="history_statuses")
+        with filter_cols[2]:
+            filename_query = st.text_input("Filename contains", key="history_filename")
+        with filter_cols[3]:
+            page_size = st.selectbox("Rows per page", GRID_PAGE_SIZES, key="history_page_size")
+        
+        start_date = date_range[0] if len(date_range) > 0 else None
+        end_date = date_range[1] if len(date_range) > 1 else start_date
+        
+        def fetch_page(page):
+            # Only the requested page is read from the store
+            return get_history().query(
+                start=start_date,
+                end=end_date,
+                statuses=statuses,
+                filename=filename_query,
+                limit=page_size,
+                offset=(page - 1) * page_size
+            )
+        
+        page = st.session_state.get("history_page", 1)
+        rows, total = fetch_page(page)
+        page_count = max(1, -(-total // page_size))
+        if page > page_count:
+            # The filters shrank the result set below the current page
+            page = st.session_state.history_page = page_count
+            rows, total = fetch_page(page)
+        
+        if total == 0:
             st.info("No upload history yet. Upload files to see them here.")
         else:
-            # Convert history to DataFrame for better display
-            history_df = pd.DataFrame(st.session_state.upload_history)
+            st.number_input(f"Page (of {page_count})", min_value=1, max_value=page_count, key="history_page")
+            st.caption(f"{total} matching uploads.")
             
-            # Add clickable links
-            if 'url' in history_df.columns:
-                history_df['view'] = history_df.apply(
-                    lambda row: f'<a href="{row["url"]}" target="_blank">View on GitHub</a>' if 'url' in row and row['url'] else '', 
-                    axis=1
-                )
-            
-            # Style the status column
-            history_df['styled_status'] = history_df['status'].apply(
-                lambda x: f'<span class="success-message">{x}</span>' if x == 'created' else 
-                         (f'<span class="warning-message">{x}</span>' if x == 'updated' else 
-                          f'<span class="error-message">{x}</span>')
-            )
-            
-            # Reorder and select columns for display
-            display_columns = ['timestamp', 'filename', 'styled_status']
-            if 'view' in history_df.columns:
-                display_columns.append('view')
+            history_df = _styled_history(pd.DataFrame(rows))
             
             # Display the table
             st.markdown(
-                history_df[display_columns].to_html(escape=False, index=False),
+                history_df[['timestamp', 'filename', 'styled_status', 'view']].to_html(escape=False, index=False),
                 unsafe_allow_html=True
             )
             
             if st.button("Clear History"):
-                st.session_state.upload_history = []
-                st.experimental_rerun()
+                get_history().clear()
+                st.rerun()
+    
+    with tabs[3]:  # Metrics tab
+        st.markdown('<p class="section-header">Upload Metrics</p>', unsafe_allow_html=True)
+        render_metrics_panel()
+    
+    with tabs[4]:  # Schedule tab
+        st.markdown('<p class="section-header">Scheduled Posts</p>', unsafe_allow_html=True)
+        render_schedule_panel()
 
 if __name__ == "__main__":
     main()
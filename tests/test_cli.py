@@ -0,0 +1,49 @@
+from benchmarks.fake_github import FakeGitHub
+from bulkpost.cli import _publish_changes, build_parser
+from bulkpost.github_upload import GitHubTarget, forget_client
+from bulkpost.journal import UploadJournal
+from bulkpost.metrics import UploadMetrics
+from bulkpost.preflight import StaticLinkChecker
+from bulkpost.store import ContentStore
+
+POST = "---\ntitle: Photo\ndate: 2024-01-01 10:00:00\n---\n![a photo](img/photo.png)\n"
+
+def _published_post(server):
+    repository = server.repository
+    files = repository.flatten(repository.commits[repository.refs["main"]]["tree"])
+    return repository.blobs[files["_posts/2024-01-01-photo.md"]].decode("utf-8")
+
+def test_watch_republishes_posts_when_only_an_image_changes(tmp_path, monkeypatch):
+    monkeypatch.setenv("BULKPOST_DATA_DIR", str(tmp_path / "data"))
+    site = tmp_path / "site"
+    (site / "img").mkdir(parents=True)
+    post = site / "2024-01-01-photo.md"
+    image = site / "img" / "photo.png"
+    post.write_text(POST, encoding="utf-8")
+    image.write_bytes(b"first version")
+    
+    with FakeGitHub() as server:
+        args = build_parser().parse_args(["watch", str(site), "--token", "test-token", "--api-url", server.url])
+        target = GitHubTarget(token="test-token", owner="bench", name="site", api_url=server.url)
+        state = {
+            "watcher": None,
+            "store": ContentStore(tmp_path / "content"),
+            "assets": {},
+            "published": {},
+            "image_refs": {},
+            "journal": UploadJournal(),
+            "metrics": UploadMetrics(),
+            "link_checker": StaticLinkChecker(),
+        }
+        try:
+            _publish_changes({post, image}, site, target, args, state)
+            before = _published_post(server)
+            # The next round only sees the edited image
+            image.write_bytes(b"second version")
+            _publish_changes({image}, site, target, args, state)
+            after = _published_post(server)
+        finally:
+            forget_client(target)
+    
+    assert before != after
+    assert "img/photo.png" not in after
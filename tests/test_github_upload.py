@@ -0,0 +1,80 @@
+import time
+from types import SimpleNamespace
+
+from benchmarks.fake_github import FakeGitHub
+from bulkpost.github_upload import (
+    GitHubTarget,
+    RateLimitGate,
+    call_with_retries,
+    forget_client,
+    run_concurrently,
+    upload_to_github,
+    upload_to_github_batch,
+)
+
+def _target(server):
+    return GitHubTarget(token="test-token", owner="bench", name="site", api_url=server.url)
+
+def test_uploads_without_rate_limit_headers():
+    # GitHub Enterprise with rate limiting off sends no X-RateLimit headers and 404s /rate_limit
+    with FakeGitHub() as server:
+        server._rate_limit_headers = lambda: ({}, False)
+        target = _target(server)
+        try:
+            batch = upload_to_github_batch([("2024-01-01-a.md", "a\n")], target)
+            single = upload_to_github([("2024-01-02-b.md", "b\n")], target)
+        finally:
+            forget_client(target)
+    
+    assert [result["status"] for result in batch + single] == ["created", "created"]
+    assert all(request["endpoint"] != "unknown" for request in server.requests)
+
+def _ref_update_tokens(server):
+    return [request["authorization"] for request in server.requests if request["endpoint"] == "update_ref"]
+
+def test_branch_moves_with_the_uploading_token():
+    with FakeGitHub() as server:
+        first = GitHubTarget(token="token-a", owner="bench", name="site", api_url=server.url)
+        second = GitHubTarget(token="token-b", owner="bench", name="site", api_url=server.url)
+        try:
+            upload_to_github_batch([("2024-01-01-a.md", "a\n")], first)
+            # Another session with its own token, while the first one's index is still cached
+            upload_to_github_batch([("2024-01-02-b.md", "b\n")], second)
+            # The token of a session changes
+            forget_client(first)
+            upload_to_github_batch([("2024-01-03-c.md", "c\n")], second)
+        finally:
+            forget_client()
+    
+    tokens = _ref_update_tokens(server)
+    assert len(tokens) == 3
+    assert "token-a" in tokens[0]
+    assert all("token-b" in token for token in tokens[1:])
+
+def test_client_doesnt_sleep_between_writes():
+    # A batch commit makes four writes; PyGithub's default throttle would space them a second apart
+    with FakeGitHub() as server:
+        target = _target(server)
+        start = time.monotonic()
+        try:
+            results = upload_to_github_batch([("2024-01-01-a.md", "a\n")], target)
+        finally:
+            forget_client(target)
+    
+    assert [result["status"] for result in results] == ["created"]
+    assert time.monotonic() - start < 2
+
+def test_gate_spaces_writes_of_concurrent_workers():
+    client = SimpleNamespace(requester=SimpleNamespace(rate_limiting=(-1, -1), rate_limiting_resettime=0))
+    gate = RateLimitGate(client, write_interval=0.1)
+    
+    def call(i, write):
+        return call_with_retries(gate, time.monotonic, write=write)
+    
+    writes = sorted(run_concurrently(call, [(i, True) for i in range(5)], concurrency=5))
+    start = time.monotonic()
+    run_concurrently(call, [(i, False) for i in range(5)], concurrency=5)
+    
+    assert all(later - earlier >= 0.095 for earlier, later in zip(writes, writes[1:]))
+    # Five paced writes span 0.4 s; unpaced reads only wait for the thread pool
+    assert time.monotonic() - start < 0.2
@@ -0,0 +1,27 @@
+from bulkpost.images import ImagePipeline, ImageSettings
+from bulkpost.preflight import preflight
+from bulkpost.store import ContentStore
+
+def test_body_images_point_below_the_site_base_url(tmp_path):
+    store = ContentStore(tmp_path)
+    images = ImagePipeline(store, {"img/photo.png": store.put_bytes(b"not really a png")}, ImageSettings(), {})
+    metadata = {'title': 'Photo', 'date': '2024-01-01', 'layout': 'post', 'image': 'img/photo.png'}
+    metadata, body = images.rewrite(metadata, "![a](img/photo.png)\n<img src=\"img/photo.png\">", "post.md")
+    
+    published = metadata['image']
+    assert published.startswith('/assets/images/')
+    assert body == f'![a]({{{{site.baseurl}}}}{published})\n<img src="{{{{site.baseurl}}}}{published}">'
+    
+    report = preflight([("post.md", "2024-01-01-photo.md", metadata, body)], known_paths=images.site_paths())
+    assert [issue for issue in report.issues if issue.check == "image"] == []
+    
+    missing = [("post.md", "2024-01-01-photo.md", metadata, "![a]({{site.baseurl}}/assets/images/gone.png)")]
+    assert [issue.check for issue in preflight(missing, known_paths=images.site_paths()).issues] == ["image"]
+
+def test_body_url_prefix_can_be_turned_off(tmp_path):
+    store = ContentStore(tmp_path)
+    settings = ImageSettings(body_url_prefix='')
+    images = ImagePipeline(store, {"photo.png": store.put_bytes(b"not really a png")}, settings, {})
+    _metadata, body = images.rewrite({}, "![a](photo.png)")
+    
+    assert body.startswith('![a](/assets/images/')
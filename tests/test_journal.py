@@ -0,0 +1,44 @@
+import pytest
+
+from benchmarks.fake_github import FakeGitHub
+from bulkpost.github_upload import GitHubTarget, forget_client
+from bulkpost.journal import UploadJournal, run_job
+
+class Interrupted(Exception):
+    pass
+
+def test_resumed_job_finds_files_of_the_interrupted_commit_unchanged(tmp_path):
+    files = [("2024-01-01-a.md", "a\n"), ("2024-01-02-b.md", "b\n")]
+    journal = UploadJournal(tmp_path / "journal.sqlite3")
+    
+    with FakeGitHub() as server:
+        target = GitHubTarget(token="test-token", owner="bench", name="site", api_url=server.url)
+        job_id = journal.start_job(target, files, single_commit=True)
+        
+        # The process dies after the branch moved but before any result reached the journal
+        record = journal.record
+        def crash(job_id, result):
+            raise Interrupted()
+        journal.record = crash
+        try:
+            with pytest.raises(Interrupted):
+                run_job(journal, job_id, target)
+        finally:
+            journal.record = record
+            forget_client()
+        head = server.repository.refs["main"]
+        
+        assert journal.outstanding(job_id) == files
+        assert [job["id"] for job in journal.incomplete_jobs()] == [job_id]
+        
+        server.reset_log()
+        try:
+            results = run_job(journal, job_id, target)
+        finally:
+            forget_client()
+    
+    assert [result["status"] for result in results] == ["unchanged", "unchanged"]
+    assert server.repository.refs["main"] == head
+    assert not [request for request in server.requests if request["method"] != "GET"]
+    assert journal.outstanding(job_id) == []
+    assert journal.job(job_id)["state"] == "done"
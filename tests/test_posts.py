@@ -0,0 +1,49 @@
+from bulkpost import posts
+from bulkpost.posts import parse_post, render_post
+
+def test_parses_crlf_frontmatter():
+    content = '---\r\ntitle: Hello\r\ndate: 2024-01-01\r\n---\r\n\r\nBody\r\n'
+    metadata, body, frontmatter = parse_post(content, '2024-01-01-crlf.md', use_cache=False)
+    
+    assert metadata['title'] == 'Hello'
+    assert body == 'Body'
+    assert render_post(metadata, body, frontmatter) == content
+
+def test_posts_with_equal_metadata_keep_their_own_frontmatter():
+    first = '---\n# imported from the old blog\ntitle: "Same"\ndate: 2024-01-01\n---\n\nFirst body\n'
+    second = "---\ntitle: 'Same'\ndate: 2024-01-01\n---\n\nSecond body\n"
+    parsed_first = parse_post(first, '2024-01-01-first.md', use_cache=False)
+    parsed_second = parse_post(second, '2024-01-01-second.md', use_cache=False)
+    
+    assert parsed_first[0] == parsed_second[0]
+    assert render_post(*parsed_first) == first
+    assert render_post(*parsed_second) == second
+
+def test_identical_posts_written_differently_keep_their_own_frontmatter():
+    first = '---\ntitle: "Twin"\ndate: 2024-01-01\n---\n\nSame body\n'
+    second = "---\ntitle: 'Twin'\ndate: 2024-01-01\n---\n\nSame body\n"
+    parsed_first = parse_post(first, '2024-01-01-a.md', use_cache=False)
+    parsed_second = parse_post(second, '2024-01-01-b.md', use_cache=False)
+    
+    assert render_post(*parsed_first) == first
+    assert render_post(*parsed_second) == second
+
+def test_original_frontmatter_survives_other_parses_and_renders(monkeypatch):
+    monkeypatch.setattr(posts, "DUMP_CACHE_SIZE", 1)
+    content = '---\ntitle: Kept\ndate: 2024-01-01\n---\n\nBody\n'
+    metadata, body, frontmatter = parse_post(content, '2024-01-01-kept.md')
+    for i in range(3):
+        other = parse_post(f'---\ntitle: Other {i}\n---\n\nBody\n', f'2024-01-0{i + 2}-other.md')
+        render_post(*other)
+    posts._parse_cache.clear()
+    
+    assert render_post(metadata, body, frontmatter) == content
+
+def test_edited_post_is_dumped():
+    content = '---\ntitle: Kept\ndate: 2024-01-01\n---\n\nBody\n'
+    metadata, body, frontmatter = parse_post(content, '2024-01-01-kept.md', use_cache=False)
+    metadata['title'] = 'Edited'
+    
+    rendered = render_post(metadata, body, frontmatter)
+    assert rendered.startswith('---\ntitle: Edited\n')
+    assert rendered.endswith('---\n\nBody')
@@ -0,0 +1,33 @@
+from bulkpost.posts import parse_markdown_file
+from bulkpost.preflight import preflight
+
+def test_post_without_date_takes_its_filename_date():
+    filename = '2024-02-01-nodate.md'
+    metadata, body = parse_markdown_file('---\ntitle: No date\n---\n\nBody\n', filename, use_cache=False)
+    report = preflight([(filename, filename, metadata, body)])
+    
+    assert metadata['date'].startswith('2024-02-01')
+    assert [issue for issue in report.issues if issue.check == "date"] == []
+
+def _image_issues(metadata, body, known_paths):
+    report = preflight([("2024-01-01-post.md", "2024-01-01-post.md", metadata, body)], known_paths=known_paths)
+    return [(issue.severity, issue.message) for issue in report.issues if issue.check == "image"]
+
+def test_frontmatter_image_resolves_against_the_site_root():
+    metadata = {'title': 'Post', 'date': '2024-01-01', 'layout': 'post', 'image': 'assets/images/x.jpg'}
+    
+    assert _image_issues(metadata, "Body", {"assets/images/x.jpg"}) == []
+
+def test_liquid_image_references_are_left_to_jekyll():
+    metadata = {'title': 'Post', 'date': '2024-01-01', 'layout': 'post'}
+    body = "![a]({{page.hero}}) <img src=\"{% link assets/images/y.png %}\">"
+    
+    assert _image_issues(metadata, body, set()) == []
+
+def test_unknown_local_images_only_warn():
+    metadata = {'title': 'Post', 'date': '2024-01-01', 'layout': 'post', 'image': 'assets/images/gone.jpg'}
+    body = "![a](pic.png) ![b](/assets/images/gone.png)"
+    
+    issues = _image_issues(metadata, body, set())
+    assert len(issues) == 3
+    assert {severity for severity, _message in issues} == {"warning"}
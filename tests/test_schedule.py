@@ -0,0 +1,60 @@
+import datetime
+
+from bulkpost.github_upload import GitHubTarget
+from bulkpost.journal import UploadJournal
+from bulkpost.schedule import ScheduleQueue, release_time, window_start
+
+def _at(minute, second=0):
+    return datetime.datetime(2024, 5, 1, 10, minute, second)
+
+def test_release_times_round_up_to_the_window_end():
+    assert release_time(_at(1, 30)) == _at(5)
+    assert release_time(_at(4, 59)) == _at(5)
+    assert release_time(_at(5)) == _at(5)
+    assert release_time(_at(5, 1), window=60) == _at(6)
+
+def test_window_start_rounds_down():
+    assert window_start(_at(4, 59)) == _at(0)
+    assert window_start(_at(5)) == _at(5)
+    assert window_start(_at(7, 30), window=60) == _at(7)
+
+def test_posts_due_within_one_window_are_released_together(tmp_path):
+    queue = ScheduleQueue(tmp_path / "schedule.sqlite3")
+    journal = UploadJournal(tmp_path / "journal.sqlite3")
+    site = GitHubTarget(token="test-token", owner="bench", name="site")
+    queue.add(site, [("2024-05-01-a.md", "a\n")], _at(2))
+    queue.add(site, [("2024-05-01-b.md", "b\n")], _at(4))
+    queue.add(site, [("2024-05-01-c.md", "c\n")], _at(7))
+    token_for = lambda fields: "test-token"
+    
+    # A runner halfway through the window releases only what was due by its start
+    assert queue.release(journal, token_for, now=window_start(_at(4, 30))) == []
+    
+    jobs = queue.release(journal, token_for, now=_at(5))
+    assert len(jobs) == 1
+    job_id, target = jobs[0]
+    assert (target.full_name, target.token) == ("bench/site", "test-token")
+    assert journal.outstanding(job_id) == [("2024-05-01-a.md", "a\n"), ("2024-05-01-b.md", "b\n")]
+    assert journal.job(job_id)["single_commit"]
+    assert [entry["filename"] for entry in queue.entries()] == ["2024-05-01-c.md"]
+
+def test_posts_without_a_token_stay_queued(tmp_path):
+    queue = ScheduleQueue(tmp_path / "schedule.sqlite3")
+    journal = UploadJournal(tmp_path / "journal.sqlite3")
+    site = GitHubTarget(token="test-token", owner="bench", name="site")
+    mirror = GitHubTarget(token="other-token", owner="bench", name="mirror")
+    queue.add(site, [("2024-05-01-a.md", "a\n")], _at(2))
+    queue.add(mirror, [("2024-05-01-a.md", "a\n")], _at(2))
+    tokens = {"site": "test-token"}
+    
+    jobs = queue.release(journal, lambda fields: tokens.get(fields["name"]), now=_at(5))
+    
+    assert [target.full_name for _job_id, target in jobs] == ["bench/site"]
+    assert [entry["target"]["name"] for entry in queue.entries()] == ["mirror"]
+    assert [job["id"] for job in journal.incomplete_jobs()] == [jobs[0][0]]
+    
+    # Once the token is known, the next release picks the post up
+    tokens["mirror"] = "other-token"
+    jobs = queue.release(journal, lambda fields: tokens.get(fields["name"]), now=_at(5))
+    assert [target.full_name for _job_id, target in jobs] == ["bench/mirror"]
+    assert queue.entries() == []
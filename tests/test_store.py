@@ -0,0 +1,19 @@
+import os
+import time
+
+from bulkpost.store import ContentStore
+
+def test_prune_removes_only_entries_unused_for_max_age(tmp_path):
+    store = ContentStore(tmp_path)
+    old_key = store.put("old post")
+    used_key = store.put("old but read again")
+    fresh_key = store.put("fresh post")
+    long_ago = time.time() - 3600
+    for key in (old_key, used_key):
+        os.utime(store.path(key), (long_ago, long_ago))
+    store.get(used_key)
+    
+    assert store.prune(max_age=60) == (1, len("old post"))
+    assert not store.path(old_key).exists()
+    assert store.get(used_key) == "old but read again"
+    assert store.get(fresh_key) == "fresh post"